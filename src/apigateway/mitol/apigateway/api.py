@@ -1,6 +1,8 @@
 """API functions."""
 
 import base64
+import functools
+import hashlib
 import json
 import logging
 
@@ -34,31 +36,81 @@ def decode_x_header(request: HttpRequest | dict) -> dict | None:
         )
     else:
         # We've likely got a scope dict from Channels.
-        # We need to do some processing - scopes don't append HTTP_, don't upper
-        # the header name, and don't convert - to _. (Also these get stored as
-        # bytes.)
-        check_header = (
-            settings.MITOL_APIGATEWAY_USERINFO_HEADER_NAME.lower()
-            .replace("http_", "")
-            .replace("_", "-")
-        )
-        scope_headers = request.get("headers", [])
-        x_userinfo = [x[1] for x in scope_headers if x[0].decode() == check_header]
+        x_userinfo = get_scope_header(request)
 
-        if len(x_userinfo) == 0:
-            log.warning("No %s header found", check_header)
+        if x_userinfo is None:
+            log.warning(
+                "No %s header found", settings.MITOL_APIGATEWAY_USERINFO_HEADER_NAME
+            )
             return None
 
-        x_userinfo = x_userinfo.pop()
-
     if not x_userinfo:
         log.warning(
             "No %s header found", settings.MITOL_APIGATEWAY_USERINFO_HEADER_NAME
         )
         return None
 
-    decoded_x_userinfo = base64.b64decode(x_userinfo)
-    return json.loads(decoded_x_userinfo)
+    # copied so callers can't change the cached value
+    return dict(_decode_userinfo(x_userinfo))
+
+
+@functools.lru_cache(maxsize=16)
+def _scope_header_name(header_name: str) -> bytes:
+    """
+    Convert a META-style header name to the form it takes in a Channels scope.
+
+    Scopes don't prepend HTTP_, don't upper the header name, and don't convert
+    - to _. (Also these get stored as bytes.)
+    """
+    return header_name.lower().replace("http_", "").replace("_", "-").encode()
+
+
+def get_scope_header(scope: dict, header_name: str | None = None) -> bytes | None:
+    """
+    Return the value of a header from a Channels scope, or None if it isn't set.
+
+    Args:
+        scope (dict): the Channels scope
+        header_name (str): the META-style name of the header; defaults to the
+            userinfo header
+    Returns:
+    bytes of the header value, the last one if it was sent more than once
+    """
+    check_header = _scope_header_name(
+        header_name or settings.MITOL_APIGATEWAY_USERINFO_HEADER_NAME
+    )
+    value = None
+
+    for name, header_value in scope.get("headers", []):
+        if name == check_header:
+            value = header_value
+
+    return value
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_userinfo(x_userinfo: str | bytes) -> dict:
+    """
+    Decode a userinfo header value. The same header comes in with every request
+    a user makes, so the decoded values are cached.
+    """
+    return json.loads(base64.b64decode(x_userinfo))
+
+
+def get_userinfo_fingerprint(userinfo: dict) -> str:
+    """
+    Return a fingerprint of decoded userinfo claims, for telling whether they
+    have changed since a user was last updated from them.
+    """
+    # the model map decides which claims get written where, so a change to it
+    # should invalidate the fingerprints too
+    serialized = json.dumps(
+        [userinfo, settings.MITOL_APIGATEWAY_USERINFO_MODEL_MAP],
+        sort_keys=True,
+        default=str,
+    )
+
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
 
 def get_user_id_from_userinfo_header(request: HttpRequest | dict) -> str | None:
@@ -4,16 +4,84 @@ import contextlib
 import logging
 
 from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import RemoteUserBackend
+from django.core.cache import caches
 from django.db import transaction
-from mitol.apigateway.api import decode_x_header
+from django.utils.functional import empty
+from mitol.apigateway.api import decode_x_header, get_userinfo_fingerprint
 
 log = logging.getLogger(__name__)
 User = get_user_model()
 
+USERINFO_FINGERPRINT_CACHE_KEY_PREFIX = "mitol.apigateway.userinfo_fingerprint"
+
+
+def _fingerprint_cache_key(remote_user: str) -> str:
+    return f"{USERINFO_FINGERPRINT_CACHE_KEY_PREFIX}:{remote_user}"
+
+
+def _fingerprint_cache_timeout() -> int:
+    return getattr(settings, "MITOL_APIGATEWAY_USERINFO_CACHE_TIMEOUT", 0) or 0
+
+
+def _fingerprint_cache():
+    return caches[settings.MITOL_APIGATEWAY_USERINFO_CACHE_NAME]
+
+
+def _update_fields(obj, values: dict) -> list[str]:
+    """Set values on obj, returning the names of the fields that changed"""
+    changed = []
+
+    for field_name, value in values.items():
+        if getattr(obj, field_name, None) != value or not hasattr(obj, field_name):
+            setattr(obj, field_name, value)
+            changed.append(field_name)
+
+    return changed
+
+
+def _save_changed_fields(obj, changed: list[str]) -> None:
+    """Save only the changed fields, plus any auto_now fields as save() would"""
+    concrete_fields = obj._meta.concrete_fields  # noqa: SLF001
+    field_names = {model_field.name for model_field in concrete_fields} | {
+        model_field.attname for model_field in concrete_fields
+    }
+    # the map can name plain attributes, which are set but there's nothing to save
+    changed = [field_name for field_name in changed if field_name in field_names]
+
+    if not changed:
+        return
+
+    auto_now_fields = [
+        model_field.name
+        for model_field in concrete_fields
+        if getattr(model_field, "auto_now", False)
+    ]
+
+    obj.save(update_fields=[*changed, *auto_now_fields])
+
+
+def get_request_user(request):
+    """
+    Return the user already attached to a request or Channels scope, if any.
+
+    A Channels scope holds a lazy user object that can't be read until the
+    auth middleware has resolved it, so that counts as no user.
+    """
+    if isinstance(request, dict):
+        user = request.get("user")
+
+        if getattr(user, "_wrapped", None) is empty:
+            return None
+
+        return user
+
+    return getattr(request, "user", None)
+
 
 class RemoteUserCustomFieldBackend(RemoteUserBackend):
     """
@@ -34,8 +102,9 @@ class RemoteUserCustomFieldBackend(RemoteUserBackend):
 
         # if the current user and the user from the backend match
         # just return that user and do no further queries or configuration
-        if getattr(request.user, self.lookup_field, None) == username:
-            user = request.user
+        request_user = get_request_user(request)
+        if getattr(request_user, self.lookup_field, None) == username:
+            user = request_user
             return user if self.user_can_authenticate(user) else None
 
         if self.create_unknown_user:
@@ -56,8 +125,9 @@ class RemoteUserCustomFieldBackend(RemoteUserBackend):
 
         # if the current user and the user from the backend match
         # just return that user and do no further queries or configuration
-        if getattr(request.user, self.lookup_field, None) == username:
-            user = request.user
+        request_user = get_request_user(request)
+        if getattr(request_user, self.lookup_field, None) == username:
+            user = request_user
             return user if self.user_can_authenticate(user) else None
 
         if self.create_unknown_user:
@@ -90,6 +160,10 @@ class ApisixRemoteUserBackend(RemoteUserCustomFieldBackend):
         Authenticate the user
         """
         try:
+            user = self._get_user_without_writes(request, remote_user)
+            if user is not None:
+                return user if self.user_can_authenticate(user) else None
+
             with transaction.atomic():
                 return super().authenticate(request, remote_user)
         except Exception:
@@ -99,19 +173,75 @@ class ApisixRemoteUserBackend(RemoteUserCustomFieldBackend):
     async def aauthenticate(self, request, remote_user):
         """See authenticate().
 
-        Delegates to the sync ``authenticate()`` (via ``sync_to_async``)
-        rather than awaiting ``super().aauthenticate()`` directly: the
-        latter's async ORM calls can't be wrapped in a plain
-        ``transaction.atomic()`` block from an async context (Django raises
-        ``SynchronousOnlyOperation``), and the sync path is the one covered
-        by tests.
+        Most logins don't need to write anything, so the user is looked up on
+        the shared thread pool rather than the single thread-sensitive one that
+        all sync ORM work otherwise queues behind. Only if the user needs to be
+        created or updated does this delegate to the sync ``authenticate()``
+        (via ``sync_to_async``): its writes have to run in a plain
+        ``transaction.atomic()`` block, which can't be used from an async
+        context (Django raises ``SynchronousOnlyOperation``).
         """
         if not remote_user:
             return None
+
+        try:
+            user = self._get_session_user(request, remote_user)
+            if user is None:
+                user = await database_sync_to_async(
+                    self._get_user_without_writes, thread_sensitive=False
+                )(request, remote_user)
+        except Exception:
+            log.exception("Unable to authenticate api gateway user")
+            return None
+
+        if user is not None:
+            return user if self.user_can_authenticate(user) else None
+
         return await sync_to_async(self.authenticate, thread_sensitive=True)(
             request, remote_user
         )
 
+    def _get_session_user(self, request, remote_user):
+        """Return the user already attached to the request if it's remote_user"""
+        user = get_request_user(request)
+        username = self.clean_username(remote_user)
+
+        if user is not None and getattr(user, self.lookup_field, None) == username:
+            return user
+
+        return None
+
+    def _get_user_without_writes(self, request, remote_user):
+        """
+        Return the user for remote_user if authenticating them doesn't need to
+        write anything, which is the case if they're already attached to the
+        request, or if they exist and either updates are turned off or their
+        userinfo hasn't changed since it was last written to the database.
+        Otherwise return None.
+        """
+        if not remote_user:
+            return None
+
+        user = self._get_session_user(request, remote_user)
+        if user is not None:
+            return user
+
+        username = self.clean_username(remote_user)
+
+        if self.update_known_user:
+            if not _fingerprint_cache_timeout():
+                return None
+
+            decoded_headers = decode_x_header(request)
+            if not decoded_headers:
+                return None
+
+            fingerprint = _fingerprint_cache().get(_fingerprint_cache_key(username))
+            if fingerprint != get_userinfo_fingerprint(decoded_headers):
+                return None
+
+        return User.objects.filter(**{self.lookup_field: username}).first()
+
     def configure_user(self, request, user, *, created=True):
         """
         Configure the user - use the mapping to fill out the object(s).
@@ -130,6 +260,7 @@ class ApisixRemoteUserBackend(RemoteUserCustomFieldBackend):
 
         infomap = settings.MITOL_APIGATEWAY_USERINFO_MODEL_MAP
         decoded_headers = decode_x_header(request)
+        user_values = {}
 
         for header_field, model_field in infomap["user_fields"].items():
             value = decoded_headers.get(header_field, None)
@@ -141,19 +272,18 @@ class ApisixRemoteUserBackend(RemoteUserCustomFieldBackend):
                 field_not_set = getattr(user, model_field_name) == default_value
                 if not override and not field_not_set:
                     continue
-                setattr(user, model_field_name, value)
+                user_values[model_field_name] = value
             else:
-                setattr(user, model_field, value)
+                user_values[model_field] = value
 
-        user.save()
+        changed = _update_fields(user, user_values)
+        _save_changed_fields(user, changed)
 
-        log.debug("configure_user: Updated user %s", user)
+        log.debug("configure_user: Updated user %s fields %s", user, changed)
 
         for model_name in infomap["additional_models"]:
             AdditionalModel = apps.get_model(model_name)
-            model_fields = {
-                "user": user,
-            }
+            model_fields = {}
 
             for header_field, model_field, default_value in infomap[
                 "additional_models"
@@ -162,11 +292,36 @@ class ApisixRemoteUserBackend(RemoteUserCustomFieldBackend):
                     header_field, default_value
                 )
 
-            addl_model, _ = AdditionalModel.objects.update_or_create(
-                user=user,
-                defaults=model_fields,
+            addl_model = (
+                AdditionalModel.objects.select_for_update().filter(user=user).first()
             )
 
-            log.debug("configure_user: Updated model %s: %s", model_name, addl_model)
+            if addl_model is None:
+                addl_model = AdditionalModel.objects.create(user=user, **model_fields)
+                changed = list(model_fields)
+            else:
+                changed = _update_fields(addl_model, model_fields)
+                _save_changed_fields(addl_model, changed)
+
+            log.debug(
+                "configure_user: Updated model %s: %s fields %s",
+                model_name,
+                addl_model,
+                changed,
+            )
+
+        if _fingerprint_cache_timeout():
+            self._store_fingerprint(user, decoded_headers)
 
         return user
+
+    def _store_fingerprint(self, user, decoded_headers):
+        """Record the userinfo that user has been updated with, once committed"""
+        cache_key = _fingerprint_cache_key(getattr(user, self.lookup_field))
+        fingerprint = get_userinfo_fingerprint(decoded_headers)
+
+        transaction.on_commit(
+            lambda: _fingerprint_cache().set(
+                cache_key, fingerprint, timeout=_fingerprint_cache_timeout()
+            )
+        )
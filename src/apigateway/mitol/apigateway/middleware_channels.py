@@ -16,7 +16,6 @@ to be logged in even if they've logged out elsewhere.
 import logging
 
 from channels.auth import AuthMiddleware
-from channels.db import database_sync_to_async
 from channels.sessions import CookieMiddleware, SessionMiddleware
 from mitol.apigateway.api import get_user_id_from_userinfo_header
 from mitol.apigateway.backends import ApisixRemoteUserBackend
@@ -24,21 +23,26 @@ from mitol.apigateway.backends import ApisixRemoteUserBackend
 log = logging.getLogger(__name__)
 
 
-@database_sync_to_async
-def get_apisix_user(scope):
+async def get_apisix_user(scope):
     """
     Get the user using the ApisixRemoteUserBackend.
+
+    The claims are read from the scope without any IO, so anonymous connections
+    never leave the event loop, and returning users are looked up without
+    queueing behind the thread-sensitive executor (see
+    ApisixRemoteUserBackend.aauthenticate).
     """
 
+    from django.contrib.auth.models import AnonymousUser  # noqa: PLC0415
+
     user_id = get_user_id_from_userinfo_header(scope)
 
     log.debug("Got user ID %s", user_id)
 
     if user_id:
         backend = ApisixRemoteUserBackend()
-        return backend.authenticate(request=scope, remote_user=user_id)
-
-    from django.contrib.auth.models import AnonymousUser  # noqa: PLC0415
+        user = await backend.aauthenticate(request=scope, remote_user=user_id)
+        return user or AnonymousUser()
 
     return AnonymousUser()
 
@@ -53,6 +53,12 @@ MITOL_APIGATEWAY_USERINFO_UPDATE = True
 # This is the name of the field used to lookup the user
 MITOL_APIGATEWAY_USER_LOOKUP_FIELD = "global_id"
 
+# When a user's userinfo claims haven't changed since they were last synced to
+# the database, the sync is skipped. A fingerprint of the claims is kept in this
+# cache for this many seconds. Set the timeout to 0 to sync on every login.
+MITOL_APIGATEWAY_USERINFO_CACHE_NAME = "default"
+MITOL_APIGATEWAY_USERINFO_CACHE_TIMEOUT = 300
+
 # URL configuation
 
 # Set to the URL that APISIX uses for logout.
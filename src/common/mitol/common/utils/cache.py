@@ -0,0 +1,87 @@
+"""Process-local caching utilities"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a fixed
+    time to live. This is meant for small, hot, process-local caches in front
+    of the database or a shared cache, not as a replacement for either.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            maxsize (int): The maximum number of entries to hold
+            ttl (float): Seconds an entry stays valid after it is set
+            timer (callable): Function returning the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self.timer():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys: list[Hashable]) -> dict[Hashable, Any]:
+        """Return a dict of the cached values for any of keys that are present"""
+        missing = object()
+        values = {key: self.get(key, missing) for key in keys}
+
+        return {key: value for key, value in values.items() if value is not missing}
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache value for key, evicting the least recently used entries if full"""
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set_many(self, values: dict[Hashable, Any]) -> None:
+        """Cache each of the key/value pairs in values"""
+        for key, value in values.items():
+            self.set(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache, if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove everything from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including any that have expired"""
+        return len(self._entries)
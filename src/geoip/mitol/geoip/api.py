@@ -1,12 +1,18 @@
 """MaxMind API functions"""
 
 import csv
+import io
 import ipaddress
+from collections.abc import Callable, Iterable, Iterator
 from decimal import Decimal
+from ipaddress import IPv4Address, IPv6Address
 
-from django.db import transaction
-from django.db.models import Q
-from mitol.geoip import models
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField, Model, Q, QuerySet
+from django.db.models.expressions import RawSQL
+from mitol.common.utils.collections import chunks
+from mitol.geoip import lookup, models
 
 MAXMIND_CSV_COUNTRY_LOCATIONS_LITE = "geolite2-country-locations"
 MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE = "geolite2-country-ipv4"
@@ -17,135 +23,362 @@ MAXMIND_CSV_TYPES = [
     MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
 ]
 
+# Rows are parsed and written in batches of this size, which bounds the memory
+# used by an import regardless of the size of the file
+IMPORT_BATCH_SIZE = 5000
+# Marker for NULL values in the CSV data sent to COPY, so empty strings survive
+COPY_NULL = r"\N"
+# Marker for addresses that aren't in the lookup cache, since None is a result
+_NOT_CACHED = object()
+# Whether the netblock table has the network_cidr column, once it's been checked
+_has_cidr_column = None
 
-def import_maxmind_database(import_type: str, import_filename: str) -> None:
+
+def _parse_geoname_row(row: dict) -> models.Geoname:
+    """Build a Geoname from a row of a MaxMind locations file"""
+    return models.Geoname(
+        geoname_id=row["geoname_id"],
+        locale_code=row["locale_code"],
+        continent_code=row["continent_code"],
+        continent_name=row["continent_name"],
+        country_iso_code=row["country_iso_code"],
+        country_name=row["country_name"],
+        subdivision_1_iso_code=row.get("subdivision_1_iso_code"),
+        subdivision_1_name=row.get("subdivision_1_name"),
+        subdivision_2_iso_code=row.get("subdivision_2_iso_code"),
+        subdivision_2_name=row.get("subdivision_2_name"),
+        city_name=row.get("city_name"),
+        metro_code=row.get("metro_code"),
+        time_zone=row.get("time_zone"),
+        is_in_european_union=row.get("is_in_european_union"),
+    )
+
+
+def _parse_netblock_row(row: dict, *, is_ipv6: bool) -> models.NetBlock:
+    """Build a NetBlock from a row of a MaxMind blocks file"""
+    netblock = (
+        ipaddress.IPv6Network(row["network"])
+        if is_ipv6
+        else ipaddress.IPv4Network(row["network"])
+    )
+
+    return models.NetBlock(
+        is_ipv6=is_ipv6,
+        decimal_ip_start=Decimal(int(netblock[0])),
+        decimal_ip_end=Decimal(int(netblock[-1])),
+        ip_start=netblock[0],
+        ip_end=netblock[-1],
+        network=row["network"],
+        geoname_id=row.get("geoname_id") or None,
+        registered_country_geoname_id=row.get("registered_country_geoname_id") or None,
+        represented_country_geoname_id=row.get("represented_country_geoname_id")
+        or None,
+        is_anonymous_proxy=row.get("is_anonymous_proxy"),
+        is_satellite_provider=row.get("is_satellite_provider"),
+        postal_code=row.get("postal_code"),
+        latitude=row.get("latitude"),
+        longitude=row.get("longitude"),
+        accuracy_radius=row.get("accuracy_radius"),
+    )
+
+
+def iter_maxmind_rows(import_type: str, import_filename: str) -> Iterator[Model]:
+    """
+    Parse the specified import file, yielding unsaved model instances one row
+    at a time so the file never has to be held in memory.
+
+    Args:
+        - import_type (str): The import type, one of MAXMIND_CSV_TYPES
+        - import_filename (str): The CSV format file to parse.
+    Yields:
+        - Geoname or NetBlock instances, depending on the import type.
+    """
+    is_ipv6 = import_type == MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE
+
+    with open(import_filename) as import_raw:  # noqa: PTH123
+        for row in csv.DictReader(import_raw):
+            if import_type == MAXMIND_CSV_COUNTRY_LOCATIONS_LITE:
+                yield _parse_geoname_row(row)
+            elif len(row["geoname_id"]) > 0:
+                yield _parse_netblock_row(row, is_ipv6=is_ipv6)
+
+
+def _copy_rows(cursor, table: str, fields: list, rows: Iterable[Model]) -> None:
+    """
+    Stream rows into a table with COPY FROM STDIN.
+
+    This supports both psycopg 3, which can stream a single COPY, and psycopg2,
+    which needs a file-like object per COPY, so rows are sent in batches.
+    """
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    copy_sql = (
+        f"COPY {connection.ops.quote_name(table)} ({columns}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+
+    def _values(obj):
+        return [
+            COPY_NULL if value is None else value
+            for value in (
+                field.get_db_prep_save(getattr(obj, field.attname), connection)
+                for field in fields
+            )
+        ]
+
+    raw_cursor = cursor.cursor
+
+    if hasattr(raw_cursor, "copy_expert"):
+        for batch in chunks(rows, chunk_size=IMPORT_BATCH_SIZE):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(_values(obj) for obj in batch)
+            buffer.seek(0)
+            raw_cursor.copy_expert(copy_sql, buffer)
+    else:
+        with raw_cursor.copy(copy_sql) as copy:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for batch in chunks(rows, chunk_size=IMPORT_BATCH_SIZE):
+                writer.writerows(_values(obj) for obj in batch)
+                copy.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+
+
+def _load_with_copy(
+    model: type[Model], replace_filter: Q, rows: Iterable[Model]
+) -> int:
+    """
+    Load rows on PostgreSQL: COPY them into a temporary staging table, then
+    replace the live rows from the staging table in a single transaction.
+    Readers see the old data until that transaction commits.
+    """
+    table = model._meta.db_table  # noqa: SLF001
+    staging_table = connection.ops.quote_name(f"{table}_staging")
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]  # noqa: SLF001
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging_table} AS "  # noqa: S608
+            f"SELECT {columns} FROM {connection.ops.quote_name(table)} WITH NO DATA"
+        )
+
+        try:
+            _copy_rows(cursor, f"{table}_staging", fields, rows)
+
+            cursor.execute(f"SELECT COUNT(*) FROM {staging_table}")  # noqa: S608
+            (count,) = cursor.fetchone()
+            if count == 0:
+                raise Exception("No rows to process - file format invalid?")  # noqa: EM101, TRY002, TRY003
+
+            with transaction.atomic():
+                model.objects.filter(replace_filter).delete()
+                cursor.execute(
+                    f"INSERT INTO {connection.ops.quote_name(table)} ({columns}) "  # noqa: S608
+                    f"SELECT {columns} FROM {staging_table}"
+                )
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+
+    return count
+
+
+def _load_with_bulk_create(
+    model: type[Model], replace_filter: Q, rows: Iterable[Model]
+) -> int:
+    """
+    Load rows on other backends: replace the live rows with batched
+    bulk_create calls inside a single transaction.
+    """
+    count = 0
+
+    with transaction.atomic():
+        model.objects.filter(replace_filter).delete()
+
+        for batch in chunks(rows, chunk_size=IMPORT_BATCH_SIZE):
+            model.objects.bulk_create(batch)
+            count += len(batch)
+
+        if count == 0:
+            raise Exception("No rows to process - file format invalid?")  # noqa: EM101, TRY002, TRY003
+
+    return count
+
+
+def _report_progress(
+    rows: Iterable[Model], progress_callback: Callable[[int], None]
+) -> Iterator[Model]:
+    """Pass rows through, calling progress_callback every IMPORT_BATCH_SIZE rows"""
+    count = 0
+
+    for count, row in enumerate(rows, start=1):
+        yield row
+        if count % IMPORT_BATCH_SIZE == 0:
+            progress_callback(count)
+
+    progress_callback(count)
+
+
+def import_maxmind_database(
+    import_type: str,
+    import_filename: str,
+    progress_callback: Callable[[int], None] | None = None,
+) -> int:
     """
     Imports the specified import file into the appropriate table. This only
     supports the GeoLite2 country location and network block files for now
     (these are all we care about at the moment).
 
+    The file is streamed rather than read into memory. On PostgreSQL the rows
+    are loaded with COPY into a staging table and swapped in with a single
+    transaction; on other backends they're written with batched bulk_create
+    calls in a single transaction. Either way, readers never see a partially
+    loaded table.
+
     Args:
         - import_type (str): The import type, one of MAXMIND_CSV_TYPES
         - import_filename (str): The CSV format file to import.
+        - progress_callback (callable): Called with the running count of parsed
+          rows after every IMPORT_BATCH_SIZE rows.
     Returns:
-        - None
+        - The number of rows imported.
     """  # noqa: D401
 
     if import_type not in MAXMIND_CSV_TYPES:
         raise Exception(f"Invalid database type {import_type}")  # noqa: EM102, TRY002, TRY003
 
-    rows = []
+    if import_type == MAXMIND_CSV_COUNTRY_LOCATIONS_LITE:
+        model = models.Geoname
+        replace_filter = Q()
+    else:
+        model = models.NetBlock
+        replace_filter = Q(is_ipv6=import_type == MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE)
 
-    with open(import_filename) as import_raw:  # noqa: PTH123
-        dr = csv.DictReader(import_raw)
+    rows = iter_maxmind_rows(import_type, import_filename)
 
-        for row in dr:
-            if import_type == MAXMIND_CSV_COUNTRY_LOCATIONS_LITE:
-                rows.append(
-                    models.Geoname(
-                        geoname_id=row["geoname_id"],
-                        locale_code=row["locale_code"],
-                        continent_code=row["continent_code"],
-                        continent_name=row["continent_name"],
-                        country_iso_code=row["country_iso_code"],
-                        country_name=row["country_name"],
-                        subdivision_1_iso_code=row["subdivision_1_iso_code"]  # noqa: SIM401
-                        if "subdivision_1_iso_code" in row
-                        else None,
-                        subdivision_1_name=row["subdivision_1_name"]  # noqa: SIM401
-                        if "subdivision_1_name" in row
-                        else None,
-                        subdivision_2_iso_code=row["subdivision_2_iso_code"]  # noqa: SIM401
-                        if "subdivision_2_iso_code" in row
-                        else None,
-                        subdivision_2_name=row["subdivision_2_name"]  # noqa: SIM401
-                        if "subdivision_2_name" in row
-                        else None,
-                        city_name=row["city_name"] if "city_name" in row else None,  # noqa: SIM401
-                        metro_code=row["metro_code"] if "metro_code" in row else None,  # noqa: SIM401
-                        time_zone=row["time_zone"] if "time_zone" in row else None,  # noqa: SIM401
-                        is_in_european_union=row["is_in_european_union"]  # noqa: SIM401
-                        if "is_in_european_union" in row
-                        else None,
-                    )
-                )
-            elif import_type in [
-                MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
-                MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE,
-            ]:
-                if len(row["geoname_id"]) == 0:
-                    continue
-
-                is_ipv6 = import_type == MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE
-                netblock = (
-                    ipaddress.IPv6Network(row["network"])
-                    if is_ipv6
-                    else ipaddress.IPv4Network(row["network"])
-                )
+    if progress_callback is not None:
+        rows = _report_progress(rows, progress_callback)
+
+    if connection.vendor == "postgresql":
+        count = _load_with_copy(model, replace_filter, rows)
+    else:
+        count = _load_with_bulk_create(model, replace_filter, rows)
+
+    lookup.refresh()
+
+    return count
+
+
+def is_cidr_index_enabled() -> bool:
+    """Return True if the cidr column is turned on and the database supports it"""
+    return connection.vendor == "postgresql" and getattr(
+        settings, "MITOL_GEOIP_CIDR_INDEX_ENABLED", False
+    )
+
+
+def add_cidr_index(schema_editor) -> None:
+    """
+    Add the generated network_cidr column to the netblock table with a GiST
+    index. This rewrites the table. PostgreSQL only.
+    """
+    global _has_cidr_column  # noqa: PLW0603
+
+    table = schema_editor.quote_name(models.NetBlock._meta.db_table)  # noqa: SLF001
+    schema_editor.execute(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS network_cidr cidr "
+        "GENERATED ALWAYS AS (network::cidr) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS geoip_netblock_network_cidr_gist "
+        f"ON {table} USING gist (network_cidr inet_ops)"
+    )
+    _has_cidr_column = None
+
+
+def remove_cidr_index(schema_editor) -> None:
+    """Remove the network_cidr column and its index. PostgreSQL only."""
+    global _has_cidr_column  # noqa: PLW0603
 
-                decimal_ip_start = Decimal(int(netblock[0]))
-                ip_start = netblock[0]
-                decimal_ip_end = Decimal(int(netblock[-1]))
-                ip_end = netblock[-1]
-
-                rows.append(
-                    models.NetBlock(
-                        is_ipv6=is_ipv6,
-                        decimal_ip_start=decimal_ip_start,
-                        decimal_ip_end=decimal_ip_end,
-                        ip_start=ip_start,
-                        ip_end=ip_end,
-                        network=row["network"],
-                        geoname_id=row["geoname_id"]
-                        if "geoname_id" in row and len(row["geoname_id"]) > 0
-                        else None,
-                        registered_country_geoname_id=row[
-                            "registered_country_geoname_id"
-                        ]
-                        if "registered_country_geoname_id" in row
-                        and len(row["registered_country_geoname_id"]) > 0
-                        else None,
-                        represented_country_geoname_id=row[
-                            "represented_country_geoname_id"
-                        ]
-                        if "represented_country_geoname_id" in row
-                        and len(row["represented_country_geoname_id"]) > 0
-                        else None,
-                        is_anonymous_proxy=row["is_anonymous_proxy"]  # noqa: SIM401
-                        if "is_anonymous_proxy" in row
-                        else None,
-                        is_satellite_provider=row["is_satellite_provider"]  # noqa: SIM401
-                        if "is_satellite_provider" in row
-                        else None,
-                        postal_code=row["postal_code"]  # noqa: SIM401
-                        if "postal_code" in row
-                        else None,
-                        latitude=row["latitude"] if "latitude" in row else None,  # noqa: SIM401
-                        longitude=row["longitude"] if "longitude" in row else None,  # noqa: SIM401
-                        accuracy_radius=row["accuracy_radius"]  # noqa: SIM401
-                        if "accuracy_radius" in row
-                        else None,
-                    )
+    table = schema_editor.quote_name(models.NetBlock._meta.db_table)  # noqa: SLF001
+    schema_editor.execute("DROP INDEX IF EXISTS geoip_netblock_network_cidr_gist")
+    schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS network_cidr")
+    _has_cidr_column = None
+
+
+def has_cidr_index() -> bool:
+    """
+    Return True if lookups should use the indexed network_cidr column, i.e. if
+    MITOL_GEOIP_CIDR_INDEX_ENABLED is set on PostgreSQL and the column has been
+    added.
+    """
+    global _has_cidr_column  # noqa: PLW0603
+
+    if not is_cidr_index_enabled():
+        return False
+
+    if _has_cidr_column is None:
+        with connection.cursor() as cursor:
+            _has_cidr_column = "network_cidr" in {
+                column.name
+                for column in connection.introspection.get_table_description(
+                    cursor,
+                    models.NetBlock._meta.db_table,  # noqa: SLF001
                 )
+            }
+    return _has_cidr_column
 
-    if len(rows) == 0:
-        raise Exception("No rows to process - file format invalid?")  # noqa: EM101, TRY002, TRY003
 
-    with transaction.atomic():
-        if import_type == MAXMIND_CSV_COUNTRY_LOCATIONS_LITE:
-            models.Geoname.objects.all().delete()
-            models.Geoname.objects.bulk_create(rows)
-        elif (
-            import_type == MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE  # noqa: PLR1714, RUF100, SIM109
-            or import_type == MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE
-        ):
-            models.NetBlock.objects.filter(is_ipv6=False).delete()
-
-        if import_type in [
-            MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
-            MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE,
-        ]:
-            models.NetBlock.objects.bulk_create(rows)
+def decimal_range_query(netaddr: IPv4Address | IPv6Address) -> QuerySet:
+    """Find the netblock for an address by scanning the decimal range columns"""
+    return models.NetBlock.objects.filter(
+        is_ipv6=netaddr.version == 6,  # noqa: PLR2004
+        decimal_ip_start__lte=int(netaddr),
+        decimal_ip_end__gte=int(netaddr),
+    )
+
+
+def cidr_containment_query(netaddr: IPv4Address | IPv6Address) -> QuerySet:
+    """
+    Find the netblock for an address with the inet containment operator, which
+    is answered by the GiST index on network_cidr. PostgreSQL only.
+    """
+    return models.NetBlock.objects.filter(
+        RawSQL(  # noqa: S611
+            f"{connection.ops.quote_name(models.NetBlock._meta.db_table)}.network_cidr >>= %s::inet",  # noqa: E501, SLF001
+            (str(netaddr),),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def _resolve_netaddr(netaddr: IPv4Address | IPv6Address, locale: str) -> str | None:
+    """Resolve the country code for a single address with the database"""
+    netblock_qset = (
+        cidr_containment_query(netaddr)
+        if has_cidr_index()
+        else decimal_range_query(netaddr)
+    )
+    # slice rather than first(), which would order by id and could lead the
+    # planner to walk the primary key instead of the range or GiST index
+    netblock = next(iter(netblock_qset[:1]), None)
+
+    if netblock is None:
+        return None
+
+    location = (
+        models.Geoname.objects.filter(locale_code=locale)
+        .filter(
+            Q(geoname_id=netblock.geoname_id)
+            | Q(geoname_id=netblock.registered_country_geoname_id)
+            | Q(geoname_id=netblock.represented_country_geoname_id)
+        )
+        .first()
+    )
+
+    if location is None:
+        return None
+    return location.country_iso_code
 
 
 def ip_to_country_code(ip_address: str, locale: str = "en") -> str:
@@ -157,6 +390,13 @@ def ip_to_country_code(ip_address: str, locale: str = "en") -> str:
     locale is not specified, this defaults to English, so ensure you've imported
     the English data alongside any other language you require.
 
+    If MITOL_GEOIP_LOOKUP_INDEX_ENABLED is set, the lookup is served from the
+    process-local index in mitol.geoip.lookup instead of the database. On
+    PostgreSQL with MITOL_GEOIP_CIDR_INDEX_ENABLED, the netblock is otherwise
+    found with the GiST-indexed cidr column; otherwise the decimal range columns
+    are used. Database lookups are cached per process for
+    MITOL_GEOIP_LOOKUP_CACHE_TTL_SECONDS.
+
     Args:
         - ip_address (str): IP address as a string. This can be IPv4 or v6.
         - locale (str): The locale to use (default 'en').
@@ -166,24 +406,127 @@ def ip_to_country_code(ip_address: str, locale: str = "en") -> str:
 
     netaddr = ipaddress.ip_address(ip_address)
 
-    ip_qset = models.NetBlock.objects.filter(
-        decimal_ip_start__lte=int(netaddr), decimal_ip_end__gte=int(netaddr)
-    )
+    if lookup.is_index_enabled():
+        return lookup.get_index().lookup(netaddr, locale)
 
-    if not ip_qset.exists():
-        return None
+    cache = lookup.get_lookup_cache()
+    cache_key = (netaddr, locale)
+    country_code = cache.get(cache_key, _NOT_CACHED)
 
-    netblock = ip_qset.get()
-    location = (
-        models.Geoname.objects.filter(locale_code=locale)
-        .filter(
-            Q(geoname_id=netblock.geoname_id)
-            | Q(geoname_id=netblock.registered_country_geoname_id)
-            | Q(geoname_id=netblock.represented_country_geoname_id)
+    if country_code is _NOT_CACHED:
+        country_code = _resolve_netaddr(netaddr, locale)
+        cache.set(cache_key, country_code)
+
+    return country_code
+
+
+def _sweep_netblocks(
+    netaddrs: list[IPv4Address] | list[IPv6Address], *, is_ipv6: bool
+) -> dict[IPv4Address | IPv6Address, tuple]:
+    """
+    Find the netblocks for a sorted list of addresses from one address family
+    in a single pass: the netblocks spanning the addresses are streamed in
+    order of their start address and merged with the addresses.
+
+    Returns:
+        - dict mapping each address that's in a netblock to the netblock's
+          geoname, registered country and represented country IDs.
+    """
+    if not netaddrs:
+        return {}
+
+    netblocks = (
+        models.NetBlock.objects.filter(
+            is_ipv6=is_ipv6,
+            decimal_ip_start__lte=int(netaddrs[-1]),
+            decimal_ip_end__gte=int(netaddrs[0]),
         )
-        .first()
+        .order_by("decimal_ip_start")
+        .values_list(
+            "decimal_ip_start",
+            "decimal_ip_end",
+            "geoname_id",
+            "registered_country_geoname_id",
+            "represented_country_geoname_id",
+        )
+        .iterator(chunk_size=IMPORT_BATCH_SIZE)
     )
 
-    if location is None:
-        return None
-    return location.country_iso_code
+    matches = {}
+    position = 0
+
+    for start, end, *geoname_ids in netblocks:
+        while position < len(netaddrs) and int(netaddrs[position]) < start:
+            position += 1
+
+        while position < len(netaddrs) and int(netaddrs[position]) <= end:
+            matches[netaddrs[position]] = tuple(geoname_ids)
+            position += 1
+
+        if position == len(netaddrs):
+            break
+
+    return matches
+
+
+def ips_to_country_codes(
+    ip_addresses: Iterable[str], locale: str = "en"
+) -> dict[str, str | None]:
+    """
+    Resolve the country codes for many IP addresses at once.
+
+    The addresses are deduplicated and sorted, then resolved with the
+    in-memory index if it's enabled, or otherwise with one sweep over the
+    netblocks per address family plus a single query for the geonames. This is
+    much cheaper than calling ip_to_country_code for each address.
+
+    Args:
+        - ip_addresses (iterable of str): IP addresses as strings. These can be
+          a mix of IPv4 and v6.
+        - locale (str): The locale to use (default 'en').
+    Returns:
+        - dict mapping each of the given addresses to None or the ISO 3166
+          alpha2 code of the assigned country.
+    """
+    netaddrs = {
+        ip_address: ipaddress.ip_address(ip_address) for ip_address in ip_addresses
+    }
+    unique_netaddrs = sorted(set(netaddrs.values()), key=lambda n: (n.version, n))
+
+    if lookup.is_index_enabled():
+        index = lookup.get_index()
+        country_codes = {
+            netaddr: index.lookup(netaddr, locale) for netaddr in unique_netaddrs
+        }
+    else:
+        matches = {
+            **_sweep_netblocks(
+                [netaddr for netaddr in unique_netaddrs if netaddr.version == 4],  # noqa: PLR2004
+                is_ipv6=False,
+            ),
+            **_sweep_netblocks(
+                [netaddr for netaddr in unique_netaddrs if netaddr.version == 6],  # noqa: PLR2004
+                is_ipv6=True,
+            ),
+        }
+        countries = dict(
+            models.Geoname.objects.filter(
+                locale_code=locale,
+                geoname_id__in={
+                    geoname_id
+                    for geoname_ids in matches.values()
+                    for geoname_id in geoname_ids
+                    if geoname_id is not None
+                },
+            ).values_list("geoname_id", "country_iso_code")
+        )
+        country_codes = {
+            netaddr: lookup.country_for_geoname_ids(matches[netaddr], countries)
+            if netaddr in matches
+            else None
+            for netaddr in unique_netaddrs
+        }
+
+    return {
+        ip_address: country_codes[netaddr] for ip_address, netaddr in netaddrs.items()
+    }
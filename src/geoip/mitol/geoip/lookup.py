@@ -0,0 +1,210 @@
+"""
+In-memory netblock index for IP-to-country lookups.
+
+The index holds the start and end of every netblock in sorted arrays (one pair
+per address family) so an address can be resolved with a binary search, and a
+per-locale map of geoname ID to country ISO code so the result can be resolved
+without touching the database.
+"""
+
+import bisect
+import ipaddress
+import threading
+import time
+from dataclasses import dataclass, field
+from ipaddress import IPv4Address, IPv6Address
+
+from django.conf import settings
+from mitol.common.utils.cache import TTLCache
+from mitol.geoip import models
+
+
+def country_for_geoname_ids(
+    geoname_ids: tuple, countries: dict[int, str]
+) -> str | None:
+    """
+    Return the country for a netblock's geoname IDs, preferring its geoname,
+    then its registered country, then its represented country.
+
+    Args:
+        - geoname_ids (tuple): The netblock's geoname, registered country and
+          represented country IDs, any of which may be None.
+        - countries (dict): Map of geoname ID to country ISO code for a locale.
+    Returns:
+        - None or ISO 3166 alpha2 code of the country.
+    """
+    for geoname_id in geoname_ids:
+        if geoname_id is not None and geoname_id in countries:
+            return countries[geoname_id]
+
+    return None
+
+
+@dataclass
+class _FamilyIndex:
+    """
+    Sorted netblock ranges for a single address family. geoname_ids holds the
+    geoname, registered country and represented country IDs for each block.
+    """
+
+    starts: list[int] = field(default_factory=list)
+    ends: list[int] = field(default_factory=list)
+    geoname_ids: list[tuple] = field(default_factory=list)
+
+    def find(self, address: int) -> tuple | None:
+        """Return the geoname IDs for the block containing address, if any"""
+        position = bisect.bisect_right(self.starts, address) - 1
+
+        if position < 0 or self.ends[position] < address:
+            return None
+
+        return self.geoname_ids[position]
+
+
+class NetBlockIndex:
+    """
+    Process-local index of the NetBlock and Geoname tables.
+
+    MaxMind netblocks don't overlap, so the block containing an address is the
+    one with the greatest start that is less than or equal to it.
+    """
+
+    def __init__(self):
+        """Create an empty index"""
+        self.ipv4 = _FamilyIndex()
+        self.ipv6 = _FamilyIndex()
+        self.countries: dict[str, dict[int, str]] = {}
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls) -> "NetBlockIndex":
+        """Build a new index from the current contents of the database"""
+        index = cls()
+
+        netblocks = (
+            models.NetBlock.objects.order_by("is_ipv6", "decimal_ip_start")
+            .values_list(
+                "is_ipv6",
+                "decimal_ip_start",
+                "decimal_ip_end",
+                "geoname_id",
+                "registered_country_geoname_id",
+                "represented_country_geoname_id",
+            )
+            .iterator()
+        )
+
+        for is_ipv6, start, end, *geoname_ids in netblocks:
+            family = index.ipv6 if is_ipv6 else index.ipv4
+            family.starts.append(int(start))
+            family.ends.append(int(end))
+            family.geoname_ids.append(tuple(geoname_ids))
+
+        geonames = models.Geoname.objects.values_list(
+            "locale_code", "geoname_id", "country_iso_code"
+        ).iterator()
+
+        for locale_code, geoname_id, country_iso_code in geonames:
+            index.countries.setdefault(locale_code, {})[geoname_id] = country_iso_code
+
+        return index
+
+    def lookup(
+        self, ip_address: str | IPv4Address | IPv6Address, locale: str = "en"
+    ) -> str | None:
+        """
+        Resolve the country code for the specified IP address.
+
+        Args:
+            - ip_address (str): IP address, as a string or an ipaddress object.
+              This can be IPv4 or v6.
+            - locale (str): The locale to use (default 'en').
+        Returns:
+            - None or ISO 3166 alpha2 code of the assigned country.
+        """
+        netaddr = ipaddress.ip_address(ip_address)
+        family = self.ipv6 if netaddr.version == 6 else self.ipv4  # noqa: PLR2004
+        geoname_ids = family.find(int(netaddr))
+
+        if geoname_ids is None:
+            return None
+
+        return country_for_geoname_ids(geoname_ids, self.countries.get(locale, {}))
+
+    def is_stale(self) -> bool:
+        """Return True if the index is older than the configured max age"""
+        max_age = getattr(settings, "MITOL_GEOIP_LOOKUP_INDEX_MAX_AGE_SECONDS", None)
+
+        return max_age is not None and time.monotonic() - self.built_at > max_age
+
+
+_index: NetBlockIndex | None = None
+_index_lock = threading.Lock()
+_lookup_cache: TTLCache | None = None
+
+
+def is_index_enabled() -> bool:
+    """Return True if lookups should be served from the in-memory index"""
+    return getattr(settings, "MITOL_GEOIP_LOOKUP_INDEX_ENABLED", False)
+
+
+def get_index() -> NetBlockIndex:
+    """Return the process-local index, building it on first use"""
+    global _index  # noqa: PLW0603
+
+    index = _index
+    if index is not None and not index.is_stale():
+        return index
+
+    with _index_lock:
+        if _index is None or _index.is_stale():
+            _index = NetBlockIndex.build()
+        return _index
+
+
+def rebuild_index() -> None:
+    """
+    Rebuild the process-local index if it has been loaded.
+
+    An index that hasn't been loaded yet is left alone; it'll be built from the
+    new data when it is first used.
+    """
+    global _index  # noqa: PLW0603
+
+    with _index_lock:
+        if _index is not None:
+            _index = NetBlockIndex.build()
+
+
+def clear_index() -> None:
+    """Discard the process-local index"""
+    global _index  # noqa: PLW0603
+
+    with _index_lock:
+        _index = None
+
+
+def get_lookup_cache() -> TTLCache:
+    """Return the process-local cache of resolved addresses"""
+    global _lookup_cache  # noqa: PLW0603
+
+    if _lookup_cache is None:
+        _lookup_cache = TTLCache(
+            maxsize=getattr(settings, "MITOL_GEOIP_LOOKUP_CACHE_SIZE", 0),
+            ttl=getattr(settings, "MITOL_GEOIP_LOOKUP_CACHE_TTL_SECONDS", 0),
+        )
+
+    return _lookup_cache
+
+
+def clear_lookup_cache() -> None:
+    """Discard the process-local cache of resolved addresses"""
+    global _lookup_cache  # noqa: PLW0603
+
+    _lookup_cache = None
+
+
+def refresh() -> None:
+    """Refresh the process-local lookup state after the netblock data changes"""
+    clear_lookup_cache()
+    rebuild_index()
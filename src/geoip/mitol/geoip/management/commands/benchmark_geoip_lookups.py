@@ -0,0 +1,103 @@
+"""
+Compares netblock lookup latency between the decimal range query, the cidr
+containment query (PostgreSQL only) and the in-memory index, using the data
+that's been imported.
+"""  # noqa: INP001
+
+import ipaddress
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand, CommandError
+from mitol.geoip import api, lookup
+from mitol.geoip.models import NetBlock
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the netblock lookup strategies.
+    """
+
+    help = "Benchmarks the netblock lookup strategies against the imported data."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=1000,
+            help="The number of addresses to look up with each strategy.",
+        )
+
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Seed for picking the addresses, to repeat a run.",
+        )
+
+    def _sample_addresses(self, count, rng):
+        """Pick random addresses from random imported netblocks"""
+        max_id = NetBlock.objects.order_by("-id").values_list("id", flat=True).first()
+
+        if max_id is None:
+            raise CommandError(  # noqa: TRY003
+                "There are no netblocks - have you imported the MaxMind databases?"  # noqa: EM101
+            )
+
+        addresses = []
+        while len(addresses) < count:
+            netblock = (
+                NetBlock.objects.filter(id__gte=rng.randint(1, max_id))
+                .order_by("id")
+                .only("network")
+                .first()
+            )
+            if netblock is None:
+                continue
+
+            network = ipaddress.ip_network(netblock.network)
+            addresses.append(network[rng.randrange(network.num_addresses)])
+
+        return addresses
+
+    def _time_lookups(self, addresses, lookup_func):
+        """Run lookup_func for each address, returning the latencies in ms"""
+        timings = []
+
+        for address in addresses:
+            started = time.perf_counter()
+            lookup_func(address)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return timings
+
+    def handle(self, *args, **kwargs):  # noqa: ARG002
+        rng = random.Random(kwargs["seed"])  # noqa: S311
+        addresses = self._sample_addresses(kwargs["count"], rng)
+
+        strategies = {
+            "decimal range": lambda address: api.decimal_range_query(address).first(),
+        }
+
+        if api.has_cidr_index():
+            strategies["cidr containment"] = lambda address: api.cidr_containment_query(
+                address
+            ).first()
+
+        index = lookup.NetBlockIndex.build()
+        strategies["in-memory index"] = lambda address: index.lookup(str(address))
+
+        self.stdout.write(f"Looking up {len(addresses)} addresses per strategy")
+
+        for name, lookup_func in strategies.items():
+            timings = sorted(self._time_lookups(addresses, lookup_func))
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: mean {statistics.mean(timings):.3f}ms, "
+                    f"median {statistics.median(timings):.3f}ms, "
+                    f"p95 {p95:.3f}ms"
+                )
+            )
@@ -11,6 +11,7 @@ import ipaddress
 from decimal import Decimal
 
 from django.core.management import BaseCommand, CommandError
+from mitol.geoip import lookup
 from mitol.geoip.models import Geoname, NetBlock
 
 
@@ -72,3 +73,5 @@ class Command(BaseCommand):
                         f"{'Created' if created else 'Updated'} record for {netblock} for ISO {kwargs['iso']}"  # noqa: E501
                     )
                 )
+
+        lookup.refresh()
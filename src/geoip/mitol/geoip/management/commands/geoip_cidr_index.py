@@ -0,0 +1,43 @@
+"""
+Adds (or removes) the GiST-indexed network_cidr column on the netblock table,
+for installs that turn on MITOL_GEOIP_CIDR_INDEX_ENABLED after migrating.
+"""  # noqa: INP001
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from mitol.geoip import api
+
+
+class Command(BaseCommand):
+    """
+    Adds or removes the netblock cidr column and index.
+    """
+
+    help = (
+        "Adds the GiST-indexed network_cidr column to the netblock table on "
+        "PostgreSQL. This rewrites the table."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--remove",
+            action="store_true",
+            help="Remove the column and its index instead.",
+        )
+
+    def handle(self, *args, **kwargs):  # noqa: ARG002
+        if connection.vendor != "postgresql":
+            raise CommandError("The cidr index is only supported on PostgreSQL.")  # noqa: EM101, TRY003
+
+        with connection.schema_editor() as schema_editor:
+            if kwargs["remove"]:
+                api.remove_cidr_index(schema_editor)
+                self.stdout.write(self.style.SUCCESS("Removed the cidr index."))
+            else:
+                api.add_cidr_index(schema_editor)
+                self.stdout.write(self.style.SUCCESS("Added the cidr index."))
+
+        if not api.is_cidr_index_enabled():
+            self.stdout.write(
+                "Lookups only use the index if MITOL_GEOIP_CIDR_INDEX_ENABLED is set."
+            )
@@ -3,6 +3,7 @@ Imports the MaxMind GeoLite2 databases. (Or, acts as a thin wrapper around the
 API call that does.)
 """  # noqa: INP001
 
+import time
 from os import path
 
 from django.core.management import BaseCommand, CommandError
@@ -34,6 +35,20 @@ class Command(BaseCommand):
         if not path.exists(kwargs["file"]):  # noqa: PTH110
             raise CommandError(f"Input file {kwargs['file']} does not exist.")  # noqa: EM102, TRY003
 
-        api.import_maxmind_database(kwargs["filetype"], kwargs["file"])
+        started = time.monotonic()
 
-        self.stdout.write(self.style.SUCCESS("Import completed!"))
+        def report_progress(count):
+            elapsed = time.monotonic() - started
+            rate = count / elapsed if elapsed > 0 else 0
+            self.stdout.write(f"Parsed {count} rows ({rate:.0f} rows/sec)")
+
+        count = api.import_maxmind_database(
+            kwargs["filetype"], kwargs["file"], progress_callback=report_progress
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Import completed! {count} rows imported in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,50 @@
+"""
+Adds a cidr copy of the netblock network with a GiST index on PostgreSQL, so
+lookups can use the inet containment operator rather than a decimal range scan.
+
+Adding the column rewrites the netblock table, so it's only done if
+MITOL_GEOIP_CIDR_INDEX_ENABLED is set. Installs that turn it on later can add it
+with the geoip_cidr_index command. Other databases don't support this and
+continue to use the decimal range.
+"""
+
+from django.conf import settings
+from django.db import migrations
+
+
+def add_cidr_column(apps, schema_editor):
+    """Add the generated cidr column and its GiST index, if turned on"""
+    if schema_editor.connection.vendor != "postgresql" or not getattr(
+        settings, "MITOL_GEOIP_CIDR_INDEX_ENABLED", False
+    ):
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE geoip_netblock ADD COLUMN IF NOT EXISTS network_cidr cidr "
+        "GENERATED ALWAYS AS (network::cidr) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS geoip_netblock_network_cidr_gist "
+        "ON geoip_netblock USING gist (network_cidr inet_ops)"
+    )
+
+
+def remove_cidr_column(apps, schema_editor):
+    """Remove the generated cidr column and its GiST index, if they were added"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS geoip_netblock_network_cidr_gist")
+    schema_editor.execute(
+        "ALTER TABLE geoip_netblock DROP COLUMN IF EXISTS network_cidr"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("geoip", "0002_rename_maxmind_tables_to_geoip"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_cidr_column, remove_cidr_column),
+    ]
@@ -0,0 +1,42 @@
+"""Settings for the geoip app"""
+
+from mitol.common.envs import get_bool, get_int
+
+MITOL_GEOIP_LOOKUP_INDEX_ENABLED = get_bool(
+    name="MITOL_GEOIP_LOOKUP_INDEX_ENABLED",
+    default=False,
+    description=(
+        "Whether to resolve IP addresses against an in-memory index of the"
+        " netblock data rather than querying the database on each lookup"
+    ),
+)
+MITOL_GEOIP_LOOKUP_INDEX_MAX_AGE_SECONDS = get_int(
+    name="MITOL_GEOIP_LOOKUP_INDEX_MAX_AGE_SECONDS",
+    default=86400,
+    description=(
+        "Seconds the in-memory netblock index is kept before it is rebuilt from the"
+        " database. Imports run in the same process rebuild it immediately."
+    ),
+)
+MITOL_GEOIP_LOOKUP_CACHE_SIZE = get_int(
+    name="MITOL_GEOIP_LOOKUP_CACHE_SIZE",
+    default=10000,
+    description=(
+        "Number of resolved addresses to keep in the per-process lookup cache."
+        " Set to 0 to disable the cache."
+    ),
+)
+MITOL_GEOIP_LOOKUP_CACHE_TTL_SECONDS = get_int(
+    name="MITOL_GEOIP_LOOKUP_CACHE_TTL_SECONDS",
+    default=900,
+    description="Seconds a resolved address is kept in the per-process lookup cache",
+)
+MITOL_GEOIP_CIDR_INDEX_ENABLED = get_bool(
+    name="MITOL_GEOIP_CIDR_INDEX_ENABLED",
+    default=False,
+    description=(
+        "On PostgreSQL, whether to add a GiST-indexed cidr copy of the netblock"
+        " network when migrating (or with the geoip_cidr_index command) and use it"
+        " for lookups. Adding the column rewrites the netblock table."
+    ),
+)
@@ -5,6 +5,7 @@ import json
 import logging
 import os
 import pickle
+import threading
 from collections import namedtuple
 from urllib.parse import urljoin
 
@@ -103,6 +104,16 @@ def get_credentials():
             GoogleApiAuth.objects.filter(id=google_api_auth.id).update(
                 access_token=creds.token, updated_on=now_in_utc()
             )
+        elif not creds.expiry:
+            # google-auth expects a naive UTC datetime
+            creds.expiry = (
+                (
+                    google_api_auth.updated_on
+                    + datetime.timedelta(**DEFAULT_GOOGLE_EXPIRE_TIMEDELTA)
+                )
+                .astimezone(datetime.timezone.utc)
+                .replace(tzinfo=None)
+            )
         return creds
     # (For local development use only) You can use a locally-created token for auth.
     # This token can be created by following the Google API Python quickstart guide:
@@ -116,14 +127,73 @@ def get_credentials():
     raise ImproperlyConfigured("Authorization with Google has not been completed.")  # noqa: EM101, TRY003
 
 
-def get_authorized_pygsheets_client():
+# Credentials are shared by every thread in the process. The clients built with them are
+# kept per thread, since the httplib2 connections they use aren't thread-safe.
+_credentials_lock = threading.Lock()
+_shared_credentials = None
+_pooled_clients = threading.local()
+
+
+def _are_credentials_fresh(credentials):
+    """Returns True if the credentials can keep being used without loading them again"""  # noqa: D401
+    if isinstance(credentials, ServiceAccountCredentials):
+        # These refresh themselves from the service account key when they expire
+        return True
+    if not credentials.expiry:
+        return False
+    refresh_margin = datetime.timedelta(
+        seconds=settings.MITOL_GOOGLE_SHEETS_CREDENTIALS_REFRESH_MARGIN_SECONDS
+    )
+    # google-auth expiry datetimes are naive UTC
+    return credentials.expiry - refresh_margin > now_in_utc().replace(tzinfo=None)
+
+
+def get_shared_credentials():
     """
-    Instantiates a pygsheets Client and authorizes it with the proper credentials.
+    Gets Google API client credentials that are reused by the whole process until they're close
+    to expiring, at which point they're loaded again with get_credentials.
 
     Returns:
-        pygsheets.client.Client: The authorized Client object
-    """  # noqa: D401
-    credentials = get_credentials()
+        google.oauth2.credentials.Credentials: Credentials to be used by the Google Drive client/pygsheets/etc.
+    """  # noqa: E501, D401
+    global _shared_credentials  # noqa: PLW0603
+    if not settings.MITOL_GOOGLE_SHEETS_CLIENT_POOL_ENABLED:
+        return get_credentials()
+    with _credentials_lock:
+        if _shared_credentials is None or not _are_credentials_fresh(
+            _shared_credentials
+        ):
+            _shared_credentials = get_credentials()
+        return _shared_credentials
+
+
+def clear_client_pool():
+    """
+    Discards the shared credentials, so that they're loaded again and new clients are built
+    the next time they're needed (e.g.: after Google auth is completed again).
+    """  # noqa: E501
+    global _shared_credentials  # noqa: PLW0603
+    with _credentials_lock:
+        _shared_credentials = None
+    _pooled_clients.__dict__.clear()
+
+
+def _get_pooled_client(name, build_client):
+    """
+    Returns a client built with the shared credentials, building a new one if this thread doesn't
+    have one yet or the credentials have been replaced since it was built.
+    """  # noqa: E501, D401
+    credentials = get_shared_credentials()
+    if not settings.MITOL_GOOGLE_SHEETS_CLIENT_POOL_ENABLED:
+        return build_client(credentials)
+    pooled_credentials, client = getattr(_pooled_clients, name, (None, None))
+    if pooled_credentials is not credentials:
+        client = build_client(credentials)
+        setattr(_pooled_clients, name, (credentials, client))
+    return client
+
+
+def _build_pygsheets_client(credentials):
     pygsheets_client = pygsheets.authorize(custom_credentials=credentials)
     if settings.MITOL_GOOGLE_SHEETS_DRIVE_SHARED_ID:
         pygsheets_client.drive.enable_team_drive(
@@ -132,6 +202,17 @@ def get_authorized_pygsheets_client():
     return pygsheets_client
 
 
+def get_authorized_pygsheets_client():
+    """
+    Instantiates a pygsheets Client and authorizes it with the proper credentials. The client is
+    reused by later calls in the same thread unless MITOL_GOOGLE_SHEETS_CLIENT_POOL_ENABLED is off.
+
+    Returns:
+        pygsheets.client.Client: The authorized Client object
+    """  # noqa: E501, D401
+    return _get_pooled_client("pygsheets", _build_pygsheets_client)
+
+
 class ExpandedSheetsClient:
     """
     Helper class that executes some Drive/Sheets API requests that pygsheets doesn't directly support
@@ -249,11 +330,37 @@ class ExpandedSheetsClient:
             .execute()
         )
 
+    def batch_update_sheet_values(
+        self, sheet_id, value_ranges, value_input_option="USER_ENTERED"
+    ):
+        """
+        Writes values to any number of ranges in a spreadsheet with a single request.
+
+        Args:
+            sheet_id (str): The spreadsheet id
+            value_ranges (list of dict): ValueRange objects with the range (in A1 notation) and values to write
+                (docs: https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets.values#ValueRange)
+            value_input_option (str): How the values should be interpreted ("USER_ENTERED" parses
+                formulas, dates, etc. as if they were typed into the sheet, "RAW" doesn't)
+
+        Returns:
+            dict: Google API response to the spreadsheets.values.batchUpdate request
+        """  # noqa: E501, D401
+        return (
+            self.pygsheets_client.sheet.service.spreadsheets()
+            .values()
+            .batchUpdate(
+                spreadsheetId=sheet_id,
+                body={"valueInputOption": value_input_option, "data": value_ranges},
+            )
+            .execute()
+        )
+
 
 def build_drive_service(credentials=None):
     """
     Builds the Google API client Drive service for API functionality that cannot be implemented correctly
-    with pygsheets.
+    with pygsheets. If no credentials are given, a service built with the shared credentials is reused.
 
     Args:
         credentials (google.oauth2.credentials.Credentials or None): Credentials to be used by the
@@ -263,8 +370,21 @@ def build_drive_service(credentials=None):
         googleapiclient.discovery.Resource: The Drive API service. The methods available on this resource are
             defined dynamically (ref: http://googleapis.github.io/google-api-python-client/docs/dyn/drive_v3.html)
     """  # noqa: E501, D401
-    credentials = credentials or get_credentials()
-    return build("drive", "v3", credentials=credentials, cache_discovery=False)
+    if credentials is None:
+        return _get_pooled_client("drive", _build_drive_service)
+    return _build_drive_service(credentials)
+
+
+def _build_drive_service(credentials):
+    # Use the discovery document that ships with google-api-python-client instead of
+    # fetching it
+    return build(
+        "drive",
+        "v3",
+        credentials=credentials,
+        cache_discovery=False,
+        static_discovery=True,
+    )
 
 
 def request_file_watch(
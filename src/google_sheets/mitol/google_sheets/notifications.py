@@ -0,0 +1,163 @@
+"""
+Coalescing of Google Drive file change notifications
+
+Drive sends a notification for every change to a watched file, so a sheet that's
+being edited can send dozens a minute. Rather than processing the sheet for each
+one, the first notification schedules a run after a short debounce window, and
+any that arrive before that run starts are dropped. If a notification arrives
+while the sheet is being processed, exactly one follow-up run is scheduled.
+
+The state for each resource is kept in a Django cache shared by every process
+(Redis, in a typical deployment). Scheduling is left to the caller, e.g.:
+
+    def handle_notification(request):
+        resource_id = request.headers["X-Goog-Resource-Id"]
+        coalesce_notification(
+            resource_id,
+            lambda countdown: process_sheet.apply_async(
+                args=[resource_id], countdown=countdown
+            ),
+        )
+
+    @app.task
+    def process_sheet(resource_id):
+        run_coalesced(
+            resource_id,
+            lambda: RefundRequestHandler().process_sheet(),
+            lambda countdown: process_sheet.apply_async(
+                args=[resource_id], countdown=countdown
+            ),
+        )
+"""
+
+import logging
+import uuid
+from collections.abc import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+
+log = logging.getLogger(__name__)
+
+NOTIFICATION_CACHE_KEY_PREFIX = "mitol.google_sheets.notifications"
+
+METRIC_NOTIFICATIONS_RECEIVED = "notifications_received"
+METRIC_NOTIFICATIONS_COALESCED = "notifications_coalesced"
+METRIC_RUNS_EXECUTED = "runs_executed"
+METRIC_RUNS_DEFERRED = "runs_deferred"
+METRICS = (
+    METRIC_NOTIFICATIONS_RECEIVED,
+    METRIC_NOTIFICATIONS_COALESCED,
+    METRIC_RUNS_EXECUTED,
+    METRIC_RUNS_DEFERRED,
+)
+
+
+def _get_cache():
+    return caches[settings.MITOL_GOOGLE_SHEETS_NOTIFICATION_CACHE_NAME]
+
+
+def _key(resource_id: str, name: str) -> str:
+    return f"{NOTIFICATION_CACHE_KEY_PREFIX}:{resource_id}:{name}"
+
+
+def _pending_timeout() -> int:
+    # Long enough to outlast the debounce window and a run that's waiting on the
+    # lock, short enough that a lost task doesn't stop the resource from being
+    # scheduled again for long
+    return (
+        settings.MITOL_GOOGLE_SHEETS_NOTIFICATION_DEBOUNCE_SECONDS
+        + settings.MITOL_GOOGLE_SHEETS_PROCESSING_LOCK_SECONDS
+    )
+
+
+def _increment_metric(resource_id: str, metric: str):
+    cache = _get_cache()
+    key = _key(resource_id, metric)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_notification_metrics(resource_id: str) -> dict[str, int]:
+    """
+    Return the counts of notifications and runs for a resource
+
+    Args:
+        resource_id(str): The id of the watched resource
+    Returns:
+        dict: counts keyed by metric name (notifications_received,
+            notifications_coalesced, runs_executed and runs_deferred)
+    """
+    values = _get_cache().get_many([_key(resource_id, metric) for metric in METRICS])
+    return {metric: values.get(_key(resource_id, metric), 0) for metric in METRICS}
+
+
+def coalesce_notification(resource_id: str, schedule: Callable[[int], object]) -> bool:
+    """
+    Schedule a run for a change notification, unless one is already scheduled
+
+    Args:
+        resource_id(str): The id of the watched resource
+        schedule(Callable[[int], object]): Schedules a run after a number of
+            seconds, e.g. by calling apply_async on a celery task with a countdown
+    Returns:
+        bool: True if a run was scheduled, False if the notification was dropped
+    """
+    _increment_metric(resource_id, METRIC_NOTIFICATIONS_RECEIVED)
+
+    if not _get_cache().add(
+        _key(resource_id, "pending"), 1, timeout=_pending_timeout()
+    ):
+        _increment_metric(resource_id, METRIC_NOTIFICATIONS_COALESCED)
+        return False
+
+    schedule(settings.MITOL_GOOGLE_SHEETS_NOTIFICATION_DEBOUNCE_SECONDS)
+    return True
+
+
+def run_coalesced(
+    resource_id: str,
+    process: Callable[[], object],
+    schedule: Callable[[int], object],
+):
+    """
+    Run the processing scheduled by coalesce_notification, unless the resource is
+    already being processed, in which case the run is scheduled again for later.
+
+    Notifications that arrive once the run has started schedule one follow-up run.
+
+    Args:
+        resource_id(str): The id of the watched resource
+        process(Callable[[], object]): Processes the resource
+        schedule(Callable[[int], object]): Schedules a run after a number of seconds
+    Returns:
+        The result of process, or None if the run was deferred
+    """
+    cache = _get_cache()
+    lock_key = _key(resource_id, "running")
+    lock_token = uuid.uuid4().hex
+
+    if not cache.add(
+        lock_key,
+        lock_token,
+        timeout=settings.MITOL_GOOGLE_SHEETS_PROCESSING_LOCK_SECONDS,
+    ):
+        # This run still holds the pending slot, so nothing else gets scheduled
+        # in the meantime
+        cache.set(_key(resource_id, "pending"), 1, timeout=_pending_timeout())
+        schedule(settings.MITOL_GOOGLE_SHEETS_NOTIFICATION_DEBOUNCE_SECONDS)
+        _increment_metric(resource_id, METRIC_RUNS_DEFERRED)
+        log.info("%s is already being processed, deferring run", resource_id)
+        return None
+
+    try:
+        # From here on, a new notification schedules a follow-up run
+        cache.delete(_key(resource_id, "pending"))
+        _increment_metric(resource_id, METRIC_RUNS_EXECUTED)
+        return process()
+    finally:
+        if cache.get(lock_key) == lock_token:
+            cache.delete(lock_key)
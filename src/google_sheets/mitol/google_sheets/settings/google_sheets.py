@@ -1,7 +1,7 @@
 """google sheets settings"""  # noqa: INP001
 
 import pytz
-from mitol.common.envs import get_list_literal, get_string
+from mitol.common.envs import get_bool, get_int, get_list_literal, get_string
 
 MITOL_GOOGLE_SHEETS_PROCESSOR_APP_NAME = get_string(
     name="MITOL_GOOGLE_SHEETS_PROCESSOR_APP_NAME",
@@ -54,6 +54,77 @@ MITOL_GOOGLE_SHEETS_PROCESS_ONLY_LAST_ROWS_NUM = get_string(
         "Process only the last N rows of data. If set to 0 then process all rows. "
     ),
 )
+MITOL_GOOGLE_SHEETS_INCREMENTAL_PROCESSING = get_bool(
+    name="MITOL_GOOGLE_SHEETS_INCREMENTAL_PROCESSING",
+    default=False,
+    description=("Skip rows that haven't changed since they last needed no processing"),
+)
+MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME = get_string(
+    name="MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME",
+    default="default",
+    description="The name of the Django cache to store the hashes of unchanged rows in",
+)
+MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_SECONDS = get_int(
+    name="MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_SECONDS",
+    default=7 * 24 * 60 * 60,
+    description=(
+        "Seconds to keep the hashes of unchanged rows for. Once they expire, the"
+        " next run processes every row."
+    ),
+)
+MITOL_GOOGLE_SHEETS_VALUE_REQUEST_PAGE_SIZE = get_int(
+    name="MITOL_GOOGLE_SHEETS_VALUE_REQUEST_PAGE_SIZE",
+    default=500,
+    description="The number of rows to fetch per request when reading a request sheet",
+)
+MITOL_GOOGLE_SHEETS_PROCESS_ROW_WORKERS = get_int(
+    name="MITOL_GOOGLE_SHEETS_PROCESS_ROW_WORKERS",
+    default=1,
+    description=(
+        "The number of rows of a request sheet to process at the same time. Rows are"
+        " processed one at a time unless this is more than 1."
+    ),
+)
+MITOL_GOOGLE_SHEETS_CLIENT_POOL_ENABLED = get_bool(
+    name="MITOL_GOOGLE_SHEETS_CLIENT_POOL_ENABLED",
+    default=True,
+    description=(
+        "If True, Google API credentials and clients are reused within a process"
+        " instead of being loaded and built for every use"
+    ),
+)
+MITOL_GOOGLE_SHEETS_CREDENTIALS_REFRESH_MARGIN_SECONDS = get_int(
+    name="MITOL_GOOGLE_SHEETS_CREDENTIALS_REFRESH_MARGIN_SECONDS",
+    default=5 * 60,
+    description=(
+        "Shared Google API credentials are loaded again once they're this many seconds"
+        " away from expiring"
+    ),
+)
+MITOL_GOOGLE_SHEETS_NOTIFICATION_CACHE_NAME = get_string(
+    name="MITOL_GOOGLE_SHEETS_NOTIFICATION_CACHE_NAME",
+    default="default",
+    description=(
+        "The name of the Django cache used to coalesce file change notifications. It"
+        " must be shared by every process (e.g. Redis)."
+    ),
+)
+MITOL_GOOGLE_SHEETS_NOTIFICATION_DEBOUNCE_SECONDS = get_int(
+    name="MITOL_GOOGLE_SHEETS_NOTIFICATION_DEBOUNCE_SECONDS",
+    default=30,
+    description=(
+        "Seconds to wait after a file change notification before processing the file."
+        " Any other notifications for the file in that time are dropped."
+    ),
+)
+MITOL_GOOGLE_SHEETS_PROCESSING_LOCK_SECONDS = get_int(
+    name="MITOL_GOOGLE_SHEETS_PROCESSING_LOCK_SECONDS",
+    default=15 * 60,
+    description=(
+        "The longest a file is expected to take to process. Runs started in that time"
+        " wait for the one in progress to finish."
+    ),
+)
 MITOL_GOOGLE_SHEETS_DATE_FORMAT = get_string(
     name="MITOL_GOOGLE_SHEETS_DATE_FORMAT",
     default="%m/%d/%Y",
@@ -1,15 +1,22 @@
 """API with general functionality for all enrollment change spreadsheets"""
 
+import hashlib
 import json
 import logging
 import operator as op
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
-from django.db import transaction
+from django.core.cache import caches
+from django.db import DatabaseError, connections, transaction
 from django.utils.functional import cached_property
 from mitol.common.utils.collections import group_into_dict
 from mitol.common.utils.config import get_missing_settings
-from mitol.google_sheets.api import get_authorized_pygsheets_client
+from mitol.common.utils.datetime import now_in_utc
+from mitol.google_sheets.api import (
+    ExpandedSheetsClient,
+    get_authorized_pygsheets_client,
+)
 from mitol.google_sheets.constants import (
     GOOGLE_SHEET_FIRST_ROW,
     REQUIRED_GOOGLE_SHEETS_CLIENT_SETTINGS,
@@ -19,13 +26,35 @@ from mitol.google_sheets.constants import (
 from mitol.google_sheets.utils import (
     ResultType,
     RowResult,
+    build_a1_range,
     format_datetime_for_sheet_formula,
+    get_column_index,
     get_data_rows,
     get_data_rows_after_start,
 )
 
 log = logging.getLogger(__name__)
 
+ROW_DIGESTS_CACHE_KEY_PREFIX = "mitol.google_sheets.row_digests"
+
+# Results of rows that won't need any processing until they change
+UNCHANGED_ROW_RESULT_TYPES = {ResultType.IGNORED}
+
+
+def get_row_digest(row_data):
+    """
+    Returns a short hash of the values in a spreadsheet row
+
+    Args:
+        row_data (List[str]): The raw data of a spreadsheet row
+
+    Returns:
+        str: A hash of the row's values
+    """  # noqa: D401
+    return hashlib.blake2b(
+        json.dumps(row_data).encode("utf-8"), digest_size=8
+    ).hexdigest()
+
 
 class SheetHandler:
     """
@@ -36,6 +65,13 @@ class SheetHandler:
     pygsheets_client = None
     spreadsheet = None
     sheet_metadata = None
+    # Cell values of the rows read while processing the sheet, keyed by row index
+    _row_values = None
+    # Values waiting to be written to the sheet, keyed by (row index, column index)
+    _queued_cell_updates = None
+    # Whether to skip rows that haven't changed since they last needed no processing.
+    # If None, MITOL_GOOGLE_SHEETS_INCREMENTAL_PROCESSING is used.
+    incremental = None
 
     def is_configured(self):
         """
@@ -111,6 +147,180 @@ class SheetHandler:
             start=GOOGLE_SHEET_FIRST_ROW + 1,
         )
 
+    def _record_row_values(self, enumerated_rows):
+        """
+        Passes enumerated rows through, keeping their values so that cell updates can be compared
+        against them
+
+        Args:
+            enumerated_rows (Iterable[Tuple[int, List[str]]]): Row indices paired with a list of strings
+                representing the data in each row
+
+        Yields:
+            Tuple[int, List[str]]: The same enumerated rows
+        """  # noqa: E501, D401
+        self._row_values = {}
+        for row_index, row_data in enumerated_rows:
+            self._row_values[row_index] = row_data
+            yield row_index, row_data
+
+    @property
+    def is_incremental(self):
+        """Returns True if rows that haven't changed should be skipped"""
+        if self.incremental is None:
+            return settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_PROCESSING
+        return self.incremental
+
+    @property
+    def row_digests_cache_key(self):
+        return (
+            f"{ROW_DIGESTS_CACHE_KEY_PREFIX}:{self.spreadsheet.id}:{self.worksheet.id}"
+        )
+
+    def get_unchanged_row_digests(self):
+        """
+        Returns the hashes of the rows that needed no processing in the last run
+
+        Returns:
+            Dict[int, str]: Row hashes keyed by row index
+        """  # noqa: D401
+        cache = caches[settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME]
+        return cache.get(self.row_digests_cache_key) or {}
+
+    def save_unchanged_row_digests(self, row_digests):
+        """
+        Saves the hashes of the rows that needed no processing in this run
+
+        Args:
+            row_digests (Dict[int, str]): Row hashes keyed by row index
+        """  # noqa: D401
+        caches[settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME].set(
+            self.row_digests_cache_key,
+            row_digests,
+            timeout=settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_SECONDS,
+        )
+
+    def clear_unchanged_row_digests(self):
+        """Forgets which rows were unchanged, so the next run processes every row"""
+        caches[settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME].delete(
+            self.row_digests_cache_key
+        )
+
+    def skip_unchanged_rows(self, enumerated_rows, unchanged_row_digests):
+        """
+        Filters out the rows whose values are the same as when they last needed no processing.
+        This happens before the rows are parsed, so it saves any database work for them too.
+
+        Args:
+            enumerated_rows (Iterable[Tuple[int, List[str]]]): Row indices paired with a list of strings
+                representing the data in each row
+            unchanged_row_digests (Dict[int, str]): Hashes of the rows that needed no processing
+                in the last run, keyed by row index
+
+        Yields:
+            Tuple[int, List[str]]: The rows that have changed
+        """  # noqa: E501, D401
+        for row_index, row_data in enumerated_rows:
+            if unchanged_row_digests.get(row_index) != get_row_digest(row_data):
+                yield row_index, row_data
+
+    def _save_incremental_results(self, row_results):
+        """
+        Saves the hashes of every row that won't need processing until it changes: rows that
+        were skipped or filtered out, and rows with results like IGNORED.
+
+        Args:
+            row_results (Iterable[RowResult]): The results of processing the rows
+        """  # noqa: E501, D401
+        rows_needing_processing = {
+            row_result.row_index
+            for row_result in row_results
+            if row_result.result_type not in UNCHANGED_ROW_RESULT_TYPES
+        }
+        self.save_unchanged_row_digests(
+            {
+                row_index: get_row_digest(row_data)
+                for row_index, row_data in self._row_values.items()
+                if row_index not in rows_needing_processing
+            }
+        )
+
+    def queue_cell_updates(self, row_index, start_col_letter, values):
+        """
+        Queues values to be written to consecutive cells of a row. Queued values are written by
+        write_queued_cell_updates in a single request.
+
+        Args:
+            row_index (int): The row index according to the spreadsheet
+            start_col_letter (str): The letter of the column of the first cell
+            values (List[str]): The values to write, starting with that column
+        """  # noqa: E501
+        if self._queued_cell_updates is None:
+            self._queued_cell_updates = {}
+        start_col = get_column_index(start_col_letter)
+        for offset, value in enumerate(values):
+            self._queued_cell_updates[(row_index, start_col + offset)] = value
+
+    def _cell_has_value(self, row_index, col_index, value):
+        """Returns True if the value of a cell that was read from the sheet is already the given value"""  # noqa: E501, D401
+        row_data = (self._row_values or {}).get(row_index)
+        if row_data is None:
+            return False
+        current_value = row_data[col_index] if col_index < len(row_data) else ""
+        return current_value == (value or "")
+
+    def write_queued_cell_updates(self):
+        """
+        Writes the queued cell values to the sheet in a single request, skipping cells that were
+        read with the same value they would be updated to.
+
+        Returns:
+            Optional[dict]: Google API response to the spreadsheets.values.batchUpdate request, or
+                None if there was nothing to write
+        """  # noqa: E501, D401
+        queued_cell_updates, self._queued_cell_updates = self._queued_cell_updates, None
+        changed_cells = sorted(
+            (cell, value)
+            for cell, value in (queued_cell_updates or {}).items()
+            if not self._cell_has_value(*cell, value)
+        )
+        if not changed_cells:
+            return None
+
+        # Cells next to each other in the same row are written as one range
+        value_ranges = []
+        previous_cell = None
+        for (row_index, col_index), value in changed_cells:
+            if previous_cell == (row_index, col_index - 1):
+                value_ranges[-1]["end_col"] = col_index
+                value_ranges[-1]["values"][0].append(value)
+            else:
+                value_ranges.append(
+                    {
+                        "row": row_index,
+                        "start_col": col_index,
+                        "end_col": col_index,
+                        "values": [[value]],
+                    }
+                )
+            previous_cell = (row_index, col_index)
+
+        return ExpandedSheetsClient(self.pygsheets_client).batch_update_sheet_values(
+            self.spreadsheet.id,
+            [
+                {
+                    "range": build_a1_range(
+                        self.worksheet.title,
+                        value_range["row"],
+                        value_range["start_col"],
+                        value_range["end_col"],
+                    ),
+                    "values": value_range["values"],
+                }
+                for value_range in value_ranges
+            ],
+        )
+
     def update_completed_rows(self, success_row_results):
         """
         Updates rows in the spreadsheet that were successfully processed.
@@ -128,9 +338,10 @@ class SheetHandler:
             failed_row_results (Iterable[RowResult]): Objects representing the results of processing a row
         """  # noqa: E501, D401
         for row_result in failed_row_results:
-            self.worksheet.update_value(
-                f"{self.sheet_metadata.ERROR_COL_LETTER}{row_result.row_index}",
-                row_result.message,
+            self.queue_cell_updates(
+                row_result.row_index,
+                self.sheet_metadata.ERROR_COL_LETTER,
+                [row_result.message],
             )
 
     def update_sheet_from_results(self, grouped_row_results):
@@ -174,6 +385,7 @@ class SheetHandler:
                 self.sheet_metadata.worksheet_name,
                 [row_result.row_index for row_result in ignored_row_results],
             )
+        self.write_queued_cell_updates()
 
     def post_process_results(self, grouped_row_results):
         """
@@ -200,6 +412,16 @@ class SheetHandler:
         """  # noqa: E501, D401
         raise NotImplementedError
 
+    def prepare_requests(self, enumerated_rows):
+        """
+        Does any work that can be done for all of the rows to be processed at once before they're processed
+        one by one (e.g.: creating or updating their database records in bulk). By default, nothing is done.
+
+        Args:
+            enumerated_rows (List[Tuple[int, List[str]]]): Row indices paired with a list of strings
+                representing the data in each row
+        """  # noqa: E501, D401
+
     @staticmethod
     def validate_sheet(enumerated_rows):
         """
@@ -247,12 +469,81 @@ class SheetHandler:
         """  # noqa: E501, D401
         raise NotImplementedError
 
+    def _process_row_safely(self, row_index, row_data):
+        """
+        Processes a row, and returns a failed result for it instead of raising if anything goes wrong
+        """  # noqa: E501, D401
+        try:
+            return self.process_row(row_index, row_data)
+        except Exception as exc:
+            log.exception("Error processing row %s from google sheets", row_index)
+            return RowResult(
+                row_index=row_index,
+                row_db_record=None,
+                row_object=None,
+                result_type=ResultType.FAILED,
+                message=f"Error: {exc!s}",
+            )
+
+    def _process_row_in_thread(self, enumerated_row):
+        try:
+            return self._process_row_safely(*enumerated_row)
+        finally:
+            # Each thread has its own database connections
+            connections.close_all()
+
+    def process_rows(self, enumerated_rows):
+        """
+        Processes the given rows, and returns the results of the ones that needed something done.
+
+        If MITOL_GOOGLE_SHEETS_PROCESS_ROW_WORKERS is more than 1, that many rows are processed at
+        the same time in a thread pool. A row that fails only affects its own result either way.
+        Rows are always processed one at a time inside a transaction, since the worker threads'
+        connections can't see what the transaction has written and could wait on its locks.
+
+        Args:
+            enumerated_rows (List[Tuple[int, List[str]]]): Row indices paired with a list of strings
+                representing the data in each row
+
+        Returns:
+            List[RowResult]: The results of processing the rows, in row order
+        """  # noqa: E501, D401
+        workers = min(
+            settings.MITOL_GOOGLE_SHEETS_PROCESS_ROW_WORKERS, len(enumerated_rows)
+        )
+        if workers > 1 and transaction.get_connection().in_atomic_block:
+            log.warning(
+                "Processing %s rows one at a time because the sheet is being processed "
+                "inside a transaction",
+                len(enumerated_rows),
+            )
+            workers = 1
+        if workers > 1:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="process_row"
+            ) as executor:
+                row_results = list(
+                    executor.map(self._process_row_in_thread, enumerated_rows)
+                )
+        else:
+            row_results = [
+                self._process_row_safely(row_index, row_data)
+                for row_index, row_data in enumerated_rows
+            ]
+        return [row_result for row_result in row_results if row_result]
+
     def process_sheet(self, limit_row_index=None):
         """
         Ensures that all non-legacy rows in the spreadsheet are correctly represented in the database,
         changes enrollments if appropriate, updates the spreadsheet to reflect any changes
         made, and returns a summary of those changes.
 
+        The database records for all of the rows are reconciled in bulk before the rows are
+        processed (see prepare_requests), and the rows can be processed concurrently (see process_rows).
+
+        If incremental processing is on, rows that haven't changed since they last needed no
+        processing are skipped before they're parsed.
+
         Returns:
             dict: A summary of the changes made while processing the enrollment change request sheet
         """  # noqa: E501, D401
@@ -262,24 +553,19 @@ class SheetHandler:
             enumerated_rows = [
                 (limit_row_index, self.worksheet.get_row(limit_row_index))
             ]
+        enumerated_rows = self._record_row_values(enumerated_rows)
+        incremental = self.is_incremental and limit_row_index is None
+        if incremental:
+            enumerated_rows = self.skip_unchanged_rows(
+                enumerated_rows, self.get_unchanged_row_digests()
+            )
         filtered_rows = self.filter_ignored_rows(enumerated_rows)
         valid_enumerated_rows, row_results = self.validate_sheet(filtered_rows)
-        for row_index, row_data in valid_enumerated_rows:
-            row_result = None
-            try:
-                row_result = self.process_row(row_index, row_data)
-            except Exception as exc:
-                log.exception("Error processing row %s from google sheets", row_index)
-                row_result = RowResult(
-                    row_index=row_index,
-                    row_db_record=None,
-                    row_object=None,
-                    result_type=ResultType.FAILED,
-                    message=f"Error: {exc!s}",
-                )
-            finally:
-                if row_result:
-                    row_results.append(row_result)
+        valid_enumerated_rows = list(valid_enumerated_rows)
+        self.prepare_requests(valid_enumerated_rows)
+        row_results = [*row_results, *self.process_rows(valid_enumerated_rows)]
+        if incremental:
+            self._save_incremental_results(row_results)
         if not row_results:
             return {}
         grouped_row_results = group_into_dict(
@@ -310,12 +596,21 @@ class GoogleSheetsChangeRequestHandler(SheetHandler):
             sheet_metadata (Type(SheetConfig)):
             request_model_cls (Type(GoogleSheetsRequestModel)):
         """
-        self.pygsheets_client = get_authorized_pygsheets_client()
-        self.spreadsheet = self.pygsheets_client.open_by_key(spreadsheet_id)
+        self.spreadsheet_id = spreadsheet_id
         self.worksheet_id = worksheet_id
         self.start_row = start_row
         self.sheet_metadata = sheet_metadata
         self.request_model_cls = request_model_cls
+        self._reconciled_requests = {}
+
+    @cached_property
+    def pygsheets_client(self):
+        return get_authorized_pygsheets_client()
+
+    @cached_property
+    def spreadsheet(self):
+        # Opened on first use, so that creating a handler doesn't make any requests
+        return self.pygsheets_client.open_by_key(self.spreadsheet_id)
 
     @cached_property
     def worksheet(self):
@@ -324,10 +619,17 @@ class GoogleSheetsChangeRequestHandler(SheetHandler):
     def get_enumerated_rows(self):
         # Only yield rows in the spreadsheet that come after the legacy rows
         # (i.e.: the rows of data that were manually entered before we started automating this process)  # noqa: E501
-        row_count = len(self.worksheet.get_all_values(include_tailing_empty_rows=False))
         first_row_to_process = self.start_row
         if int(settings.MITOL_GOOGLE_SHEETS_PROCESS_ONLY_LAST_ROWS_NUM) > 0:
-            # allow to choose to process only last few rows
+            # allow to choose to process only last few rows. Every data row has a form
+            # response id, so counting the values in that column counts the rows
+            # without fetching the whole sheet.
+            row_count = len(
+                self.worksheet.get_col(
+                    self.sheet_metadata.FORM_RESPONSE_ID_COL + 1,
+                    include_tailing_empty=False,
+                )
+            )
             new_first_row = (
                 row_count
                 - int(settings.MITOL_GOOGLE_SHEETS_PROCESS_ONLY_LAST_ROWS_NUM)
@@ -345,34 +647,126 @@ class GoogleSheetsChangeRequestHandler(SheetHandler):
                 start_row=first_row_to_process,
                 start_col=1,
                 end_col=self.sheet_metadata.num_columns,
+                page_size=settings.MITOL_GOOGLE_SHEETS_VALUE_REQUEST_PAGE_SIZE,
             ),
             start=first_row_to_process,
         )
 
     def update_completed_rows(self, success_row_results):
         for row_result in success_row_results:
-            self.worksheet.update_values(
-                crange=f"{self.sheet_metadata.PROCESSOR_COL_LETTER}{row_result.row_index}:{self.sheet_metadata.ERROR_COL_LETTER}{row_result.row_index}",
-                values=[
-                    [
-                        settings.MITOL_GOOGLE_SHEETS_PROCESSOR_APP_NAME,
-                        format_datetime_for_sheet_formula(
-                            row_result.row_db_record.date_completed.astimezone(
-                                settings.MITOL_GOOGLE_SHEETS_DATE_TIMEZONE
-                            )
-                        ),
-                        "",
-                    ]
+            self.queue_cell_updates(
+                row_result.row_index,
+                self.sheet_metadata.PROCESSOR_COL_LETTER,
+                [
+                    settings.MITOL_GOOGLE_SHEETS_PROCESSOR_APP_NAME,
+                    format_datetime_for_sheet_formula(
+                        row_result.row_db_record.date_completed.astimezone(
+                            settings.MITOL_GOOGLE_SHEETS_DATE_TIMEZONE
+                        )
+                    ),
+                    "",
                 ],
             )
 
+    def _get_form_response_id(self, row_data):
+        return int(row_data[self.sheet_metadata.FORM_RESPONSE_ID_COL].strip())
+
+    def _get_user_input_json(self, row_data):
+        return json.dumps(self.sheet_metadata.get_form_input_columns(row_data))
+
+    def prepare_requests(self, enumerated_rows):
+        """
+        Creates or updates the request records for all of the given rows with a couple of bulk queries
+        instead of a locked get_or_create for each row. get_or_create_request then returns these records
+        without querying the database again, so only rows that couldn't be reconciled here take a row lock.
+
+        Args:
+            enumerated_rows (List[Tuple[int, List[str]]]): Row indices paired with a list of strings
+                representing the data in each row
+        """  # noqa: E501, D401
+        self._reconciled_requests = {}
+        raw_data_by_id = {}
+        for _, row_data in enumerated_rows:
+            try:
+                form_response_id = self._get_form_response_id(row_data)
+            except (IndexError, ValueError):
+                # This will fail again (and be reported) when the row is processed
+                continue
+            raw_data_by_id.setdefault(
+                form_response_id, self._get_user_input_json(row_data)
+            )
+        if not raw_data_by_id:
+            return
+
+        request_objects = self.request_model_cls.objects
+        try:
+            with transaction.atomic():
+                existing_requests = request_objects.in_bulk(
+                    list(raw_data_by_id), field_name="form_response_id"
+                )
+                changed_requests = [
+                    request
+                    for form_response_id, request in existing_requests.items()
+                    if request.raw_data != raw_data_by_id[form_response_id]
+                ]
+                now = now_in_utc()
+                for request in changed_requests:
+                    request.raw_data = raw_data_by_id[request.form_response_id]
+                    request.updated_on = now
+                if changed_requests:
+                    request_objects.bulk_update(
+                        changed_requests, ["raw_data", "updated_on"]
+                    )
+                new_ids = [
+                    form_response_id
+                    for form_response_id in raw_data_by_id
+                    if form_response_id not in existing_requests
+                ]
+                if new_ids:
+                    # Primary keys aren't set on objects created with ignore_conflicts,
+                    # so the new records are fetched again.
+                    request_objects.bulk_create(
+                        [
+                            self.request_model_cls(
+                                form_response_id=form_response_id,
+                                raw_data=raw_data_by_id[form_response_id],
+                            )
+                            for form_response_id in new_ids
+                        ],
+                        ignore_conflicts=True,
+                    )
+                    new_requests = request_objects.in_bulk(
+                        new_ids, field_name="form_response_id"
+                    )
+                else:
+                    new_requests = {}
+        except DatabaseError:
+            log.exception(
+                "Failed to reconcile %s records in bulk, falling back to one row at a time",  # noqa: E501
+                self.request_model_cls.__name__,
+            )
+            return
+
+        changed_ids = {request.form_response_id for request in changed_requests}
+        self._reconciled_requests = {
+            **{
+                form_response_id: (request, False, form_response_id in changed_ids)
+                for form_response_id, request in existing_requests.items()
+            },
+            **{
+                form_response_id: (request, True, False)
+                for form_response_id, request in new_requests.items()
+            },
+        }
+
     def get_or_create_request(self, row_data):
-        form_response_id = int(
-            row_data[self.sheet_metadata.FORM_RESPONSE_ID_COL].strip()
-        )
-        user_input_json = json.dumps(
-            self.sheet_metadata.get_form_input_columns(row_data)
-        )
+        form_response_id = self._get_form_response_id(row_data)
+        user_input_json = self._get_user_input_json(row_data)
+        reconciled = (self._reconciled_requests or {}).get(form_response_id)
+        if reconciled is not None and reconciled[0].raw_data == user_input_json:
+            # Any later rows with the same id get the record as it is now
+            self._reconciled_requests[form_response_id] = (reconciled[0], False, False)
+            return reconciled
         with transaction.atomic():
             (
                 enroll_change_request,
@@ -54,6 +54,41 @@ def get_column_letter(column_index):
     return chr(column_index + uppercase_a_ord)
 
 
+def get_column_index(column_letter):
+    """
+    Returns the index that corresponds to a given spreadsheet column letter (e.g.: 'A' -> 0, 'D' -> 3)
+
+    Args:
+        column_letter (str):
+
+    Returns:
+        int: The column letter expressed as an index
+    """  # noqa: E501, D401
+    if len(column_letter) != 1:
+        raise ValueError("Cannot generate a column index past 'Z'")  # noqa: EM101, TRY003
+    return ord(column_letter.upper()) - ord("A")
+
+
+def build_a1_range(worksheet_title, row_index, start_column_index, end_column_index):
+    """
+    Returns the A1 notation for a range of cells in a single row of a worksheet
+
+    Args:
+        worksheet_title (str): The title of the worksheet
+        row_index (int): The row index according to the spreadsheet (starting with 1)
+        start_column_index (int): The index of the first column in the range (starting with 0)
+        end_column_index (int): The index of the last column in the range (starting with 0)
+
+    Returns:
+        str: The range in A1 notation (e.g.: "'Sheet 1'!B5:D5")
+    """  # noqa: E501, D401
+    quoted_title = worksheet_title.replace("'", "''")
+    return (
+        f"'{quoted_title}'!{get_column_letter(start_column_index)}{row_index}:"
+        f"{get_column_letter(end_column_index)}{row_index}"
+    )
+
+
 class SheetConfigMixin:
     """Metadata for a type of Google Sheet that this app interacts with"""
 
@@ -11,6 +11,7 @@ from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from google.auth.exceptions import GoogleAuthError
 from google_auth_oauthlib.flow import Flow
+from mitol.google_sheets.api import clear_client_pool
 from mitol.google_sheets.constants import REQUIRED_GOOGLE_API_SCOPES
 from mitol.google_sheets.models import GoogleApiAuth
 from mitol.google_sheets.utils import generate_google_client_config
@@ -75,6 +76,7 @@ def complete_google_auth(request):
         google_api_auth.access_token = credentials.token
         google_api_auth.refresh_token = credentials.refresh_token
         google_api_auth.save()
+    clear_client_pool()
 
     return redirect(
         "{}?success=auth".format(reverse("google-sheets:sheets-admin-view"))
@@ -8,21 +8,38 @@ import json
 import logging
 import re
 from collections.abc import Iterable
+from dataclasses import dataclass
 from enum import Enum
+from http import HTTPStatus
 from urllib.parse import quote
 
 import requests
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from hubspot import HubSpot
+from hubspot.crm.associations.v4 import (
+    BatchInputPublicFetchAssociationsBatchRequest,
+    PublicFetchAssociationsBatchRequest,
+)
+from hubspot.crm.line_items import (
+    BatchReadInputSimplePublicObjectId,
+    SimplePublicObjectId,
+)
 from hubspot.crm.objects import (
     ApiException,
+    BatchInputSimplePublicObjectBatchInput,
+    BatchInputSimplePublicObjectBatchInputForCreate,
+    BatchInputSimplePublicObjectBatchInputUpsert,
     PublicObjectSearchRequest,
     SimplePublicObject,
+    SimplePublicObjectBatchInput,
+    SimplePublicObjectBatchInputForCreate,
+    SimplePublicObjectBatchInputUpsert,
     SimplePublicObjectInput,
 )
 from hubspot.crm.properties.exceptions import ApiException as PropertiesApiException
-from mitol.common.utils.collections import replace_null_values
+from mitol.common.utils.collections import chunks, replace_null_values
+from mitol.hubspot_api import ratelimit
 from mitol.hubspot_api.models import HubspotObject
 from urllib3 import Retry
 
@@ -64,6 +81,26 @@ HUBSPOT_MAX_BATCH_SIZE = {
     HubspotObjectType.PRODUCTS.value: 100,
 }
 
+# The most inputs the CRM batch endpoints accept in one request
+HUBSPOT_BATCH_API_LIMIT = 100
+# The most objects the v4 batch associations endpoint reads in one request
+HUBSPOT_ASSOCIATIONS_BATCH_LIMIT = 1000
+# The most associations the v4 associations endpoint returns per page
+HUBSPOT_ASSOCIATIONS_PAGE_LIMIT = 500
+
+
+@dataclass
+class BatchUpsertResult:
+    """The outcome of upserting one object with batch_upsert_objects"""
+
+    object_id: int
+    result: SimplePublicObject | None = None
+    error: Exception | None = None
+
+    @property
+    def hubspot_id(self) -> str | None:
+        return self.result.id if self.result else None
+
 
 class HubspotApi(HubSpot):
     """Hubspot API Client"""
@@ -75,12 +112,18 @@ class HubspotApi(HubSpot):
         **kwargs,
     ):
         """Set an authenticated client"""
+        rate_limited = "api_factory" not in kwargs and ratelimit.is_enabled()
+        if rate_limited:
+            kwargs["api_factory"] = ratelimit.rate_limited_api_factory
         if not retry:
-            # Use some default retry settings
+            # Use some default retry settings. When rate limited, 429s are
+            # retried by the rate limiter so that every process backs off.
             retry = Retry(
                 total=settings.MITOL_HUBSPOT_API_RETRIES,
                 backoff_factor=0.3,
-                status_forcelist=(429, 500, 502, 504),
+                status_forcelist=(500, 502, 504)
+                if rate_limited
+                else (429, 500, 502, 504),
             )
         super().__init__(access_token=access_token, retry=retry, **kwargs)
 
@@ -316,6 +359,238 @@ def upsert_object_request(
     return result
 
 
+def _batch_write(
+    write_func, hubspot_type: str, batch_input, object_ids: list[int]
+) -> dict[int, SimplePublicObject]:
+    """
+    Send a batch write, returning the objects HubSpot wrote by object id. Any
+    object missing from the result wasn't written, e.g. due to a conflict.
+    """
+    response = write_func(hubspot_type, batch_input)
+
+    results = {}
+    for result in response.results or []:
+        trace_id = result.object_write_trace_id
+        if trace_id is not None and int(trace_id) in object_ids:
+            results[int(trace_id)] = result
+    return results
+
+
+# Batch write errors that are retried one object at a time
+BATCH_FALLBACK_STATUSES = {HTTPStatus.BAD_REQUEST, HTTPStatus.CONFLICT}
+
+
+def _get_write_batches(  # noqa: PLR0913
+    api,
+    bodies: dict[int, SimplePublicObjectInput],
+    hubspot_ids: dict[int, str],
+    updates: list[int],
+    creates: list[int],
+    *,
+    id_property: str | None,
+) -> list[tuple]:
+    """Return the batch write function, input and object ids for each batch request"""
+    batches = []
+    if updates:
+        batches.append(
+            (
+                api.update,
+                BatchInputSimplePublicObjectBatchInput(
+                    inputs=[
+                        SimplePublicObjectBatchInput(
+                            id=hubspot_ids[object_id],
+                            properties=bodies[object_id].properties,
+                            object_write_trace_id=str(object_id),
+                        )
+                        for object_id in updates
+                    ]
+                ),
+                updates,
+            )
+        )
+    if creates and id_property:
+        # objects without a value for id_property are left to the single object
+        # fallback below
+        upserts = [
+            object_id
+            for object_id in creates
+            if (bodies[object_id].properties or {}).get(id_property)
+        ]
+        if upserts:
+            batches.append(
+                (
+                    api.upsert,
+                    BatchInputSimplePublicObjectBatchInputUpsert(
+                        inputs=[
+                            SimplePublicObjectBatchInputUpsert(
+                                id=bodies[object_id].properties[id_property],
+                                id_property=id_property,
+                                properties=bodies[object_id].properties,
+                                object_write_trace_id=str(object_id),
+                            )
+                            for object_id in upserts
+                        ]
+                    ),
+                    upserts,
+                )
+            )
+    elif creates:
+        batches.append(
+            (
+                api.create,
+                BatchInputSimplePublicObjectBatchInputForCreate(
+                    inputs=[
+                        SimplePublicObjectBatchInputForCreate(
+                            properties=bodies[object_id].properties,
+                            object_write_trace_id=str(object_id),
+                        )
+                        for object_id in creates
+                    ]
+                ),
+                creates,
+            )
+        )
+    return batches
+
+
+def _batch_upsert_chunk(
+    content_type: ContentType,
+    hubspot_type: str,
+    bodies: dict[int, SimplePublicObjectInput],
+    *,
+    id_property: str | None,
+    ignore_conflict: bool,
+) -> dict[int, BatchUpsertResult]:
+    """Upsert a chunk of objects, no bigger than the batch API limit"""
+    api = HubspotApi().crm.objects.batch_api
+    hubspot_ids = dict(
+        HubspotObject.objects.filter(
+            content_type=content_type, object_id__in=bodies.keys()
+        ).values_list("object_id", "hubspot_id")
+    )
+    updates = [object_id for object_id in bodies if object_id in hubspot_ids]
+    creates = [object_id for object_id in bodies if object_id not in hubspot_ids]
+
+    batches = _get_write_batches(
+        api, bodies, hubspot_ids, updates, creates, id_property=id_property
+    )
+
+    results = {}
+    for write_func, batch_input, object_ids in batches:
+        try:
+            written = _batch_write(write_func, hubspot_type, batch_input, object_ids)
+        except ApiException as err:
+            # HubSpot rejects a whole batch if any input in it is invalid or
+            # conflicts, so fall back to writing these one at a time below.
+            # Anything else (rate limits, outages) would only get worse with
+            # more requests, so it's left to the retry and rate limit handling.
+            if err.status not in BATCH_FALLBACK_STATUSES:
+                raise
+            log.warning(
+                "Batch write of %d %s failed",
+                len(object_ids),
+                hubspot_type,
+                exc_info=True,
+            )
+            written = {}
+        results.update(
+            {
+                object_id: BatchUpsertResult(object_id, result=result)
+                for object_id, result in written.items()
+            }
+        )
+
+    HubspotObject.objects.bulk_create(
+        [
+            HubspotObject(
+                content_type=content_type,
+                object_id=object_id,
+                hubspot_id=results[object_id].hubspot_id,
+            )
+            for object_id in creates
+            if object_id in results
+        ],
+        ignore_conflicts=True,
+    )
+
+    for object_id, body in bodies.items():
+        if object_id in results:
+            continue
+
+        # anything the batch didn't write gets the full conflict handling
+        try:
+            result = upsert_object_request(
+                content_type,
+                hubspot_type,
+                object_id=object_id,
+                body=body,
+                ignore_conflict=ignore_conflict,
+            )
+        except Exception as exc:  # noqa: BLE001
+            results[object_id] = BatchUpsertResult(object_id, error=exc)
+        else:
+            results[object_id] = BatchUpsertResult(object_id, result=result)
+
+    return results
+
+
+def batch_upsert_objects(  # noqa: PLR0913
+    content_type: ContentType,
+    hubspot_type: str,
+    bodies: dict[int, SimplePublicObjectInput],
+    *,
+    id_property: str | None = None,
+    ignore_conflict: bool = False,
+    batch_size: int | None = None,
+) -> list[BatchUpsertResult]:
+    """
+    Update or create many objects in Hubspot via the CRM batch API
+
+    Objects are written in chunks: the Hubspot ids for a chunk are looked up in
+    one query, known objects are updated and new ones created with one batch
+    request each, and the ids of new objects are saved with one bulk insert.
+    Any object a batch request doesn't write (HubSpot rejects the whole batch
+    with a 400 or 409 if one input is invalid or conflicts with an existing
+    object) is retried on its own with upsert_object_request, which handles
+    conflicts, as are new objects without a value for id_property. Any other
+    batch error is raised.
+
+    Args:
+        content_type(ContentType): The object content type
+        hubspot_type(str): The hubspot_api type (deals, contacts, etc)
+        bodies(dict[int, SimplePublicObjectInput]): The properties to set in Hubspot,
+            by database id of the object
+        id_property(str): A unique property (like "email" for contacts) to match new
+            objects to existing Hubspot objects on with the batch upsert endpoint
+        ignore_conflict(bool): If true, a conflict error on create will be retried as an update
+        batch_size(int): The number of objects per batch request, defaults to
+            HUBSPOT_MAX_BATCH_SIZE for the type
+
+    Returns:
+        list[BatchUpsertResult]: The result for each object, in the order given
+    """  # noqa: E501
+    batch_size = min(
+        batch_size or HUBSPOT_MAX_BATCH_SIZE.get(hubspot_type, HUBSPOT_BATCH_API_LIMIT),
+        HUBSPOT_BATCH_API_LIMIT,
+    )
+    object_ids = list(bodies)
+    results = {}
+
+    for start in range(0, len(object_ids), batch_size):
+        chunk = object_ids[start : start + batch_size]
+        results.update(
+            _batch_upsert_chunk(
+                content_type,
+                hubspot_type,
+                {object_id: bodies[object_id] for object_id in chunk},
+                id_property=id_property,
+                ignore_conflict=ignore_conflict,
+            )
+        )
+
+    return [results[object_id] for object_id in object_ids]
+
+
 def associate_objects_request(
     from_type: str,
     from_id: str,
@@ -668,26 +943,156 @@ def find_deal(
     )
 
 
-def get_line_items_for_deal(hubspot_id: str) -> list[SimplePublicObject]:
+def get_associated_ids(
+    object_type: str, object_id: str, to_object_type: str
+) -> list[str]:
+    """
+    Return the ids of all objects of a type associated with an object
+
+    Args:
+        object_type(str): The hubspot_api type of the object (deals, contacts, etc)
+        object_id(str): The hubspot_api id of the object
+        to_object_type(str): The hubspot_api type of the associated objects
+    Returns:
+        list[str]: The hubspot_api ids of the associated objects
+    """
+    basic_api = HubspotApi().crm.associations.v4.basic_api
+    associated_ids = []
+    after = None
+    while True:
+        page = basic_api.get_page(
+            object_type=object_type,
+            object_id=object_id,
+            to_object_type=to_object_type,
+            after=after,
+            limit=HUBSPOT_ASSOCIATIONS_PAGE_LIMIT,
+        )
+        associated_ids.extend(
+            str(association.to_object_id) for association in page.results
+        )
+        if page.paging is None or page.paging.next is None:
+            return associated_ids
+        after = page.paging.next.after
+
+
+def batch_get_associated_ids(
+    object_type: str, object_ids: Iterable[str], to_object_type: str
+) -> dict[str, list[str]]:
+    """
+    Return the ids of all objects of a type associated with each of many objects,
+    using the v4 batch associations API
+
+    Args:
+        object_type(str): The hubspot_api type of the objects (deals, contacts, etc)
+        object_ids(Iterable[str]): The hubspot_api ids of the objects
+        to_object_type(str): The hubspot_api type of the associated objects
+    Returns:
+        dict[str, list[str]]: The hubspot_api ids of the associated objects, by object id
+    """  # noqa: E501
+    batch_api = HubspotApi().crm.associations.v4.batch_api
+    associated_ids = {str(object_id): [] for object_id in object_ids}
+    # (object id, paging cursor) of each page still to be read
+    pending = [(object_id, None) for object_id in associated_ids]
+
+    while pending:
+        next_pending = []
+        for chunk in chunks(pending, chunk_size=HUBSPOT_ASSOCIATIONS_BATCH_LIMIT):
+            response = batch_api.get_page(
+                from_object_type=object_type,
+                to_object_type=to_object_type,
+                batch_input_public_fetch_associations_batch_request=BatchInputPublicFetchAssociationsBatchRequest(
+                    inputs=[
+                        PublicFetchAssociationsBatchRequest(id=object_id, after=after)
+                        for object_id, after in chunk
+                    ]
+                ),
+            )
+            # objects without any associations are reported as errors, not results
+            for result in response.results:
+                object_id = str(result._from.id)  # noqa: SLF001
+                associated_ids[object_id].extend(
+                    str(association.to_object_id) for association in result.to
+                )
+                if result.paging is not None and result.paging.next is not None:
+                    next_pending.append((object_id, result.paging.next.after))
+        pending = next_pending
+
+    return associated_ids
+
+
+def batch_read_line_items(
+    hubspot_ids: Iterable[str], properties: list[str] | None = None
+) -> dict[str, SimplePublicObject]:
+    """
+    Read many line items with the CRM batch API
+
+    Args:
+        hubspot_ids(Iterable[str]): The hubspot_api ids of the line items
+        properties(list[str]): The properties to return, defaults to Hubspot's defaults
+    Returns:
+        dict[str, SimplePublicObject]: The line items found, by hubspot_api id
+    """
+    batch_api = HubspotApi().crm.line_items.batch_api
+    line_items = {}
+    for chunk in chunks(set(hubspot_ids), chunk_size=HUBSPOT_BATCH_API_LIMIT):
+        response = batch_api.read(
+            BatchReadInputSimplePublicObjectId(
+                inputs=[SimplePublicObjectId(id=hubspot_id) for hubspot_id in chunk],
+                properties=properties or [],
+                properties_with_history=[],
+            )
+        )
+        line_items.update({line_item.id: line_item for line_item in response.results})
+    return line_items
+
+
+def get_line_items_for_deal(
+    hubspot_id: str, properties: list[str] | None = None
+) -> list[SimplePublicObject]:
     """
     Given the hubspot_api id for a deal, return all its line items
 
     Args:
         hubspot_id(str): The deal's hubspot_api id
+        properties(list[str]): The line item properties to return, defaults to
+            Hubspot's defaults
     Returns:
         list[SimplePublicObject]: The Hubspot line items returned by the API
 
     """
-    client = HubspotApi()
-    associations = client.crm.associations.v4.basic_api.get_page(
-        object_type="deals",
-        object_id=hubspot_id,
-        to_object_type=HubspotObjectType.LINES.value,
-    ).results
-    return [
-        client.crm.line_items.basic_api.get_by_id(association.to_object_id)
-        for association in associations
-    ]
+    line_ids = get_associated_ids(
+        HubspotObjectType.DEALS.value, hubspot_id, HubspotObjectType.LINES.value
+    )
+    line_items = batch_read_line_items(line_ids, properties=properties)
+    return [line_items[line_id] for line_id in line_ids if line_id in line_items]
+
+
+def get_line_items_for_deals(
+    hubspot_ids: Iterable[str], properties: list[str] | None = None
+) -> dict[str, list[SimplePublicObject]]:
+    """
+    Return the line items for each of many deals, with a batch request per
+    HUBSPOT_ASSOCIATIONS_BATCH_LIMIT deals and per HUBSPOT_BATCH_API_LIMIT line
+    items rather than several requests per deal
+
+    Args:
+        hubspot_ids(Iterable[str]): The deals' hubspot_api ids
+        properties(list[str]): The line item properties to return, defaults to
+            Hubspot's defaults
+    Returns:
+        dict[str, list[SimplePublicObject]]: The Hubspot line items, by deal id
+    """
+    line_ids_by_deal = batch_get_associated_ids(
+        HubspotObjectType.DEALS.value, hubspot_ids, HubspotObjectType.LINES.value
+    )
+    line_items = batch_read_line_items(
+        [line_id for line_ids in line_ids_by_deal.values() for line_id in line_ids],
+        properties=properties,
+    )
+    return {
+        deal_id: [line_items[line_id] for line_id in line_ids if line_id in line_items]
+        for deal_id, line_ids in line_ids_by_deal.items()
+    }
 
 
 def find_line_item(
@@ -0,0 +1,230 @@
+"""
+Resumable exports of Hubspot CRM objects
+
+Exporting every object of a type can take thousands of page requests. The
+paging cursor is saved to a Django cache after each page, keyed by an export
+id, so an export that dies part way through picks up from the last page it
+finished instead of starting over. Use a database-backed cache for exports
+that need to survive cache evictions.
+
+Objects can be written to a newline-delimited JSON file one page at a time, so
+memory use doesn't grow with the size of the export.
+"""
+
+import json
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from hubspot.crm.objects import SimplePublicObject
+from mitol.hubspot_api.api import HubspotApi
+
+log = logging.getLogger()
+
+EXPORT_CACHE_KEY_PREFIX = "mitol.hubspot_api.export"
+
+
+def _get_cache():
+    return caches[settings.MITOL_HUBSPOT_API_EXPORT_CACHE_NAME]
+
+
+def _checkpoint_key(export_id: str) -> str:
+    return f"{EXPORT_CACHE_KEY_PREFIX}:{export_id}"
+
+
+def get_checkpoint(export_id: str) -> dict | None:
+    """
+    Return the saved progress of an export, or None if it hasn't started
+
+    Args:
+        export_id(str): The export id
+    Returns:
+        dict: the paging cursor of the next page under "after", and any other
+            progress saved with it
+    """
+    return _get_cache().get(_checkpoint_key(export_id))
+
+
+def save_checkpoint(export_id: str, checkpoint: dict):
+    """
+    Save the progress of an export
+
+    Args:
+        export_id(str): The export id
+        checkpoint(dict): The paging cursor of the next page under "after", and
+            any other progress to save with it
+    """
+    _get_cache().set(
+        _checkpoint_key(export_id),
+        checkpoint,
+        timeout=settings.MITOL_HUBSPOT_API_EXPORT_CHECKPOINT_SECONDS,
+    )
+
+
+def clear_checkpoint(export_id: str):
+    """
+    Discard the progress of an export, so that it starts over next time
+
+    Args:
+        export_id(str): The export id
+    """
+    _get_cache().delete(_checkpoint_key(export_id))
+
+
+def get_pages(
+    object_type: str,
+    *,
+    after: str | None = None,
+    properties: list[str] | None = None,
+    associations: list[str] | None = None,
+    limit: int = 100,
+) -> Iterable[tuple[list[SimplePublicObject], str | None]]:
+    """
+    Yield pages of objects, starting from a paging cursor
+
+    Args:
+        object_type(str): The hubspot_api object type (deals, products, etc)
+        after(str): The paging cursor to start from
+        properties(list[str]): The properties to return, defaults to Hubspot's defaults
+        associations(list[str]): The object types to return associated ids of
+        limit(int): The number of results per page (max 100)
+
+    Yields:
+        tuple(list[SimplePublicObject], str): The objects in a page, and the cursor
+            of the next page or None if it's the last one
+    """
+    basic_api = HubspotApi().crm.objects.basic_api
+    while True:
+        page = basic_api.get_page(
+            object_type,
+            after=after,
+            limit=limit,
+            properties=properties,
+            associations=associations,
+        )
+        after = (
+            page.paging.next.after
+            if page.paging is not None and page.paging.next is not None
+            else None
+        )
+        yield page.results, after
+        if after is None:
+            return
+
+
+def export_objects(
+    object_type: str,
+    export_id: str,
+    *,
+    properties: list[str] | None = None,
+    associations: list[str] | None = None,
+    limit: int = 100,
+) -> Iterable[SimplePublicObject]:
+    """
+    Yield all objects of a type, resuming from where a previous export with the
+    same id stopped.
+
+    The cursor is saved once every object in a page has been consumed, so if the
+    export is interrupted the objects of the page it was on are yielded again.
+
+    Args:
+        object_type(str): The hubspot_api object type (deals, products, etc)
+        export_id(str): An id for the export to save its progress under
+        properties(list[str]): The properties to return, defaults to Hubspot's defaults
+        associations(list[str]): The object types to return associated ids of
+        limit(int): The number of results per page (max 100)
+
+    Yields:
+        SimplePublicObject: Hubspot objects of the specified type
+    """
+    checkpoint = get_checkpoint(export_id) or {}
+    for results, after in get_pages(
+        object_type,
+        after=checkpoint.get("after"),
+        properties=properties,
+        associations=associations,
+        limit=limit,
+    ):
+        yield from results
+        if after is not None:
+            save_checkpoint(export_id, {"after": after})
+    clear_checkpoint(export_id)
+
+
+def _to_json_line(obj: SimplePublicObject) -> bytes:
+    return (
+        json.dumps(obj.to_dict(), cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+    ).encode("utf-8")
+
+
+def export_objects_to_file(  # noqa: PLR0913
+    object_type: str,
+    path: str | Path,
+    *,
+    export_id: str | None = None,
+    properties: list[str] | None = None,
+    associations: list[str] | None = None,
+    limit: int = 100,
+) -> int:
+    """
+    Write all objects of a type to a newline-delimited JSON file, resuming from
+    where a previous export to the same file stopped.
+
+    Each page is written and flushed to disk before its cursor is saved along
+    with the length of the file at that point. A resumed export truncates the
+    file to that length, so the file ends up with each object exactly once.
+
+    Args:
+        object_type(str): The hubspot_api object type (deals, products, etc)
+        path(str | Path): The file to write to
+        export_id(str): An id for the export to save its progress under, defaults
+            to one based on the object type and path
+        properties(list[str]): The properties to return, defaults to Hubspot's defaults
+        associations(list[str]): The object types to return associated ids of
+        limit(int): The number of results per page (max 100)
+
+    Returns:
+        int: The number of objects in the file
+    """
+    path = Path(path)
+    export_id = export_id or f"{object_type}:{path.resolve()}"
+    checkpoint = get_checkpoint(export_id)
+
+    if checkpoint is None or not path.exists():
+        checkpoint = {"after": None, "offset": 0, "count": 0}
+        path.write_bytes(b"")
+    else:
+        log.info(
+            "Resuming export of %s to %s after %d objects",
+            object_type,
+            path,
+            checkpoint["count"],
+        )
+
+    count = checkpoint["count"]
+    with path.open("r+b") as sink:
+        sink.truncate(checkpoint["offset"])
+        sink.seek(checkpoint["offset"])
+
+        for results, after in get_pages(
+            object_type,
+            after=checkpoint["after"],
+            properties=properties,
+            associations=associations,
+            limit=limit,
+        ):
+            sink.writelines(_to_json_line(obj) for obj in results)
+            sink.flush()
+            os.fsync(sink.fileno())
+            count += len(results)
+            if after is not None:
+                save_checkpoint(
+                    export_id, {"after": after, "offset": sink.tell(), "count": count}
+                )
+
+    clear_checkpoint(export_id)
+    return count
@@ -0,0 +1,60 @@
+"""Export all Hubspot objects of a type to a newline-delimited JSON file."""
+
+from django.core.management import BaseCommand
+from mitol.hubspot_api.export import clear_checkpoint, export_objects_to_file
+
+
+class Command(BaseCommand):
+    """Export all Hubspot objects of a type to a newline-delimited JSON file."""
+
+    help = (
+        "Export all Hubspot objects of a type to a newline-delimited JSON file. "
+        "Running the same export again resumes it from the last page it saved."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "object_type", help="The Hubspot object type (deals, contacts, etc)."
+        )
+        parser.add_argument("path", help="The file to write to.")
+        parser.add_argument(
+            "--properties",
+            nargs="+",
+            help="The properties to export, defaults to Hubspot's defaults.",
+        )
+        parser.add_argument(
+            "--associations",
+            nargs="+",
+            help="The object types to export associated ids of.",
+        )
+        parser.add_argument(
+            "--export-id",
+            help="An id to save the export's progress under.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Start the export over instead of resuming it.",
+        )
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        """Run the export."""
+        export_id = (
+            options["export_id"] or f"{options['object_type']}:{options['path']}"
+        )
+        if options["restart"]:
+            clear_checkpoint(export_id)
+
+        count = export_objects_to_file(
+            options["object_type"],
+            options["path"],
+            export_id=export_id,
+            properties=options["properties"],
+            associations=options["associations"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {count} {options['object_type']} to {options['path']}"
+            )
+        )
@@ -0,0 +1,280 @@
+"""
+Rate limiting for Hubspot API requests
+
+Hubspot limits each private app to a number of requests per 10 second interval
+(and per day), shared by every process using the app's token. Rather than
+letting celery workers race each other into 429 responses and retry blindly,
+each request made through HubspotApi first takes a slot from a counter in a
+shared Django cache (Redis, in a typical deployment), waiting for the next
+interval when the current one is used up.
+
+The X-HubSpot-RateLimit-* headers on each response are used to pick up the
+app's actual limit, and to pause every worker until the next interval when
+Hubspot reports that none are left. A 429 response pauses every worker for as
+long as Hubspot asks before the request is retried.
+
+https://developers.hubspot.com/docs/api/usage-details
+"""
+
+import hashlib
+import logging
+import math
+import random
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from hubspot.discovery.discovery_base import DiscoveryBase
+from mitol.hubspot_api.exceptions import TooManyRequestsException
+
+log = logging.getLogger()
+
+RATE_LIMIT_CACHE_KEY_PREFIX = "mitol.hubspot_api.ratelimit"
+
+HEADER_MAX = "X-HubSpot-RateLimit-Max"
+HEADER_REMAINING = "X-HubSpot-RateLimit-Remaining"
+HEADER_INTERVAL = "X-HubSpot-RateLimit-Interval-Milliseconds"
+HEADER_DAILY_REMAINING = "X-HubSpot-RateLimit-Daily-Remaining"
+HEADER_RETRY_AFTER = "Retry-After"
+
+
+# Caches that aren't shared between processes, or whose incr() isn't atomic
+UNSHARED_CACHE_BACKENDS = (
+    DatabaseCache,
+    DummyCache,
+    FileBasedCache,
+    LocMemCache,
+)
+
+_unshared_cache_warnings = set()
+
+
+def is_enabled() -> bool:
+    """
+    Return True if rate limiting is turned on and its cache can be shared
+
+    A cache that isn't shared by every process (or that can't count atomically)
+    would quietly turn the limit into a per-process one, so rate limiting is
+    left off with a warning instead.
+    """
+    if not settings.MITOL_HUBSPOT_API_RATE_LIMIT_ENABLED:
+        return False
+
+    cache_name = settings.MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME
+    if isinstance(caches[cache_name], UNSHARED_CACHE_BACKENDS):
+        if cache_name not in _unshared_cache_warnings:
+            _unshared_cache_warnings.add(cache_name)
+            log.warning(
+                "Hubspot API rate limiting is disabled: the %r cache isn't shared"
+                " between processes. Set MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME to"
+                " a Redis or memcached cache.",
+                cache_name,
+            )
+        return False
+
+    return True
+
+
+def _int_header(headers, name: str) -> int | None:
+    """Return the integer value of a response header, or None"""
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    A limit on the number of requests per interval, shared through a Django
+    cache by every process using the same access token
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        *,
+        limit: int,
+        interval: float,
+        max_wait: float,
+        cache_name: str,
+    ):
+        token_hash = hashlib.sha256((access_token or "").encode("utf-8")).hexdigest()
+        self.key_prefix = f"{RATE_LIMIT_CACHE_KEY_PREFIX}:{token_hash[:16]}"
+        self.limit = limit
+        self.interval = interval
+        self.max_wait = max_wait
+        self.cache_name = cache_name
+
+    @classmethod
+    def from_settings(cls, access_token: str) -> "RateLimiter":
+        """Create a rate limiter configured by the MITOL_HUBSPOT_API settings"""
+        return cls(
+            access_token,
+            limit=settings.MITOL_HUBSPOT_API_RATE_LIMIT_REQUESTS,
+            interval=settings.MITOL_HUBSPOT_API_RATE_LIMIT_INTERVAL_MS / 1000,
+            max_wait=settings.MITOL_HUBSPOT_API_RATE_LIMIT_MAX_WAIT_SECONDS,
+            cache_name=settings.MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME,
+        )
+
+    @property
+    def cache(self):
+        return caches[self.cache_name]
+
+    @property
+    def limit_key(self) -> str:
+        return f"{self.key_prefix}:limit"
+
+    @property
+    def paused_key(self) -> str:
+        return f"{self.key_prefix}:paused_until"
+
+    def get_limit(self) -> int:
+        """Return the limit Hubspot last reported, or the configured one"""
+        return self.cache.get(self.limit_key) or self.limit
+
+    def _count_request(self, window: int) -> int:
+        """Count a request against an interval, returning the count so far"""
+        key = f"{self.key_prefix}:{window}"
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # first request of the interval
+            if self.cache.add(key, 1, timeout=math.ceil(self.interval) + 1):
+                return 1
+            return self.cache.incr(key)
+
+    def _seconds_until_next_window(self, now: float) -> float:
+        return (math.floor(now / self.interval) + 1) * self.interval - now
+
+    def try_acquire(self) -> float:
+        """
+        Try to take a request slot
+
+        Returns:
+            float: 0 if a slot was taken, otherwise the seconds to wait for one
+        """
+        now = time.time()
+        paused_until = self.cache.get(self.paused_key)
+
+        if paused_until and paused_until > now:
+            return paused_until - now
+
+        if self._count_request(math.floor(now / self.interval)) <= self.get_limit():
+            return 0
+
+        # spread out the workers that were waiting on the same interval
+        jitter = random.uniform(0, self.interval / 20)  # noqa: S311
+        return self._seconds_until_next_window(now) + jitter
+
+    def acquire(self) -> None:
+        """
+        Wait until a request can be made
+
+        Raises:
+            TooManyRequestsException: if it would take longer than max_wait
+        """
+        deadline = time.monotonic() + self.max_wait
+
+        while wait := self.try_acquire():
+            if time.monotonic() + wait > deadline:
+                msg = f"Hubspot rate limit reached, next request allowed in {wait:.1f}s"
+                raise TooManyRequestsException(
+                    status=HTTPStatus.TOO_MANY_REQUESTS, reason=msg
+                )
+
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop every process from making requests for a number of seconds"""
+        paused_until = time.time() + seconds
+
+        if paused_until > (self.cache.get(self.paused_key) or 0):
+            self.cache.set(
+                self.paused_key, paused_until, timeout=math.ceil(seconds) + 1
+            )
+
+    def update(self, headers) -> None:
+        """Adjust to the rate limit headers on a Hubspot response"""
+        limit = _int_header(headers, HEADER_MAX)
+        interval_ms = _int_header(headers, HEADER_INTERVAL)
+
+        if (
+            limit
+            and interval_ms == round(self.interval * 1000)
+            and limit != self.get_limit()
+        ):
+            log.info("Hubspot rate limit is %d requests per %dms", limit, interval_ms)
+            self.cache.set(self.limit_key, limit, timeout=3600)
+
+        remaining = _int_header(headers, HEADER_REMAINING)
+        if remaining is not None and remaining <= 0:
+            # something else is sharing the token, or our counter is behind
+            self.pause(self._seconds_until_next_window(time.time()))
+
+        if _int_header(headers, HEADER_DAILY_REMAINING) == 0:
+            log.warning("Hubspot daily API request limit reached")
+
+    def backoff(self, headers) -> float:
+        """Pause requests after a 429 response, returning the seconds paused for"""
+        retry_after = _int_header(headers, HEADER_RETRY_AFTER)
+        seconds = retry_after if retry_after is not None else self.interval
+        self.pause(seconds)
+        return seconds
+
+
+class RateLimitedPoolManager:
+    """
+    Wraps the urllib3 PoolManager of a Hubspot API client so that every request
+    waits for the rate limiter, and 429 responses are retried once the limit
+    allows it
+    """
+
+    def __init__(self, pool_manager, limiter: RateLimiter, retries: int):
+        self.pool_manager = pool_manager
+        self.limiter = limiter
+        self.retries = retries
+
+    def request(self, method, url, *args, **kwargs):
+        attempt = 0
+
+        while True:
+            self.limiter.acquire()
+            response = self.pool_manager.request(method, url, *args, **kwargs)
+            self.limiter.update(response.headers)
+
+            if (
+                response.status != HTTPStatus.TOO_MANY_REQUESTS
+                or attempt >= self.retries
+            ):
+                return response
+
+            attempt += 1
+            seconds = self.limiter.backoff(response.headers)
+            log.warning(
+                "Hubspot returned 429 for %s %s, retrying in %ss", method, url, seconds
+            )
+            response.drain_conn()
+
+    def __getattr__(self, name):
+        return getattr(self.pool_manager, name)
+
+
+def rate_limited_api_factory(api_client_package, api_name: str, config: dict):
+    """
+    Build a Hubspot API whose requests go through the shared rate limiter.
+
+    This is passed to the Hubspot client as its api_factory.
+    """
+    api = DiscoveryBase._default_api_factory(api_client_package, api_name, config)  # noqa: SLF001
+    rest_client = api.api_client.rest_client
+    rest_client.pool_manager = RateLimitedPoolManager(
+        rest_client.pool_manager,
+        RateLimiter.from_settings(config.get("access_token")),
+        retries=settings.MITOL_HUBSPOT_API_RETRIES,
+    )
+    return api
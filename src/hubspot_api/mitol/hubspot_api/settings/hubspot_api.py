@@ -2,7 +2,7 @@
 Hubspot settings
 """  # noqa: INP001
 
-from mitol.common.envs import get_int, get_string
+from mitol.common.envs import get_bool, get_int, get_string
 
 MITOL_HUBSPOT_API_PRIVATE_TOKEN = get_string(
     name="MITOL_HUBSPOT_API_PRIVATE_TOKEN",
@@ -19,3 +19,52 @@ MITOL_HUBSPOT_API_RETRIES = get_int(
     default=3,
     description="Number of times to retry failed API requests",
 )
+MITOL_HUBSPOT_API_RATE_LIMIT_ENABLED = get_bool(
+    name="MITOL_HUBSPOT_API_RATE_LIMIT_ENABLED",
+    default=False,
+    description=(
+        "Whether to limit the rate of API requests across all processes. This"
+        " needs MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME to be a cache shared by"
+        " every process with atomic increments (Redis or memcached)."
+    ),
+)
+MITOL_HUBSPOT_API_RATE_LIMIT_REQUESTS = get_int(
+    name="MITOL_HUBSPOT_API_RATE_LIMIT_REQUESTS",
+    default=100,
+    description=(
+        "Number of API requests allowed per interval, until Hubspot reports"
+        " the actual limit in a response"
+    ),
+)
+MITOL_HUBSPOT_API_RATE_LIMIT_INTERVAL_MS = get_int(
+    name="MITOL_HUBSPOT_API_RATE_LIMIT_INTERVAL_MS",
+    default=10000,
+    description="Length of the rate limit interval, in milliseconds",
+)
+MITOL_HUBSPOT_API_RATE_LIMIT_MAX_WAIT_SECONDS = get_int(
+    name="MITOL_HUBSPOT_API_RATE_LIMIT_MAX_WAIT_SECONDS",
+    default=60,
+    description=(
+        "Longest time a request will wait for the rate limit before raising"
+        " TooManyRequestsException"
+    ),
+)
+MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME = get_string(
+    name="MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME",
+    default="default",
+    description=(
+        "The name of the Django cache shared by all processes to track the rate"
+        " limit in. Rate limiting stays off if it's a local memory, file,"
+        " database or dummy cache."
+    ),
+)
+MITOL_HUBSPOT_API_EXPORT_CACHE_NAME = get_string(
+    name="MITOL_HUBSPOT_API_EXPORT_CACHE_NAME",
+    default="default",
+    description="The name of the Django cache to save the progress of exports in",
+)
+MITOL_HUBSPOT_API_EXPORT_CHECKPOINT_SECONDS = get_int(
+    name="MITOL_HUBSPOT_API_EXPORT_CHECKPOINT_SECONDS",
+    default=7 * 24 * 60 * 60,
+    description="Seconds to keep the progress of an unfinished export for",
+)
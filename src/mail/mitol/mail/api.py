@@ -8,19 +8,27 @@ recipients = User.objects.all()[:10]
 
 with get_message_sender(TestMessage) as sender:
     sender.build_and_send_message(user=user)
+
+# or, for a large number of recipients
+with get_message_sender(TestMessage) as sender:
+    for result in sender.build_and_send_messages(
+        (user, {}) for user in recipients.iterator()
+    ):
+        ...
 """
 
 import contextlib
 import logging
-import re
+import multiprocessing
 from collections import namedtuple
-from collections.abc import Generator, Iterable
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from copy import deepcopy
+from itertools import islice
 from os import path
 from typing import Union
 
-import premailer
-from bs4 import BeautifulSoup
+import django
 from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.core.exceptions import ImproperlyConfigured
@@ -28,6 +36,7 @@ from django.core.mail import get_connection as django_get_connection
 from django.core.mail.backends.base import BaseEmailBackend
 from django.template.loader import render_to_string
 from django.utils.module_loading import import_string
+from mitol.mail import rendering
 from mitol.mail.messages import TemplatedMessage
 from toolz import compose, partial
 
@@ -42,9 +51,22 @@ MessageSenderAPI = namedtuple(  # noqa: PYI024
         "send_message",
         "can_email_user",
         "build_and_send_message",
+        "build_and_send_messages",
     ],
 )
 
+BULK_SEND_SENT = "sent"
+BULK_SEND_SKIPPED = "skipped"
+BULK_SEND_FAILED = "failed"
+
+BulkSendResult = namedtuple(  # noqa: PYI024
+    "BulkSendResult", ["recipient", "status", "message_id", "error"]
+)
+
+_BulkRecipient = namedtuple(  # noqa: PYI024
+    "_BulkRecipient", ["recipient", "to", "template_context"]
+)
+
 
 def get_message_classes() -> Iterable[type[TemplatedMessage]]:
     """Get the message classes that are configured"""
@@ -126,37 +148,9 @@ def render_email_templates(template_name: str, context: dict) -> tuple[str, str,
     context.update({"subject": subject_text})
     html_text = render_to_string(path.join(template_name, "body.html"), context)  # noqa: PTH118
 
-    # inline css styles
-    html_text = premailer.transform(html_text)
-
-    # pynliner internally uses bs4, which we can now modify the inlined version into a plaintext version  # noqa: E501
-    # this avoids parsing the body twice in bs4
-    soup = BeautifulSoup(html_text, "html5lib")
-
-    # remove newlines within text tags
-    for text in soup.find_all(
-        ["p", "h1", "h2", "h3", "h4", "h5", "h6", "span", "a", "b", "i"]
-    ):
-        if text.string:  # pragma: no branch
-            text.string = text.string.replace("\n", " ")
-
-    # anchor tags get the value of their href added
-    for link in soup.find_all("a"):
-        link.replace_with("{} ({})".format(link.string, link.attrs["href"]))
-
-    # clear any surviving style and title tags, so their contents don't get printed
-    for style in soup.find_all(["style", "title"]):
-        style.clear()  # clear contents, just removing the tag isn't enough
-
-    fallback_text = soup.get_text().strip()
-    # truncate more than 3 consecutive newlines
-    fallback_text = re.sub(r"\n\s*\n", "\n\n\n", fallback_text)
-    # ltrim the left side of all lines
-    fallback_text = re.sub(
-        r"^([ ]+)([\s\\X])", r"\2", fallback_text, flags=re.MULTILINE
-    )
-    # trim each line
-    fallback_text = "\n".join([line.strip() for line in fallback_text.splitlines()])
+    # inlining css and building the plaintext version are memoized on the html,
+    # so recipients whose html comes out the same don't pay for them again
+    fallback_text, html_text = rendering.render_html_body(html_text)
 
     return subject_text, fallback_text, html_text
 
@@ -257,6 +251,12 @@ def get_message_sender(
             )
 
         build_and_send_message = compose(send_message, _build_message)
+        build_and_send_messages = partial(
+            send_bulk_messages,
+            connection,
+            message_cls,
+            shared_context=shared_context,
+        )
 
         yield MessageSenderAPI(
             connection,
@@ -264,4 +264,218 @@ def get_message_sender(
             send_message,
             can_email_user,
             build_and_send_message,
+            build_and_send_messages,
+        )
+
+
+def _get_render_mp_context():
+    """
+    Get the multiprocessing context to start render workers with.
+
+    Workers are never forked from the calling process, since that can deadlock
+    if it's running other threads (e.g. a threaded web server).
+    """
+    start_method = (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+    return multiprocessing.get_context(start_method)
+
+
+class _InlineExecutor:
+    """An executor that runs everything it's given immediately, in this process"""
+
+    def submit(self, func, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as exc:  # noqa: BLE001
+            future.set_exception(exc)
+        return future
+
+
+@contextlib.contextmanager
+def _get_render_executor(processes: int) -> Generator:
+    """Yield an executor for rendering messages"""
+    if not processes:
+        yield _InlineExecutor()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=_get_render_mp_context(),
+        # workers start from scratch, and can't import this module until Django
+        # is set up
+        initializer=django.setup,
+    ) as executor:
+        yield executor
+
+
+def _prepare_recipients(
+    recipients_and_contexts: Iterable[tuple[Union[str, AbstractBaseUser], dict]],
+    shared_context: dict,
+    *,
+    copy_context: bool,
+) -> Generator[_BulkRecipient, None, None]:
+    """
+    Pair each recipient with the address and template context to send them, or
+    with no context if they can't be emailed.
+    """
+    for recipient_or_user, template_context in recipients_and_contexts:
+        user = (
+            recipient_or_user
+            if isinstance(recipient_or_user, AbstractBaseUser)
+            else None
+        )
+
+        if user is not None and not can_email_user(user):
+            yield _BulkRecipient(recipient_or_user, None, None)
+            continue
+
+        yield _BulkRecipient(
+            recipient_or_user,
+            [safe_format_recipient(recipient_or_user)],
+            {
+                # the pool pickles the context, which copies it already
+                **(deepcopy(shared_context) if copy_context else shared_context),
+                **template_context,
+                "user": user,
+            },
         )
+
+
+def _send_chunk(
+    connection: BaseEmailBackend,
+    message_cls: type[TemplatedMessage],
+    chunk: list[tuple[_BulkRecipient, Future | None]],
+    message_kwargs: dict,
+) -> Generator[BulkSendResult, None, None]:
+    """Build the messages for a chunk of rendered recipients and send them"""
+    results = []
+    messages = []
+
+    for bulk_recipient, future in chunk:
+        if future is None:
+            results.append(
+                BulkSendResult(bulk_recipient.recipient, BULK_SEND_SKIPPED, None, None)
+            )
+            continue
+
+        try:
+            message = message_cls.from_rendered(
+                future.result(),
+                connection=connection,
+                to=bulk_recipient.to,
+                **message_kwargs,
+            )
+        except Exception as exc:
+            log.exception("Error rendering email to %s", bulk_recipient.to)
+            results.append(
+                BulkSendResult(bulk_recipient.recipient, BULK_SEND_FAILED, None, exc)
+            )
+            continue
+
+        messages.append(message)
+        results.append((bulk_recipient, message))
+
+    error = None
+    try:
+        if messages:
+            connection.send_messages(messages)
+    except Exception as exc:
+        log.exception("Error sending a chunk of %d emails", len(messages))
+        error = exc
+
+    for result in results:
+        if isinstance(result, BulkSendResult):
+            yield result
+            continue
+
+        bulk_recipient, message = result
+        status = getattr(message, "anymail_status", None)
+
+        # if the chunk failed part way through, anymail still records a status
+        # for each message that was sent before the failure
+        if error is None or (status is not None and status.status):
+            yield BulkSendResult(
+                bulk_recipient.recipient,
+                BULK_SEND_SENT,
+                getattr(status, "message_id", None),
+                None,
+            )
+        else:
+            yield BulkSendResult(
+                bulk_recipient.recipient, BULK_SEND_FAILED, None, error
+            )
+
+
+def send_bulk_messages(  # noqa: PLR0913
+    connection: BaseEmailBackend,
+    message_cls: type[TemplatedMessage],
+    recipients_and_contexts: Iterable[tuple[Union[str, AbstractBaseUser], dict]],
+    *,
+    shared_context: dict | None = None,
+    chunk_size: int | None = None,
+    processes: int | None = None,
+    **kwargs,
+) -> Iterator[BulkSendResult]:
+    """
+    Render and send a message to each of a number of recipients
+
+    Messages are rendered (in this process, unless a number of processes to
+    render in is given) and sent in chunks with the backend's send_messages()
+    over a single open connection. Recipients are
+    read from the iterable a chunk at a time, so it can be a lazy queryset
+    iterator or generator, and the next chunk renders while the current one
+    is being sent. Users who can't be emailed (per can_email_user) are skipped.
+
+    Args:
+        connection (django.core.mail.backends.base.BaseEmailBackend): the connection to send the messages with
+        message_cls (class): TemplatedMessage subclass
+        recipients_and_contexts (iterable of (str or AbstractBaseUser, dict)): each recipient
+            or user along with the template context for their message
+        shared_context (dict or None): template context shared by every message
+        chunk_size (int or None): how many messages to send at a time, defaults to
+            MITOL_MAIL_BULK_SEND_CHUNK_SIZE
+        processes (int or None): how many processes to render in, defaults to
+            MITOL_MAIL_BULK_RENDER_PROCESSES. 0 (the default) renders in this
+            process. Workers are started with forkserver (or spawn), never forked.
+        **kwargs: extra arguments for each message, e.g. tags
+
+    Yields:
+        BulkSendResult: the result for each recipient, in the order they were given
+    """  # noqa: E501
+    message_cls.validate()
+
+    if chunk_size is None:
+        chunk_size = getattr(settings, "MITOL_MAIL_BULK_SEND_CHUNK_SIZE", 100)
+    if processes is None:
+        processes = getattr(settings, "MITOL_MAIL_BULK_RENDER_PROCESSES", 0)
+
+    bulk_recipients = _prepare_recipients(
+        recipients_and_contexts, shared_context or {}, copy_context=not processes
+    )
+
+    with _get_render_executor(processes) as executor, connection:
+        pending = None
+
+        while bulk_chunk := list(islice(bulk_recipients, max(1, chunk_size))):
+            # start rendering this chunk before sending the previous one
+            chunk = [
+                (
+                    bulk_recipient,
+                    executor.submit(message_cls.render, bulk_recipient.template_context)
+                    if bulk_recipient.template_context is not None
+                    else None,
+                )
+                for bulk_recipient in bulk_chunk
+            ]
+
+            if pending is not None:
+                yield from _send_chunk(connection, message_cls, pending, kwargs)
+
+            pending = chunk
+
+        if pending is not None:
+            yield from _send_chunk(connection, message_cls, pending, kwargs)
@@ -0,0 +1,122 @@
+"""
+Measures how long it takes to render a batch of messages, with and without
+the rendering caches.
+"""  # noqa: INP001
+
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.management import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from mitol.mail import rendering
+from mitol.mail.api import get_message_classes
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks rendering messages.
+    """
+
+    help = "Benchmarks rendering a batch of messages with and without caching."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--message-class",
+            default=None,
+            help=(
+                "The message class to render. Defaults to the first of "
+                "MITOL_MAIL_MESSAGE_CLASSES."
+            ),
+        )
+
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=10000,
+            help="The number of messages to render with the caches.",
+        )
+
+        parser.add_argument(
+            "--uncached-count",
+            type=int,
+            default=100,
+            help=(
+                "The number of messages to render without the caches. This is "
+                "much slower, so fewer are rendered by default."
+            ),
+        )
+
+        parser.add_argument(
+            "--distinct-recipients",
+            type=int,
+            default=100,
+            help="The number of distinct recipient names to cycle through.",
+        )
+
+    def _get_message_class(self, message_class):
+        if message_class:
+            return import_string(message_class)
+
+        classes = get_message_classes()
+        if not classes:
+            raise CommandError(  # noqa: TRY003
+                "No message class given and MITOL_MAIL_MESSAGE_CLASSES is empty"  # noqa: EM101
+            )
+
+        return classes[0]
+
+    def _time(self, message_cls, count, distinct_recipients, *, cached):
+        """Render count messages, returning the latencies in ms"""
+        timings = []
+
+        for position in range(count):
+            user = SimpleNamespace(
+                first_name=f"Recipient {position % distinct_recipients}"
+            )
+
+            started = time.perf_counter()
+            if not cached:
+                rendering.clear_render_caches()
+            message_cls.create(
+                to=[f"recipient{position}@localhost"],
+                template_context={"user": user},
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return timings
+
+    def _report(self, name, timings):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {len(timings)} messages in {sum(timings) / 1000:.2f}s, "
+                f"mean {statistics.mean(timings):.3f}ms, "
+                f"median {statistics.median(timings):.3f}ms"
+            )
+        )
+
+    def handle(self, *args, **kwargs):  # noqa: ARG002
+        message_cls = self._get_message_class(kwargs["message_class"])
+        distinct_recipients = max(1, kwargs["distinct_recipients"])
+
+        self.stdout.write(
+            f"Rendering {message_cls.__name__} for {distinct_recipients} "
+            "distinct recipients"
+        )
+
+        if kwargs["uncached_count"] > 0:
+            self._report(
+                "uncached",
+                self._time(
+                    message_cls,
+                    kwargs["uncached_count"],
+                    distinct_recipients,
+                    cached=False,
+                ),
+            )
+
+        rendering.clear_render_caches()
+        self._report(
+            "cached",
+            self._time(message_cls, kwargs["count"], distinct_recipients, cached=True),
+        )
@@ -39,23 +39,59 @@ class TemplatedMessage(AnymailMessage):
         return api.render_email_templates(cls.template_name, template_context)
 
     @classmethod
-    def create(cls, **kwargs) -> "TemplatedMessage":
-        """Factory method for an instance of this message, rendering the template to html and plaintext"""  # noqa: E501, D401
-
+    def validate(cls):
+        """Check that the subclass is set up properly"""
         if not getattr(cls, "template_name", None):
             raise ValueError(f"{cls.__name__}.template_name not defined")  # noqa: EM102, TRY003
 
         if not getattr(cls, "name", None):
             raise ValueError(f"{cls.__name__}.name not defined")  # noqa: EM102, TRY003
 
+    @classmethod
+    def render(cls, template_context: dict) -> tuple[str, str, str]:
+        """
+        Render the email's templates with the base template context
+
+        Args:
+            template_context (dict): context data for the email, in addition to the
+                base template context
+
+        Returns:
+            (str, str, str): tuple of the subject, text_body and html_body
+        """
+        return cls.render_templates(
+            {
+                **cls.get_base_template_context(),
+                **template_context,
+            }
+        )
+
+    @classmethod
+    def create(cls, **kwargs) -> "TemplatedMessage":
+        """Factory method for an instance of this message, rendering the template to html and plaintext"""  # noqa: E501, D401
+        cls.validate()
+
+        rendered = cls.render(kwargs.pop("template_context", {}))
+
+        return cls.from_rendered(rendered, **kwargs)
+
+    @classmethod
+    def from_rendered(
+        cls, rendered: tuple[str, str, str], **kwargs
+    ) -> "TemplatedMessage":
+        """
+        Factory method for an instance of this message from templates rendered with render()
+
+        Args:
+            rendered ((str, str, str)): tuple of the subject, text_body and html_body
+
+        Returns:
+            TemplatedMessage: the email message
+        """  # noqa: E501, D401
         from_email = kwargs.pop("from_email", settings.MITOL_MAIL_FROM_EMAIL)
         headers = {**cls.get_default_headers(), **kwargs.pop("headers", {})}
 
-        template_context = {
-            **cls.get_base_template_context(),
-            **kwargs.pop("template_context", {}),
-        }
-        subject, text_body, html_body = cls.render_templates(template_context)
+        subject, text_body, html_body = rendered
         alternatives = [(html_body, "text/html")]
 
         return cls(
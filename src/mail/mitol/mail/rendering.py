@@ -0,0 +1,167 @@
+"""
+Email html post-processing: CSS inlining and the plaintext fallback.
+
+Inlining CSS and building the plaintext version of a message are by far the
+most expensive steps in rendering it, and when a message goes out to many
+recipients the html they start from is often identical, or differs only in a
+few places. So:
+
+- stylesheets linked from a template are downloaded once per process rather
+  than once per message, and premailer's parsed style rules are reused between
+  messages
+- the inlined html and plaintext are memoized by a hash of the html they were
+  built from, so recipients whose html comes out the same skip both steps
+"""
+
+import hashlib
+import math
+import re
+
+import premailer
+from bs4 import BeautifulSoup
+from django.conf import settings
+from mitol.common.utils.cache import TTLCache
+
+_caches: dict[str, TTLCache] = {}
+
+
+def _get_cache(name: str, maxsize: int, ttl: float) -> TTLCache:
+    """Return a process-local cache, creating it on first use"""
+    if name not in _caches:
+        _caches[name] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    return _caches[name]
+
+
+def get_render_cache() -> TTLCache:
+    """Return the cache of inlined html and plaintext, by html hash"""
+    return _get_cache(
+        "render",
+        maxsize=getattr(settings, "MITOL_MAIL_RENDER_CACHE_SIZE", 256),
+        ttl=math.inf,
+    )
+
+
+def get_style_rules_cache() -> TTLCache:
+    """Return the cache of premailer's parsed style rules, by stylesheet"""
+    return _get_cache("style_rules", maxsize=256, ttl=math.inf)
+
+
+def get_stylesheet_cache() -> TTLCache:
+    """Return the cache of downloaded stylesheets, by url"""
+    return _get_cache(
+        "stylesheets",
+        maxsize=64,
+        ttl=getattr(settings, "MITOL_MAIL_STYLESHEET_CACHE_SECONDS", 3600),
+    )
+
+
+def clear_render_caches() -> None:
+    """Discard all of the process-local rendering caches"""
+    _caches.clear()
+
+
+class CachingPremailer(premailer.Premailer):
+    """
+    A Premailer that shares downloaded stylesheets and parsed style rules
+    between instances.
+
+    The cached rules are only valid for the options they were parsed with, so
+    this should only be used with premailer's default options.
+    """
+
+    def _load_external_url(self, url):
+        cache = get_stylesheet_cache()
+        css_body = cache.get(url)
+
+        if css_body is None:
+            css_body = super()._load_external_url(url)
+            cache.set(url, css_body)
+
+        return css_body
+
+    def _parse_style_rules(self, css_body, ruleset_index):
+        cache = get_style_rules_cache()
+        key = (css_body, ruleset_index)
+        parsed = cache.get(key)
+
+        if parsed is None:
+            parsed = super()._parse_style_rules(css_body, ruleset_index)
+            cache.set(key, parsed)
+
+        rules, leftover = parsed
+        # copied so premailer can't change the cached value
+        return list(rules), list(leftover)
+
+
+def inline_css(html_text: str) -> str:
+    """
+    Move the css in an html document's stylesheets into style attributes
+
+    Args:
+        html_text (str): the html document
+
+    Returns:
+        str: the html with its css inlined
+    """
+    return CachingPremailer(html_text).transform(pretty_print=False)
+
+
+def html_to_text(html_text: str) -> str:
+    """
+    Convert an html email body to plaintext
+
+    Args:
+        html_text (str): the html email body
+
+    Returns:
+        str: the plaintext version of the body
+    """
+    soup = BeautifulSoup(html_text, "html5lib")
+
+    # remove newlines within text tags
+    for text in soup.find_all(
+        ["p", "h1", "h2", "h3", "h4", "h5", "h6", "span", "a", "b", "i"]
+    ):
+        if text.string:  # pragma: no branch
+            text.string = text.string.replace("\n", " ")
+
+    # anchor tags get the value of their href added
+    for link in soup.find_all("a"):
+        link.replace_with("{} ({})".format(link.string, link.attrs["href"]))
+
+    # clear any surviving style and title tags, so their contents don't get printed
+    for style in soup.find_all(["style", "title"]):
+        style.clear()  # clear contents, just removing the tag isn't enough
+
+    fallback_text = soup.get_text().strip()
+    # truncate more than 3 consecutive newlines
+    fallback_text = re.sub(r"\n\s*\n", "\n\n\n", fallback_text)
+    # ltrim the left side of all lines
+    fallback_text = re.sub(
+        r"^([ ]+)([\s\\X])", r"\2", fallback_text, flags=re.MULTILINE
+    )
+    # trim each line
+    return "\n".join([line.strip() for line in fallback_text.splitlines()])
+
+
+def render_html_body(html_text: str) -> tuple[str, str]:
+    """
+    Inline the css of a rendered html email body and build its plaintext version
+
+    Args:
+        html_text (str): the html email body, as rendered from its template
+
+    Returns:
+        (str, str): tuple of the plaintext body and the inlined html body
+    """
+    cache = get_render_cache()
+    key = hashlib.sha256(html_text.encode("utf-8")).hexdigest()
+    rendered = cache.get(key)
+
+    if rendered is None:
+        inlined_html = inline_css(html_text)
+        rendered = (html_to_text(inlined_html), inlined_html)
+        cache.set(key, rendered)
+
+    return rendered
@@ -1,15 +1,27 @@
-"""MIT Open feature flags"""
-
+"""
+MIT Open feature flags
+
+Flag values are cached in two tiers: a small process-local cache in front of
+the durable cache, so repeated checks within a process don't each cost a round
+trip to the durable cache. Flags that aren't cached are evaluated from the
+definitions the PostHog client polls in the background where possible, and the
+PostHog API is only called for the rest. With POSTHOG_LOCAL_EVALUATION_ONLY,
+the durable cache and PostHog API aren't used at all.
+"""
+
+import functools
 import hashlib
 import json
 import logging
 import time
 from contextlib import contextmanager
+from contextvars import ContextVar
 
 import posthog
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import caches
+from mitol.common.utils.cache import TTLCache
 
 log = logging.getLogger()
 User = get_user_model()
@@ -17,6 +29,11 @@ durable_cache = caches["durable"]
 
 CIRCUIT_BREAKER_CACHE_KEY = "posthog_circuit_open"
 
+_flag_cache: TTLCache | None = None
+_context_flags: ContextVar[dict | None] = ContextVar(
+    "olposthog_context_flags", default=None
+)
+
 
 def _is_circuit_open() -> bool:
     return durable_cache.get(CIRCUIT_BREAKER_CACHE_KEY) is not None
@@ -94,48 +111,262 @@ def _generate_cache_key(key: str, unique_id: str, person_properties: dict) -> st
     Append the flag key to this to store the value in the cache.
     """
 
-    return "{}_{}".format(
-        str(
-            hashlib.sha256(
-                json.dumps((unique_id, person_properties)).encode("utf-8")
-            ).hexdigest()
-        ),
-        key,
-    )
+    identity = json.dumps((unique_id, person_properties))
+
+    return f"{_hash_identity(identity)}_{key}"
+
+
+@functools.lru_cache(maxsize=1024)
+def _hash_identity(identity: str) -> str:
+    """Hash a serialized unique_id and person_properties pair"""
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def get_flag_cache() -> TTLCache:
+    """Return the process-local cache of flag values"""
+    global _flag_cache  # noqa: PLW0603
+
+    if _flag_cache is None:
+        _flag_cache = TTLCache(
+            maxsize=settings.POSTHOG_FLAG_CACHE_SIZE,
+            ttl=settings.POSTHOG_FLAG_CACHE_TTL_SECONDS,
+        )
+
+    return _flag_cache
+
+
+def clear_flag_cache():
+    """Discard the process-local cache of flag values"""
+    global _flag_cache  # noqa: PLW0603
+
+    _flag_cache = None
+
+
+def _is_local_evaluation_only() -> bool:
+    return getattr(settings, "POSTHOG_LOCAL_EVALUATION_ONLY", False)
+
+
+def _get_cached_flags(cache_keys: list[str]) -> dict:
+    """
+    Return the cached values for any of cache_keys, checking the process-local
+    cache first and then the durable cache for whatever is left.
+    """
+    flag_cache = get_flag_cache()
+    values = flag_cache.get_many(cache_keys)
+    missing = [cache_key for cache_key in cache_keys if cache_key not in values]
+
+    if missing and not _is_local_evaluation_only():
+        durable_values = {
+            cache_key: value
+            for cache_key, value in durable_cache.get_many(missing).items()
+            if value is not None
+        }
+        flag_cache.set_many(durable_values)
+        values.update(durable_values)
+
+    return values
+
+
+def _cache_flags(values: dict):
+    """Cache flag values, keyed by cache key, in both tiers"""
+    if not values:
+        return
+
+    get_flag_cache().set_many(values)
+
+    if not _is_local_evaluation_only():
+        durable_cache.set_many(values)
+
+
+def _fallback_value(name: str, default: bool | None) -> bool:  # noqa: FBT001
+    return settings.FEATURES.get(name, default or False)
 
 
 def get_all_feature_flags(opt_unique_id: str | None = None):
     """
     Get the set of all feature flags
     """
-    if _is_circuit_open():
-        log.debug("PostHog circuit open, skipping get_all_feature_flags")
+    unique_id = opt_unique_id or default_unique_id()
+    person_properties = _get_person_properties(unique_id)
+
+    flag_data = _fetch_flags(None, unique_id, person_properties)
+
+    if not flag_data:
         return {}
 
+    _cache_flags(
+        {
+            _generate_cache_key(k, unique_id, person_properties): v
+            for k, v in flag_data.items()
+        }
+    )
+
+    return flag_data
+
+
+@contextmanager
+def feature_flag_context():
+    """
+    Keep feature flags in memory for the duration of a request or task.
+
+    Within the context, the first flag check for a unique_id fetches all of
+    that person's flags at once with get_all_feature_flags(), and any later
+    checks for them are answered from memory. This can also be used to decorate
+    a task function.
+    """
+    token = _context_flags.set({})
+    try:
+        yield
+    finally:
+        _context_flags.reset(token)
+
+
+def _get_context_flags(unique_id: str) -> dict | None:
+    """
+    Return all flags for unique_id if inside a feature_flag_context(), fetching
+    them on first use. Returns None outside of a context, or if the flags
+    couldn't be fetched.
+    """
+    flags_by_unique_id = _context_flags.get()
+
+    if flags_by_unique_id is None:
+        return None
+
+    if unique_id not in flags_by_unique_id:
+        flags_by_unique_id[unique_id] = (
+            get_all_feature_flags(unique_id)
+            if getattr(settings, "POSTHOG_ENABLED", False)
+            else {}
+        )
+
+    return flags_by_unique_id[unique_id] or None
+
+
+def get_feature_flags(
+    names: list[str],
+    default: bool | None = None,  # noqa: FBT001
+    opt_unique_id: str | None = None,
+) -> dict:
+    """
+    Return the values of several feature flags at once.
+
+    Cached values are read in one batch from each cache tier, and any flags that
+    aren't cached are fetched from PostHog in a single call.
+
+    Args:
+        names (list of str): feature flag names
+        default (bool): default value for flags that aren't set in settings
+        opt_unique_id (str): person identifier, see is_enabled()
+
+    Returns:
+        dict: the value of each flag, by name
+    """
     unique_id = opt_unique_id or default_unique_id()
+
+    context_flags = _get_context_flags(unique_id)
+    if context_flags is not None:
+        return {
+            name: context_flags.get(name, _fallback_value(name, default))
+            for name in names
+        }
+
     person_properties = _get_person_properties(unique_id)
 
+    cache_keys = {
+        name: _generate_cache_key(name, unique_id, person_properties) for name in names
+    }
+    cached = _get_cached_flags(list(cache_keys.values()))
+    flags = {
+        name: cached[cache_key]
+        for name, cache_key in cache_keys.items()
+        if cache_key in cached
+    }
+    missing = [name for name in names if name not in flags]
+
+    if missing and getattr(settings, "POSTHOG_ENABLED", False):
+        fetched = _fetch_flags(missing, unique_id, person_properties)
+        _cache_flags({cache_keys[name]: value for name, value in fetched.items()})
+        flags.update(fetched)
+
+    return {name: flags.get(name, _fallback_value(name, default)) for name in names}
+
+
+def _fetch_flags(
+    names: list[str] | None, unique_id: str, person_properties: dict
+) -> dict:
+    """
+    Get the values of the named flags, or of all flags if names is None,
+    omitting any that couldn't be determined.
+
+    Flags are evaluated from the definitions the PostHog client has polled
+    first, and only the ones that can't be evaluated locally are requested from
+    the PostHog API. With POSTHOG_LOCAL_EVALUATION_ONLY, the API is never called.
+    """
+    flags = _get_all_flags(
+        names, unique_id, person_properties, only_evaluate_locally=True
+    )
+
+    if _is_local_evaluation_only():
+        return flags
+
+    if names is None:
+        names = _get_flag_definition_keys()
+
+    if names is not None:
+        names = [name for name in names if name not in flags]
+        if not names:
+            return flags
+
+    if _is_circuit_open():
+        log.debug("PostHog circuit open, skipping get_all_flags")
+        return flags
+
+    with _circuit_breaker_watch():
+        flags.update(
+            _get_all_flags(
+                names, unique_id, person_properties, only_evaluate_locally=False
+            )
+        )
+
+    return flags
+
+
+def _get_flag_definition_keys() -> list[str] | None:
+    """
+    Return the keys of the flag definitions the PostHog client has polled, or
+    None if it doesn't have any.
+    """
+    definitions = getattr(posthog.default_client, "feature_flags", None)
+
+    return [definition["key"] for definition in definitions] if definitions else None
+
+
+def _get_all_flags(
+    names: list[str] | None,
+    unique_id: str,
+    person_properties: dict,
+    *,
+    only_evaluate_locally: bool,
+) -> dict:
+    """Call posthog.get_all_flags(), omitting flags that weren't requested or set"""
     # The PostHog SDK catches errors internally and returns None/{}; an exception
     # here would be highly unexpected, but we guard anyway.
     try:
-        with _circuit_breaker_watch():
-            flag_data = posthog.get_all_flags(
-                unique_id,
-                person_properties=person_properties,
-            )
+        flag_data = posthog.get_all_flags(
+            unique_id,
+            person_properties=person_properties,
+            only_evaluate_locally=only_evaluate_locally,
+            flag_keys_to_evaluate=names,
+        )
     except Exception:
         log.exception("PostHog get_all_flags raised unexpectedly")
         return {}
 
-    if not flag_data:
-        return {}
-
-    [
-        durable_cache.set(_generate_cache_key(k, unique_id, person_properties), v)
-        for k, v in flag_data.items()
-    ]
-
-    return flag_data
+    return {
+        name: value
+        for name, value in (flag_data or {}).items()
+        if (names is None or name in names) and value is not None
+    }
 
 
 def is_enabled(
@@ -160,18 +391,38 @@ def is_enabled(
         bool: True if the feature flag is enabled
     """
     unique_id = opt_unique_id or default_unique_id()
+
+    context_flags = _get_context_flags(unique_id)
+    if context_flags is not None:
+        log.debug("Retrieved %s from the flag context", name)
+        return context_flags.get(name, _fallback_value(name, default))
+
     person_properties = _get_person_properties(unique_id)
 
     cache_key = _generate_cache_key(name, unique_id, person_properties)
-    cached_value = durable_cache.get(cache_key)
+    cached_value = _get_cached_flags([cache_key]).get(cache_key)
 
     if cached_value is not None:
         log.debug("Retrieved %s from the cache", name)
         return cached_value
 
+    if _is_local_evaluation_only():
+        return _evaluate_locally(name, default, unique_id, person_properties, cache_key)
+
+    return _evaluate_remotely(name, default, unique_id, person_properties, cache_key)
+
+
+def _evaluate_remotely(
+    name: str,
+    default: bool | None,  # noqa: FBT001
+    unique_id: str,
+    person_properties: dict,
+    cache_key: str,
+) -> bool:
+    """Get a flag's value from the PostHog API and cache it"""
     if _is_circuit_open():
         log.debug("PostHog circuit open, skipping %s", name)
-        return settings.FEATURES.get(name, default or False)
+        return _fallback_value(name, default)
 
     log.debug("Retrieving %s from Posthog", name)
 
@@ -191,10 +442,46 @@ def is_enabled(
             )
     except Exception:
         log.exception("PostHog get_feature_flag raised unexpectedly")
-        return settings.FEATURES.get(name, default or False)
+        return _fallback_value(name, default)
+
+    if value is None:
+        return _fallback_value(name, default)
+
+    _cache_flags({cache_key: value})
+    return value
+
+
+def _evaluate_locally(
+    name: str,
+    default: bool | None,  # noqa: FBT001
+    unique_id: str,
+    person_properties: dict,
+    cache_key: str,
+) -> bool:
+    """
+    Evaluate a flag against the definitions the PostHog client has polled.
+    Flags that can't be evaluated locally fall back to settings.FEATURES rather
+    than going to the PostHog API.
+    """
+    log.debug("Evaluating %s locally", name)
+
+    try:
+        value = (
+            posthog.get_feature_flag(
+                name,
+                unique_id,
+                person_properties=person_properties,
+                only_evaluate_locally=True,
+            )
+            if getattr(settings, "POSTHOG_ENABLED", False)
+            else None
+        )
+    except Exception:
+        log.exception("PostHog get_feature_flag raised unexpectedly")
+        return _fallback_value(name, default)
 
     if value is None:
-        return settings.FEATURES.get(name, default or False)
+        return _fallback_value(name, default)
 
-    durable_cache.set(cache_key, value)
+    get_flag_cache().set(cache_key, value)
     return value
@@ -0,0 +1,32 @@
+"""Middleware for olposthog"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from mitol.olposthog.features import feature_flag_context
+
+
+class FeatureFlagContextMiddleware:
+    """
+    Run each request in a feature_flag_context(), so all of the flags it
+    checks for a person are evaluated at once and then served from memory.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with feature_flag_context():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with feature_flag_context():
+            return await self.get_response(request)
@@ -57,3 +57,28 @@ POSTHOG_CIRCUIT_BREAKER_TRIP_THRESHOLD_SECONDS = get_int(
     default=6,
     description="Seconds a PostHog request can take before the circuit breaker trips.",
 )
+
+POSTHOG_FLAG_CACHE_SIZE = get_int(
+    name="POSTHOG_FLAG_CACHE_SIZE",
+    default=1000,
+    description=(
+        "Maximum number of flag values to cache in each process, in front of the"
+        " durable cache. Set to 0 to disable the process-local cache."
+    ),
+)
+
+POSTHOG_FLAG_CACHE_TTL_SECONDS = get_int(
+    name="POSTHOG_FLAG_CACHE_TTL_SECONDS",
+    default=30,
+    description="Seconds a flag value stays in the process-local cache.",
+)
+
+POSTHOG_LOCAL_EVALUATION_ONLY = get_bool(
+    name="POSTHOG_LOCAL_EVALUATION_ONLY",
+    default=False,
+    description=(
+        "Evaluate flags only from the flag definitions polled by the PostHog"
+        " client, without using the durable cache or making per-flag API calls."
+        " Requires POSTHOG_PERSONAL_API_KEY."
+    ),
+)
@@ -47,6 +47,11 @@ class UserAdapter(SCIMUser):
         ("schemas", None, None),
     }
 
+    # the fields to_dict() needs, if list and search responses should only load
+    # those. Subclasses that set this must include every field their to_dict()
+    # reads, or each row will be loaded again when it's read.
+    list_fields: tuple[str, ...] | None = None
+
     def __init__(self, obj, request=None, *, lock_user: bool = True):
         super().__init__(obj, request=request)
         if lock_user and self.obj.pk is not None:
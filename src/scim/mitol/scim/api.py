@@ -1,6 +1,10 @@
 import http
 import logging
-from collections.abc import Generator
+import threading
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Any
 from urllib.parse import urlsplit
@@ -88,7 +92,9 @@ def get_session() -> OAuth2Session:
     return OAuth2Session(token=token)
 
 
-def sync_users_to_scim_remote(users: list["User"]) -> StateGenerator:
+def sync_users_to_scim_remote(
+    users: list["User"], concurrency: int | None = None
+) -> StateGenerator:
     """Sync a set of users to the scim remote.
 
     Yields ``UserState`` results as they become available instead of
@@ -98,15 +104,213 @@ def sync_users_to_scim_remote(users: list["User"]) -> StateGenerator:
     generator: it does nothing until iterated. A caller that needs a
     concrete list (e.g. to report a count) should wrap a single, bounded
     call in ``list(...)`` itself.
+
+    If ``concurrency`` (default ``MITOL_SCIM_KEYCLOAK_SYNC_CONCURRENCY``) is
+    greater than 1, up to that many search and bulk requests are in flight at
+    once, on a thread pool. Results are still yielded in order as they're
+    consumed, so memory stays bounded by the number of in-flight requests.
+    """
+    if concurrency is None:
+        concurrency = settings.MITOL_SCIM_KEYCLOAK_SYNC_CONCURRENCY
+
+    with get_session() as session:
+        if concurrency > 1:
+            with _worker_pool(session, concurrency) as (executor, get_worker_session):
+                yield from _save_states(
+                    _sync_users_concurrently(
+                        executor, get_worker_session, users, concurrency
+                    )
+                )
+        else:
+            found_users = _user_search_by_email(session, users)
+            state_or_operations = _get_sync_operations(users, found_users)
+            yield from _save_states(
+                _perform_sync_operations(session, state_or_operations)
+            )
+
+
+def update_users_in_scim_remote(
+    users: Iterable["User"], concurrency: int | None = None
+) -> StateGenerator:
+    """Push the current data for users that already exist in the scim remote.
+
+    Unlike ``sync_users_to_scim_remote``, this doesn't search for the users
+    first: each user is sent as a bulk ``PUT`` to its existing external id, so
+    every user passed in must already have been synced. Like
+    ``sync_users_to_scim_remote``, this is a generator and does nothing until
+    iterated.
     """
+    if concurrency is None:
+        concurrency = settings.MITOL_SCIM_KEYCLOAK_SYNC_CONCURRENCY
+
     with get_session() as session:
-        found_users = _user_search_by_email(session, users)
-        state_or_operations = _get_sync_operations(users, found_users)
-        states = _perform_sync_operations(session, state_or_operations)
-        batch_size = settings.MITOL_SCIM_KEYCLOAK_BULK_OPERATIONS_COUNT
-        for batch in chunked(states, batch_size):
-            _update_users(batch)
-            yield from batch
+        operations = _get_update_operations(users)
+
+        if concurrency > 1:
+            with _worker_pool(session, concurrency) as (executor, get_worker_session):
+                yield from _save_states(
+                    _perform_sync_operations_concurrently(
+                        executor,
+                        lambda chunk: _post_bulk_operations(
+                            get_worker_session(), chunk
+                        ),
+                        operations,
+                        concurrency,
+                    )
+                )
+        else:
+            yield from _save_states(_perform_sync_operations(session, operations))
+
+
+def sync_changed_users_to_scim_remote(
+    users: Iterable["User"], concurrency: int | None = None
+) -> StateGenerator:
+    """Sync users whose data has changed since they were last synced.
+
+    Users that already exist in the scim remote are updated in place with
+    ``update_users_in_scim_remote``; the rest go through the same search and
+    create process as ``sync_users_to_scim_remote``.
+    """
+    users_to_create, users_to_update = partition(
+        lambda user: bool(user.scim_external_id), users
+    )
+
+    yield from sync_users_to_scim_remote(list(users_to_create), concurrency)
+    yield from update_users_in_scim_remote(list(users_to_update), concurrency)
+
+
+def _save_states(states: StateGenerator) -> StateGenerator:
+    """Store the scim ids for successful states, in batches, as they're yielded"""
+    for batch in chunked(states, settings.MITOL_SCIM_KEYCLOAK_BULK_OPERATIONS_COUNT):
+        _update_users(batch)
+        yield from batch
+
+
+@contextmanager
+def _worker_pool(
+    session: OAuth2Session, concurrency: int
+) -> Iterator[tuple[Executor, Callable[[], OAuth2Session]]]:
+    """
+    Provide a thread pool for sending requests, along with a function that
+    returns the current worker thread's session.
+
+    requests sessions aren't guaranteed to be thread-safe, so each worker gets
+    its own, reusing the token fetched for the parent session.
+    """
+    thread_sessions = threading.local()
+    sessions = []
+
+    def _get_worker_session() -> OAuth2Session:
+        if not hasattr(thread_sessions, "session"):
+            thread_sessions.session = OAuth2Session(token=session.token)
+            sessions.append(thread_sessions.session)
+        return thread_sessions.session
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            yield executor, _get_worker_session
+    finally:
+        for worker_session in sessions:
+            worker_session.close()
+
+
+def _sync_users_concurrently(
+    executor: Executor,
+    get_worker_session: Callable[[], OAuth2Session],
+    users: list["User"],
+    concurrency: int,
+) -> StateGenerator:
+    """
+    Sync users with up to ``concurrency`` requests in flight at once.
+
+    Each search batch only contains its own users, so the users a batch didn't
+    find can be queued for creation as soon as that batch returns, while later
+    searches are still running. Only HTTP requests run on the worker threads;
+    all database access stays on the calling thread.
+    """
+
+    def _search(users_batch: list["User"]) -> list[UserState]:
+        return list(_user_search_by_email_batch(get_worker_session(), users_batch))
+
+    def _bulk(operations: list[UserOperation]) -> list[UserState]:
+        return _post_bulk_operations(get_worker_session(), operations)
+
+    searches = _bounded_map(
+        executor,
+        _search,
+        chunked(users, settings.MITOL_SCIM_KEYCLOAK_SEARCH_BATCH_SIZE),
+        concurrency,
+    )
+
+    state_or_operations = (
+        state_or_operation
+        for users_batch, found_users in searches
+        for state_or_operation in _get_sync_operations(users_batch, found_users)
+    )
+
+    yield from _perform_sync_operations_concurrently(
+        executor, _bulk, state_or_operations, concurrency
+    )
+
+
+def _perform_sync_operations_concurrently(
+    executor: Executor,
+    bulk_func: Callable[[list[UserOperation]], list[UserState]],
+    generator: StateOrOperationGenerator,
+    concurrency: int,
+) -> StateGenerator:
+    """
+    Yield the states in ``generator`` as they arrive, while sending its
+    operations to ``bulk_func`` in chunks with up to ``concurrency`` chunks in
+    flight.
+    """
+    pending: deque[Future] = deque()
+    operations = []
+
+    for state_or_operation in generator:
+        if isinstance(state_or_operation, UserState):
+            yield state_or_operation
+            continue
+
+        operations.append(state_or_operation)
+
+        if len(operations) == settings.MITOL_SCIM_KEYCLOAK_BULK_OPERATIONS_COUNT:
+            while len(pending) >= concurrency:
+                yield from pending.popleft().result()
+
+            pending.append(executor.submit(bulk_func, operations))
+            operations = []
+
+    if operations:
+        pending.append(executor.submit(bulk_func, operations))
+
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _bounded_map(
+    executor: Executor,
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_in_flight: int,
+) -> Iterator[tuple[Any, Any]]:
+    """
+    Like ``executor.map``, but only consumes ``items`` as results are consumed,
+    so at most ``max_in_flight`` calls are pending at any time. Yields
+    ``(item, result)`` pairs in the order of ``items``.
+    """
+    pending: deque[tuple[Any, Future]] = deque()
+
+    for item in items:
+        if len(pending) >= max_in_flight:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+
+        pending.append((item, executor.submit(func, item)))
+
+    while pending:
+        done_item, future = pending.popleft()
+        yield done_item, future.result()
 
 
 def _user_search_by_email(
@@ -219,6 +423,26 @@ def _get_sync_operations(
         )
 
 
+def _get_update_operations(users: Iterable["User"]) -> StateOrOperationGenerator:
+    """Generate bulk PUT operations for users that exist in the remote"""
+    for user in users:
+        bulk_id = str(user.id)
+        adapter = UserAdapter(user, InMemoryHttpRequest.stub(), lock_user=False)
+        yield UserOperation(
+            user,
+            bulk_id,
+            {
+                "method": "PUT",
+                "path": f"/Users/{user.scim_external_id}",
+                "bulkId": bulk_id,
+                "data": {
+                    **adapter.to_dict(),
+                    "emailVerified": True,
+                },
+            },
+        )
+
+
 def _perform_sync_operations(
     session: OAuth2Session,
     generator: StateOrOperationGenerator,
@@ -233,55 +457,73 @@ def _perform_sync_operations(
         sync_operations,
         settings.MITOL_SCIM_KEYCLOAK_BULK_OPERATIONS_COUNT,
     ):
-        operations = []
-        users_by_bulk_id: dict[int, User] = {}
-
-        for state_or_operation in chunk:
-            operations.append(state_or_operation.operation)
-            users_by_bulk_id[state_or_operation.bulk_id] = state_or_operation.user
-
-        if len(operations) == 0:
+        if len(chunk) == 0:
             # skip to the next chunk because this one had no operations
             # NOTE: this is not an indication we're at the end of chunks
             continue
 
-        response = session.post(
-            scim_api_url("/Users/Bulk"),
-            json={
-                "schemas": [SchemaURI.BULK_REQUEST],
-                "Operations": operations,
-            },
-            timeout=settings.MITOL_SCIM_REQUESTS_TIMEOUT_SECONDS,
-        )
+        yield from _post_bulk_operations(session, chunk)
 
-        if response.status_code != http.HTTPStatus.OK:
-            log.error("Error response: %s", response.json())
 
-        response.raise_for_status()
+def _post_bulk_operations(
+    session: OAuth2Session, chunk: list[UserOperation]
+) -> list[UserState]:
+    """Send a single bulk request for a chunk of operations"""
+    operations_by_bulk_id: dict[str, UserOperation] = {
+        user_operation.bulk_id: user_operation for user_operation in chunk
+    }
+    operations = [user_operation.operation for user_operation in chunk]
+
+    response = session.post(
+        scim_api_url("/Users/Bulk"),
+        json={
+            "schemas": [SchemaURI.BULK_REQUEST],
+            "Operations": operations,
+        },
+        timeout=settings.MITOL_SCIM_REQUESTS_TIMEOUT_SECONDS,
+    )
 
-        data = response.json()
+    if response.status_code != http.HTTPStatus.OK:
+        log.error("Error response: %s", response.json())
 
-        for operation in data["Operations"]:
-            bulk_id = operation["bulkId"]
-            user = users_by_bulk_id[bulk_id]
+    response.raise_for_status()
 
-            if int(operation["status"]) != http.HTTPStatus.CREATED:
-                log.error(
-                    "Unable to perform operation for user: %s, response: %s",
-                    str(user),
-                    str(operation),
-                )
-                yield UserState(user, error=operation.get("response"))
-                continue
+    data = response.json()
+    states = []
+
+    for operation in data["Operations"]:
+        bulk_id = operation["bulkId"]
+        user_operation = operations_by_bulk_id[bulk_id]
+        user = user_operation.user
+        expected_status = (
+            http.HTTPStatus.CREATED
+            if user_operation.operation["method"] == "POST"
+            else http.HTTPStatus.OK
+        )
+
+        if int(operation["status"]) != expected_status:
+            log.error(
+                "Unable to perform operation for user: %s, response: %s",
+                str(user),
+                str(operation),
+            )
+            states.append(UserState(user, error=operation.get("response")))
+            continue
 
-            location = operation["location"]
-            external_id = _parse_external_id_from_location(location)
+        # updates address the user by its external id already, so the remote
+        # may not bother sending a location back for them
+        location = operation.get("location") or user_operation.operation["path"]
+        external_id = _parse_external_id_from_location(location)
 
-            yield UserState(
+        states.append(
+            UserState(
                 user,
                 external_id=external_id,
                 response_body=operation.get("response"),
             )
+        )
+
+    return states
 
 
 def _update_users(states: list[UserState]):
@@ -293,9 +535,21 @@ def _update_users(states: list[UserState]):
         updates = []
         for state in batch:
             user = state.user
+
+            if (user.scim_id, user.scim_external_id, user.global_id) == (
+                str(user.id),
+                state.external_id,
+                state.external_id,
+            ):
+                # already up to date, e.g. an update to a previously synced user
+                continue
+
             user.scim_id = str(user.id)  # normally done in User.save()
             user.scim_external_id = state.external_id
             user.global_id = state.external_id
             updates.append(user)
 
-        User.objects.bulk_update(updates, ["global_id", "scim_id", "scim_external_id"])
+        if updates:
+            User.objects.bulk_update(
+                updates, ["global_id", "scim_id", "scim_external_id"]
+            )
@@ -0,0 +1,303 @@
+"""
+Batched database writes for /Bulk requests.
+
+Keycloak pushes users in large /Bulk requests made up almost entirely of
+POST /Users and PUT /Users/<id> operations. Dispatching each one through
+UsersView means a transaction, a row lock and a save per user, so requests
+like that are validated up front and then written with bulk_create and
+bulk_update instead.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save, pre_save
+from django_scim import exceptions
+from django_scim.settings import scim_settings
+from django_scim.utils import get_user_adapter
+from mitol.scim.adapters import UserAdapter
+
+User = get_user_model()
+
+log = logging.getLogger()
+
+
+@dataclass
+class UserWriteOperation:
+    """A POST /Users or PUT /Users/<uuid> operation from a /Bulk request"""
+
+    operation: dict[str, Any]
+    uuid: str | None = None
+
+    @property
+    def method(self) -> str:
+        return self.operation.get("method")
+
+    @property
+    def bulk_id(self) -> str:
+        return self.operation.get("bulkId")
+
+    @property
+    def is_create(self) -> bool:
+        return self.uuid is None
+
+
+@dataclass
+class _PreparedWrite:
+    """A validated operation and the adapter holding its unsaved user"""
+
+    user_operation: UserWriteOperation
+    adapter: UserAdapter
+    changed_fields: set[str] = field(default_factory=set)
+
+
+def is_enabled_for_adapter() -> bool:
+    """
+    Return True if the configured user adapter and user model can be written in bulk.
+
+    The batched writes bypass the adapter's save(), User.save() and the
+    pre_save/post_save signals, so if any of those are customized (e.g. to save
+    related models or provision profiles) users have to go one operation at a time.
+    """
+    adapter_cls = get_user_adapter()
+
+    if not all(
+        getattr(adapter_cls, name) is getattr(UserAdapter, name)
+        for name in ("save", "_save_user", "_save_related")
+    ):
+        return False
+
+    if User.save is not AbstractBaseUser.save:
+        return False
+
+    return not (pre_save.has_listeners(User) or post_save.has_listeners(User))
+
+
+def _field_values(user: "User") -> dict[str, Any]:
+    return {
+        model_field.name: getattr(user, model_field.attname)
+        for model_field in User._meta.concrete_fields  # noqa: SLF001
+    }
+
+
+def _operation_result(
+    user_operation: UserWriteOperation, status: int, **extra
+) -> dict[str, Any]:
+    return {
+        "method": user_operation.method,
+        "bulkId": user_operation.bulk_id,
+        "status": str(status),
+        **extra,
+    }
+
+
+def _error_result(user_operation: UserWriteOperation, exc: Exception) -> dict:
+    """Build the result for a failed operation the way SCIMView.dispatch would"""
+    if not isinstance(exc, exceptions.SCIMException):
+        log.error("Unable to complete SCIM call.", exc_info=exc)
+
+        exc = exceptions.SCIMException(
+            str(exc)
+            if scim_settings.EXPOSE_SCIM_EXCEPTIONS
+            else "Exception occurred while processing the SCIM request"
+        )
+
+    return _operation_result(user_operation, exc.status, response=exc.to_dict())
+
+
+def _prepare_write(
+    request, user_operation: UserWriteOperation, existing_users: dict[str, "User"]
+) -> _PreparedWrite:
+    """Validate an operation and apply its data to an unsaved user"""
+    data = user_operation.operation.get("data")
+
+    if not data:
+        msg = f"{user_operation.method.upper()} call made with empty body"
+        raise exceptions.BadRequestError(msg)
+
+    if user_operation.is_create:
+        user = User()
+    elif user_operation.uuid in existing_users:
+        user = existing_users[user_operation.uuid]
+    else:
+        raise exceptions.NotFoundError(user_operation.uuid)
+
+    adapter = get_user_adapter()(user, request=request, lock_user=False)
+    before = _field_values(user)
+
+    adapter.validate_dict(data)
+    adapter.from_dict(data)
+
+    after = _field_values(user)
+
+    return _PreparedWrite(
+        user_operation,
+        adapter,
+        changed_fields={name for name, value in after.items() if before[name] != value},
+    )
+
+
+def _prepare_writes(
+    request, user_operations: list[UserWriteOperation], existing_users: dict
+) -> list[_PreparedWrite | Exception] | None:
+    """
+    Prepare each operation, returning either the write or the error it failed
+    with, in the same order. Returns None if two operations claim the same
+    username, since that has to be resolved one operation at a time.
+    """
+    writes: list[_PreparedWrite | Exception] = []
+
+    for user_operation in user_operations:
+        try:
+            writes.append(_prepare_write(request, user_operation, existing_users))
+        except Exception as exc:  # noqa: BLE001, PERF203
+            writes.append(exc)
+
+    usernames = [
+        write.adapter.obj.username
+        for write in writes
+        if isinstance(write, _PreparedWrite)
+    ]
+
+    if len(set(usernames)) != len(usernames):
+        return None
+
+    taken_usernames = dict(
+        User.objects.filter(username__in=usernames).values_list("username", "id")
+    )
+
+    for position, write in enumerate(writes):
+        if isinstance(write, _PreparedWrite):
+            username = write.adapter.obj.username
+            owner_id = taken_usernames.get(username)
+
+            if owner_id is not None and owner_id != write.adapter.obj.pk:
+                writes[position] = exceptions.IntegrityError(
+                    f"User with username {username} already exists"
+                )
+
+    return writes
+
+
+def _write_users(creates: list[_PreparedWrite], updates: list[_PreparedWrite]) -> None:
+    """Write the prepared users to the database"""
+    new_users = User.objects.bulk_create([write.adapter.obj for write in creates])
+
+    if new_users and any(user.pk is None for user in new_users):
+        # not every database returns primary keys from a bulk insert
+        ids_by_username = dict(
+            User.objects.filter(
+                username__in=[user.username for user in new_users]
+            ).values_list("username", "id")
+        )
+        for user in new_users:
+            user.pk = ids_by_username[user.username]
+
+    for user in new_users:
+        # the equivalent of AbstractSCIMCommonAttributesMixin.set_scim_id()
+        user.scim_id = str(user.pk)
+
+    if new_users:
+        User.objects.bulk_update(new_users, ["scim_id"])
+
+    update_fields = set()
+    for write in updates:
+        update_fields |= write.changed_fields
+
+    if update_fields:
+        # bulk_update() doesn't apply auto_now, so do what save() would have done
+        auto_now_fields = [
+            model_field
+            for model_field in User._meta.concrete_fields  # noqa: SLF001
+            if getattr(model_field, "auto_now", False)
+        ]
+        for write in updates:
+            for model_field in auto_now_fields:
+                model_field.pre_save(write.adapter.obj, add=False)
+
+        User.objects.bulk_update(
+            [write.adapter.obj for write in updates],
+            [*update_fields, *(model_field.name for model_field in auto_now_fields)],
+        )
+
+
+def apply_user_write_operations(
+    request, user_operations: list[UserWriteOperation], fail_on_errors: int | None
+) -> list[dict[str, Any]] | None:
+    """
+    Apply POST and PUT /Users operations with batched database writes.
+
+    Every operation is validated before anything is written, so the results,
+    including where processing stops for failOnErrors, are the same as if the
+    operations had run one at a time. Returns None if the operations can't be
+    safely batched (e.g. two of them touch the same user or a write fails on a
+    database constraint), in which case nothing has been written and they
+    should be run one at a time instead.
+    """
+    uuids = [op.uuid for op in user_operations if not op.is_create]
+
+    if len(set(uuids)) != len(uuids):
+        return None
+
+    results = []
+    creates = []
+    updates = []
+    num_errors = 0
+
+    with transaction.atomic():
+        existing_users = {
+            user.scim_id: user
+            for user in User.objects.select_for_update().filter(scim_id__in=uuids)
+        }
+
+        writes = _prepare_writes(request, user_operations, existing_users)
+
+        if writes is None:
+            return None
+
+        for user_operation, write in zip(user_operations, writes):
+            # per-spec, if we've hit the error threshold stop processing and return
+            if fail_on_errors is not None and num_errors >= fail_on_errors:
+                break
+
+            if isinstance(write, Exception):
+                num_errors += 1
+                results.append(_error_result(user_operation, write))
+                continue
+
+            if user_operation.is_create:
+                creates.append(write)
+            elif write.changed_fields:
+                updates.append(write)
+
+            results.append(None)
+
+        try:
+            with transaction.atomic():
+                _write_users(creates, updates)
+        except IntegrityError:
+            log.warning(
+                "Unable to apply bulk operations in a batch, falling back to "
+                "running them one at a time",
+                exc_info=True,
+            )
+            return None
+
+    log.info("Bulk saved users. Created=%i, updated=%i", len(creates), len(updates))
+
+    return [
+        result
+        if result is not None
+        else _operation_result(
+            user_operation,
+            HTTPStatus.CREATED if user_operation.is_create else HTTPStatus.OK,
+            location=write.adapter.location,
+            id=write.adapter.id,
+        )
+        for user_operation, write, result in zip(user_operations, writes, results)
+    ]
@@ -1,11 +1,58 @@
+import math
 import operator
+import re
 from collections.abc import Callable
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db.models import Model, Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import In
+from mitol.common.utils.cache import TTLCache
 from mitol.scim.parser import Filters, TermType
 from pyparsing import ParseResults
 
+# a double quoted string, allowing for escaped quotes inside it
+QUOTED_STRING_RE = re.compile(r'("(?:[^"\\]|\\.)*")')
+WHITESPACE_RE = re.compile(r"\s+")
+
+_filter_cache: TTLCache | None = None
+
+
+def normalize_filter(filter_query: str) -> str:
+    """
+    Normalize a filter string for use as a cache key by collapsing whitespace,
+    leaving anything inside quoted strings untouched.
+    """
+    parts = QUOTED_STRING_RE.split(filter_query.strip())
+
+    return "".join(
+        # split() puts the quoted strings at the odd positions
+        part if position % 2 else WHITESPACE_RE.sub(" ", part)
+        for position, part in enumerate(parts)
+    )
+
+
+def get_filter_cache() -> TTLCache:
+    """Return the process-local cache of compiled filters"""
+    global _filter_cache  # noqa: PLW0603
+
+    if _filter_cache is None:
+        _filter_cache = TTLCache(
+            maxsize=getattr(settings, "MITOL_SCIM_FILTER_CACHE_SIZE", 0),
+            # the compiled filters never go stale, they're only evicted
+            ttl=math.inf,
+        )
+
+    return _filter_cache
+
+
+def clear_filter_cache() -> None:
+    """Discard the process-local cache of compiled filters"""
+    global _filter_cache  # noqa: PLW0603
+
+    _filter_cache = None
+
 
 class FilterQuery:
     """Filters for users"""
@@ -46,7 +93,8 @@ class FilterQuery:
         raise ValueError(msg)
 
     @classmethod
-    def _attr_expr(cls, parsed: ParseResults) -> Q:
+    def _attr_lookup(cls, parsed: ParseResults) -> tuple[str, str]:
+        """Return the field path and lookup for an attribute expression"""
         scim_keys = (parsed.attr_name, parsed.sub_attr)
 
         field_op_overrides = cls.dj_op_mapping_per_field_overrides.get(scim_keys, {})
@@ -54,24 +102,62 @@ class FilterQuery:
         op_name = parsed.comparison_operator.lower()
         dj_op = field_op_overrides.get(op_name, cls.dj_op_mapping[op_name])
 
-        path_parts = list(
-            filter(
-                lambda part: part is not None,
-                (
-                    *cls.attr_map.get(scim_keys, scim_keys),
-                    dj_op,
-                ),
-            )
-        )
-        path = "__".join(path_parts)
+        path_parts = [
+            part for part in cls.attr_map.get(scim_keys, scim_keys) if part is not None
+        ]
+
+        return "__".join(path_parts), dj_op
+
+    @classmethod
+    def _attr_expr(cls, parsed: ParseResults) -> Q:
+        field_path, dj_op = cls._attr_lookup(parsed)
 
-        q = Q(**{path: parsed.value})
+        q = Q(**{f"{field_path}__{dj_op}": parsed.value})
 
         if parsed.comparison_operator in cls.dj_negated_ops:
             q = ~q
 
         return q
 
+    @classmethod
+    def _equality_chain(cls, parsed: ParseResults) -> Q | None:
+        """
+        Compile a chain of equality comparisons on a single attribute joined
+        by OR, like the email searches Keycloak sends, into a single IN lookup.
+        Returns None for any other kind of filter.
+        """
+        terms = list(parsed)
+        attr_exprs, logical_ops = terms[::2], terms[1::2]
+
+        if not logical_ops or any(
+            logical_op.term_type != TermType.logical_op
+            or logical_op.logical_operator.lower() != "or"
+            for logical_op in logical_ops
+        ):
+            return None
+
+        if any(
+            attr_expr.term_type != TermType.attr_expr
+            or attr_expr.comparison_operator.lower() != "eq"
+            or attr_expr.value is None
+            for attr_expr in attr_exprs
+        ):
+            return None
+
+        if len({(expr.attr_name, expr.sub_attr) for expr in attr_exprs}) > 1:
+            return None
+
+        field_path, dj_op = cls._attr_lookup(attr_exprs[0])
+        values = list(dict.fromkeys(attr_expr.value for attr_expr in attr_exprs))
+
+        if dj_op == "exact":
+            return Q(**{f"{field_path}__in": values})
+
+        if dj_op == "iexact" and all(isinstance(value, str) for value in values):
+            return Q(In(Lower(field_path), [value.lower() for value in values]))
+
+        return None
+
     @classmethod
     def _filters(cls, parsed: ParseResults) -> Q:
         parsed_iter = iter(parsed)
@@ -102,13 +188,32 @@ class FilterQuery:
             msg = f"Unexpected operator: {parsed.operator}"
             raise ValueError(msg)
 
+    @classmethod
+    def compile(cls, filter_query: str) -> Q:
+        """
+        Parse a filter into a Q object.
+
+        Parsing is slow and the same filters tend to be sent over and over
+        (e.g. to page through results), so compiled filters are cached by
+        their normalized filter string.
+        """
+        cache = get_filter_cache()
+        key = (cls, normalize_filter(filter_query))
+
+        q = cache.get(key)
+
+        if q is None:
+            parsed = Filters.parse_string(filter_query, parse_all=True)
+            q = cls._equality_chain(parsed) or cls._filters(parsed)
+            cache.set(key, q)
+
+        return q
+
     @classmethod
     def search(cls, filter_query, request=None):  # noqa: ARG003
         """Create a search query"""
-        parsed = Filters.parse_string(filter_query, parse_all=True)
-
         return cls.model_cls.objects.select_related(*cls.related_selects).filter(
-            cls._filters(parsed)
+            cls.compile(filter_query)
         )
 
 
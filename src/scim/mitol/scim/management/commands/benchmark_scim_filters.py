@@ -0,0 +1,105 @@
+"""
+Measures how long it takes to parse and compile SCIM search filters of
+different sizes, with and without the compiled filter cache.
+"""
+
+import statistics
+import time
+import uuid
+
+from django.core.management import BaseCommand
+from mitol.scim import filters
+from mitol.scim.filters import UserFilterQuery
+from mitol.scim.parser import Filters
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks parsing and compiling SCIM filters.
+    """
+
+    help = "Benchmarks parsing and compiling SCIM email search filters."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1, 50, 500],
+            help="The number of OR'd terms in each filter.",
+        )
+
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="The number of times to compile each filter.",
+        )
+
+    def _time(self, func, iterations):
+        """Run func iterations times, returning the latencies in ms"""
+        timings = []
+
+        for _ in range(iterations):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return timings
+
+    def _report(self, name, timings):
+        self.stdout.write(
+            f"  {name}: mean {statistics.mean(timings):.3f}ms, "
+            f"median {statistics.median(timings):.3f}ms"
+        )
+
+    def handle(self, *args, **kwargs):  # noqa: ARG002
+        iterations = kwargs["iterations"]
+
+        for size in kwargs["sizes"]:
+            filter_query = " or ".join(
+                f'emails.value eq "{uuid.uuid4().hex}@example.com"' for _ in range(size)
+            )
+            parsed = Filters.parse_string(filter_query, parse_all=True)
+
+            self.stdout.write(self.style.SUCCESS(f"{size} term filter"))
+
+            self._report(
+                "parse",
+                self._time(
+                    lambda: Filters.parse_string(filter_query, parse_all=True),  # noqa: B023
+                    iterations,
+                ),
+            )
+            self._report(
+                "compile (per-term Q)",
+                self._time(lambda: UserFilterQuery._filters(parsed), iterations),  # noqa: B023, SLF001
+            )
+            self._report(
+                "compile (IN lookup)",
+                self._time(
+                    lambda: UserFilterQuery._equality_chain(parsed),  # noqa: B023, SLF001
+                    iterations,
+                ),
+            )
+
+            filters.clear_filter_cache()
+            self._report(
+                "parse and compile, uncached",
+                self._time(
+                    lambda: (
+                        filters.clear_filter_cache(),
+                        UserFilterQuery.compile(filter_query),  # noqa: B023
+                    ),
+                    iterations,
+                ),
+            )
+
+            UserFilterQuery.compile(filter_query)
+            self._report(
+                "parse and compile, cached",
+                self._time(
+                    lambda: UserFilterQuery.compile(filter_query),  # noqa: B023
+                    iterations,
+                ),
+            )
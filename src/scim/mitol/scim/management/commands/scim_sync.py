@@ -15,6 +15,12 @@ class Command(BaseCommand):
             default=False,
             help="Only sync users who have never been synced",
         )
+        parser.add_argument(
+            "--changed-only",
+            action="store_true",
+            default=False,
+            help="Only sync users who have changed since the last --changed-only run",
+        )
 
     def handle(self, *args, **options):  # noqa: ARG002
         """Sync users with SCIM to the remote"""
@@ -22,9 +28,12 @@ class Command(BaseCommand):
 
         never_synced_only = options["never_synced_only"]
 
-        task = tasks.sync_all_users_to_scim_remote.delay(
-            never_synced_only=never_synced_only
-        )
+        if options["changed_only"]:
+            task = tasks.sync_changed_users_to_scim_remote.delay()
+        else:
+            task = tasks.sync_all_users_to_scim_remote.delay(
+                never_synced_only=never_synced_only
+            )
 
         task.get()
 
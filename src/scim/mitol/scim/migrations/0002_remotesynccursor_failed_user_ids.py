@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-10-17 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("scim", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="remotesynccursor",
+            name="failed_user_ids",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,19 @@
+"""SCIM models"""
+
+from django.db import models
+from mitol.common.models import TimestampedModel
+
+
+class RemoteSyncCursor(TimestampedModel):
+    """
+    Records how far a sync to the SCIM remote has gotten, so later runs only
+    need to send the users that changed after it.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    synced_until = models.DateTimeField(null=True, blank=True)
+    # users that failed to sync, which are retried on the next run
+    failed_user_ids = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"RemoteSyncCursor: {self.name} synced until {self.synced_until}"
@@ -0,0 +1,165 @@
+"""
+Pagination for SCIM list and search responses.
+
+Besides the usual startIndex/count paging, clients can page with a cursor (as
+in RFC 9865): pass an empty cursor for the first page and then the
+nextCursor from each response. Cursor pages seek past the last row of the
+previous page using the sort column and primary key rather than an OFFSET,
+so every page costs the same however deep it is.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, Q, QuerySet
+from django_scim import exceptions
+
+COUNT_CACHE_KEY_PREFIX = "mitol.scim.total_results"
+
+
+def encode_cursor(obj: Model, sort_field: str) -> str:
+    """Encode a cursor pointing just past obj"""
+    values = [getattr(obj, sort_field), obj.pk]
+
+    return base64.urlsafe_b64encode(
+        json.dumps(values, cls=DjangoJSONEncoder).encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor into the sort value and primary key it points past"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error) as exc:
+        msg = "Invalid cursor"
+        raise exceptions.BadRequestError(msg) from exc
+
+    if not isinstance(values, list) or len(values) != 2:  # noqa: PLR2004
+        msg = "Invalid cursor"
+        raise exceptions.BadRequestError(msg)
+
+    return tuple(values)
+
+
+def only_fields(qs: QuerySet, fields: tuple[str, ...]) -> QuerySet:
+    """
+    Limit a queryset to loading fields, along with any relations it loads with
+    select_related(), since those can't be deferred.
+    """
+    select_related = qs.query.select_related
+
+    if select_related is True:
+        # select_related() with no fields follows every non-null foreign key
+        related_paths = [
+            field.name
+            for field in qs.model._meta.concrete_fields  # noqa: SLF001
+            if field.is_relation and not field.null
+        ]
+    else:
+        related_paths = _get_related_paths(select_related or {})
+
+    return qs.only(*fields, *related_paths)
+
+
+def _get_related_paths(select_related: dict, prefix: str = "") -> list[str]:
+    """Flatten a query's nested select_related dict into lookup paths"""
+    paths = []
+
+    for name, nested in select_related.items():
+        path = f"{prefix}{name}"
+        paths.append(path)
+        paths.extend(_get_related_paths(nested, f"{path}__"))
+
+    return paths
+
+
+def get_ordering(qs: QuerySet) -> tuple[str, bool] | None:
+    """
+    Return the field a queryset is sorted on and whether it's descending, or
+    None if it isn't sorted on exactly one field.
+    """
+    if len(qs.query.order_by) != 1:
+        return None
+
+    (sort_field,) = qs.query.order_by
+
+    if not isinstance(sort_field, str) or "__" in sort_field:
+        return None
+
+    descending = sort_field.startswith("-")
+
+    # QuerySet.reverse() flips this rather than the order_by fields
+    if not qs.query.standard_ordering:
+        descending = not descending
+
+    return sort_field.lstrip("-"), descending
+
+
+def order_for_keyset(qs: QuerySet, sort_field: str, *, descending: bool) -> QuerySet:
+    """Order a queryset by the sort field, using the primary key as a tiebreaker"""
+    prefix = "-" if descending else ""
+
+    if not qs.query.standard_ordering:
+        # undo any reverse(), descending already accounts for it
+        qs = qs.reverse()
+
+    return qs.order_by(f"{prefix}{sort_field}", f"{prefix}pk")
+
+
+def seek(qs: QuerySet, sort_field: str, after: tuple, *, descending: bool) -> QuerySet:
+    """Filter a queryset to the rows that sort after the cursor values"""
+    value, pk = after
+    lookup = "lt" if descending else "gt"
+
+    return qs.filter(
+        Q(**{f"{sort_field}__{lookup}": value})
+        | Q(**{sort_field: value, f"pk__{lookup}": pk})
+    )
+
+
+def get_keyset_page(
+    qs: QuerySet, sort_field: str, cursor: str, count: int, *, descending: bool
+) -> tuple[list[Model], str | None]:
+    """
+    Return a page of objects following the cursor, along with the cursor for
+    the next page if there is one. An empty cursor returns the first page.
+    """
+    qs = order_for_keyset(qs, sort_field, descending=descending)
+
+    if cursor:
+        qs = seek(qs, sort_field, decode_cursor(cursor), descending=descending)
+
+    # fetch one extra row to find out whether there's another page
+    objs = list(qs[: count + 1])
+
+    if count <= 0 or len(objs) <= count:
+        return objs[:count], None
+
+    objs = objs[:count]
+    return objs, encode_cursor(objs[-1], sort_field)
+
+
+def get_total_results(qs: QuerySet) -> int:
+    """
+    Return the number of results for a query.
+
+    If MITOL_SCIM_SEARCH_COUNT_CACHE_SECONDS is set, counts are cached for that
+    long, so paging through a large result set only counts it once. The total
+    can then be off by whatever changed since it was cached.
+    """
+    qs = qs.order_by()
+    timeout = getattr(settings, "MITOL_SCIM_SEARCH_COUNT_CACHE_SECONDS", 0)
+
+    if timeout <= 0:
+        return qs.count()
+
+    query_hash = hashlib.sha256(str(qs.query).encode("utf-8")).hexdigest()
+
+    return caches[settings.MITOL_SCIM_SEARCH_COUNT_CACHE_NAME].get_or_set(
+        f"{COUNT_CACHE_KEY_PREFIX}:{query_hash}", qs.count, timeout=timeout
+    )
@@ -1,4 +1,4 @@
-from mitol.common.envs import get_int, get_string
+from mitol.common.envs import get_bool, get_int, get_string
 
 MITOL_SCIM_REQUESTS_TIMEOUT_SECONDS = get_int(
     name="MITOL_SCIM_REQUESTS_TIMEOUT_SECONDS",
@@ -23,6 +23,54 @@ MITOL_SCIM_KEYCLOAK_BULK_OPERATIONS_COUNT = get_int(
     required=True,
 )
 
+MITOL_SCIM_KEYCLOAK_SYNC_CONCURRENCY = get_int(
+    name="MITOL_SCIM_KEYCLOAK_SYNC_CONCURRENCY",
+    default=1,
+    description=(
+        "Maximum number of search and bulk requests to have in flight at once"
+        " when syncing users to Keycloak. 1 sends them one at a time."
+    ),
+)
+
+MITOL_SCIM_BULK_FAST_PATH_ENABLED = get_bool(
+    name="MITOL_SCIM_BULK_FAST_PATH_ENABLED",
+    default=False,
+    description=(
+        "Apply /Bulk requests made up of only POST and PUT /Users operations"
+        " with batched database writes instead of one operation at a time."
+        " Batched writes bypass User.save() and don't send pre_save/post_save"
+        " signals, so they're skipped anyway if either is customized."
+    ),
+)
+MITOL_SCIM_BULK_FAST_PATH_MIN_OPERATIONS = get_int(
+    name="MITOL_SCIM_BULK_FAST_PATH_MIN_OPERATIONS",
+    default=10,
+    description=(
+        "Minimum number of operations in a /Bulk request for the batched"
+        " database writes to be used"
+    ),
+)
+
+MITOL_SCIM_FILTER_CACHE_SIZE = get_int(
+    name="MITOL_SCIM_FILTER_CACHE_SIZE",
+    default=1000,
+    description="Number of compiled search filters to cache in each process",
+)
+
+MITOL_SCIM_SEARCH_COUNT_CACHE_SECONDS = get_int(
+    name="MITOL_SCIM_SEARCH_COUNT_CACHE_SECONDS",
+    default=0,
+    description=(
+        "Seconds to cache the totalResults of list and search responses for."
+        " 0 counts the results for every page."
+    ),
+)
+MITOL_SCIM_SEARCH_COUNT_CACHE_NAME = get_string(
+    name="MITOL_SCIM_SEARCH_COUNT_CACHE_NAME",
+    default="default",
+    description="The name of the Django cache to store totalResults in",
+)
+
 MITOL_SCIM_KEYCLOAK_CLIENT_ID = get_string(
     name="MITOL_SCIM_KEYCLOAK_CLIENT_ID",
     description="The client id for the Keycloak service",
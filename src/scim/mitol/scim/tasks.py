@@ -6,7 +6,9 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from mitol.common.utils.celery import get_celery_app
 from mitol.common.utils.collections import chunks
+from mitol.common.utils.datetime import now_in_utc
 from mitol.scim import api
+from mitol.scim.models import RemoteSyncCursor
 
 User = get_user_model()
 app = get_celery_app()
@@ -47,3 +49,51 @@ def sync_all_users_to_scim_remote(self, *, never_synced_only: bool = False):
             )
         )
     )
+
+
+@app.task(acks_late=True)
+def sync_changed_users_to_scim_remote(*, cursor_name: str = "default"):
+    """
+    Sync users that have changed since the last run to the scim remote.
+
+    The cursor always advances, so a user the remote keeps rejecting doesn't
+    hold it back. Users that failed are recorded on the cursor instead, and are
+    retried on the next run whether or not they've changed again.
+    """
+    cursor, _ = RemoteSyncCursor.objects.get_or_create(name=cursor_name)
+    # taken before querying so changes made during the sync are picked up next run
+    started_on = now_in_utc()
+
+    # inactive users only need to be sent if they exist in the remote already
+    user_q = User.objects.filter(
+        Q(is_active=True)
+        | (Q(scim_external_id__isnull=False) & ~Q(scim_external_id=""))
+    ).order_by("id")
+
+    if cursor.synced_until is not None:
+        user_q = user_q.filter(
+            Q(updated_on__gt=cursor.synced_until) | Q(id__in=cursor.failed_user_ids)
+        )
+
+    msg = f"Syncing {user_q.count()} changed users to SCIM remote"
+    log.info(msg)
+
+    failed_user_ids = []
+    for users in chunks(user_q, chunk_size=1000):
+        failed_user_ids.extend(
+            state.user.id
+            for state in api.sync_changed_users_to_scim_remote(users)
+            if not state.success
+        )
+
+    if failed_user_ids:
+        msg = (
+            f"Failed to sync {len(failed_user_ids)} users for cursor "
+            f"'{cursor_name}', they will be retried on the next run: "
+            f"{sorted(failed_user_ids)}"
+        )
+        log.error(msg)
+
+    cursor.synced_until = started_on
+    cursor.failed_user_ids = sorted(failed_user_ids)
+    cursor.save(update_fields=["synced_until", "failed_user_ids", "updated_on"])
@@ -5,20 +5,109 @@ import logging
 from http import HTTPStatus
 from urllib.parse import urljoin, urlparse
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import QuerySet
 from django.http import HttpResponse
 from django.urls import Resolver404, resolve, reverse
 from django_scim import constants as djs_constants
 from django_scim import exceptions
 from django_scim import views as djs_views
+from django_scim.adapters import SCIMUser
 from django_scim.utils import get_base_scim_location_getter
-from mitol.scim import constants
+from mitol.scim import bulk, constants, pagination
+from mitol.scim.adapters import UserAdapter
 from mitol.scim.requests import InMemoryHttpRequest
 
 log = logging.getLogger()
 
 
-class UsersView(djs_views.UsersView):
+class PaginationMixin:
+    """
+    List responses that page in the database rather than in Python, with
+    optional cursor-based (keyset) paging.
+    """
+
+    def _scim_adapter_for_list(self, obj, request) -> SCIMUser:
+        # rows in a list response are only read, so there's no need to lock them
+        if issubclass(self.scim_adapter, UserAdapter):
+            return self.scim_adapter(obj, request=request, lock_user=False)
+
+        return self.scim_adapter(obj, request=request)
+
+    def _search(self, request, query, start, count):
+        if self.get_extra_filter_kwargs(request) or self.get_extra_exclude_kwargs(
+            request
+        ):
+            # these filter in Python, so the queryset can't be paged in the database
+            return super()._search(request, query, start, count)
+
+        try:
+            qs = self.__class__.parser_getter().search(query, request)
+        except ValueError as e:
+            msg = "Invalid filter/search query: " + str(e)
+            raise exceptions.BadRequestError(msg) from e
+
+        return self._build_response(
+            request, qs.order_by(self.lookup_field), start, count
+        )
+
+    def _build_response(self, request, qs, start, count, cursor=None):
+        ordering = pagination.get_ordering(qs) if isinstance(qs, QuerySet) else None
+
+        if ordering is None:
+            return super()._build_response(request, qs, start, count)
+
+        if cursor is None:
+            cursor = request.GET.get("cursor")
+
+        sort_field, descending = ordering
+        list_fields = getattr(self.scim_adapter, "list_fields", None)
+
+        if list_fields:
+            qs = pagination.only_fields(qs, list_fields)
+
+        doc = {"schemas": [constants.SchemaURI.LIST_RESPONSE]}
+
+        if cursor is not None:
+            objs, next_cursor = pagination.get_keyset_page(
+                qs, sort_field, cursor, count, descending=descending
+            )
+            total_results = pagination.get_total_results(qs)
+
+            if next_cursor is not None:
+                doc["nextCursor"] = next_cursor
+        else:
+            page_qs = pagination.order_for_keyset(qs, sort_field, descending=descending)
+            objs = list(page_qs[start - 1 : (start - 1) + count])
+
+            if objs and len(objs) < count:
+                # a short page is the last one, so the total is known already
+                total_results = start - 1 + len(objs)
+            elif start == 1 and not objs:
+                total_results = 0
+            else:
+                total_results = pagination.get_total_results(qs)
+
+            doc["startIndex"] = start
+
+        resources = [
+            self._scim_adapter_for_list(obj, request).to_dict() for obj in objs
+        ]
+        doc.update(
+            {
+                "totalResults": total_results,
+                "itemsPerPage": len(resources),
+                "Resources": resources,
+            }
+        )
+
+        return HttpResponse(
+            content=json.dumps(doc), content_type=djs_constants.SCIM_CONTENT_TYPE
+        )
+
+
+class UsersView(PaginationMixin, djs_views.UsersView):
     def post(self, request, *args, **kwargs):
         with transaction.atomic():
             return super().post(request, *args, **kwargs)
@@ -71,6 +160,16 @@ class BulkView(djs_views.SCIMView):
 
     def _attempt_operations(self, request, operations, fail_on_errors):
         """Attempt to run the operations that were passed"""
+        user_operations = self._match_user_write_operations(operations)
+
+        if user_operations is not None:
+            responses = bulk.apply_user_write_operations(
+                request, user_operations, fail_on_errors
+            )
+
+            if responses is not None:
+                return responses
+
         responses = []
         num_errors = 0
 
@@ -89,6 +188,43 @@ class BulkView(djs_views.SCIMView):
 
         return responses
 
+    def _match_user_write_operations(self, operations):
+        """
+        Return the operations as UserWriteOperations if they can be applied
+        with batched writes, that is if they're all POST /Users or
+        PUT /Users/<uuid>, otherwise None.
+        """
+        if (
+            not settings.MITOL_SCIM_BULK_FAST_PATH_ENABLED
+            or len(operations) < settings.MITOL_SCIM_BULK_FAST_PATH_MIN_OPERATIONS
+            or not bulk.is_enabled_for_adapter()
+        ):
+            return None
+
+        user_operations = []
+
+        for operation in operations:
+            method = str(operation.get("method", "")).upper()
+
+            try:
+                url_match = resolve(
+                    operation.get("path", ""), urlconf="mitol.scim.bulk_urls"
+                )
+            except Resolver404:
+                return None
+
+            if getattr(url_match.func, "view_class", None) is not UsersView:
+                return None
+
+            uuid = url_match.kwargs.get("uuid")
+
+            if (method, uuid is None) not in (("POST", True), ("PUT", False)):
+                return None
+
+            user_operations.append(bulk.UserWriteOperation(operation, uuid))
+
+        return user_operations
+
     def _attempt_operation(self, bulk_request, operation):
         """Attempt an operation as part of a bulk request"""
 
@@ -155,7 +291,7 @@ class BulkView(djs_views.SCIMView):
         }
 
 
-class SearchView(djs_views.UserSearchView):
+class SearchView(PaginationMixin, djs_views.UserSearchView):
     """
     View for /.search endpoint
     """
@@ -172,6 +308,7 @@ class SearchView(djs_views.UserSearchView):
         sort_by = body.get("sortBy", "id")
         sort_order = body.get("sortOrder", "ascending")
         query = body.get("filter", None)
+        cursor = body.get("cursor", None)
 
         if sort_by not in constants.VALID_SORTS:
             msg = f"Sorting only supports: {', '.join(constants.VALID_SORTS)}"
@@ -198,7 +335,7 @@ class SearchView(djs_views.UserSearchView):
         if sort_order == "descending":
             qs = qs.reverse()
 
-        response = self._build_response(request, qs, start, count)
+        response = self._build_response(request, qs, start, count, cursor=cursor)
 
         path = reverse(self.scim_adapter.url_name)
         url = urljoin(get_base_scim_location_getter()(request=request), path).rstrip(
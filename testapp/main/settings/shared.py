@@ -22,6 +22,7 @@ import_settings_modules(
     "mitol.mail.settings.email",
     "mitol.authentication.settings.djoser_settings",
     "mitol.payment_gateway.settings",
+    "mitol.geoip.settings.geoip",
     "mitol.google_sheets.settings.google_sheets",
     "mitol.google_sheets_refunds.settings.google_sheets_refunds",
     "mitol.google_sheets_deferrals.settings.google_sheets_deferrals",
@@ -34,3 +34,4 @@ FEATURES = {}
 
 MITOL_APIGATEWAY_LOGOUT_URL = "/logout"
 MITOL_APIGATEWAY_DEFAULT_POST_LOGOUT_DEST = "/app-after-logout"
+MITOL_APIGATEWAY_USERINFO_CACHE_NAME = "durable"
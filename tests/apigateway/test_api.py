@@ -61,3 +61,19 @@ def test_create_userinfo_header():
     result = json.loads(base64.b64decode(header_data[header_name]).decode())
 
     assert result["sub"] == user.global_id
+
+
+def test_get_scope_header(settings):
+    """Scope headers should be matched on their lowercased, dashed name"""
+    settings.MITOL_APIGATEWAY_USERINFO_HEADER_NAME = "HTTP_X_USERINFO"
+    scope = {
+        "headers": [
+            (b"host", b"localhost"),
+            (b"x-userinfo", b"first"),
+            (b"x-userinfo", b"second"),
+        ]
+    }
+
+    assert api.get_scope_header(scope) == b"second"
+    assert api.get_scope_header(scope, "HTTP_HOST") == b"localhost"
+    assert api.get_scope_header({"headers": []}) is None
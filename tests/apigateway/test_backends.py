@@ -1,6 +1,11 @@
+import base64
+import json
+
 import pytest
 from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from main.utils import generate_apisix_request, generate_fake_apisix_payload
 from mitol.apigateway.backends import ApisixRemoteUserBackend
 from mitol.common.factories.defaults import SsoUserFactory
@@ -70,3 +75,126 @@ async def test_aauthenticate_unknown_remote_user():
     result = await backend.aauthenticate(None, remote_user=None)
 
     assert result is None
+
+
+def _write_queries(context):
+    """Return the queries that wrote to the users table"""
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(("UPDATE", "INSERT"))
+        and "users_user" in query["sql"]
+    ]
+
+
+@pytest.mark.django_db
+def test_configure_user_only_saves_changed_fields(settings):
+    """Only fields that differ from the userinfo should be written"""
+    settings.MITOL_APIGATEWAY_USERINFO_UPDATE = True
+    test_user = SsoUserFactory.create()
+    payload, _ = generate_fake_apisix_payload(user=test_user)
+    request = generate_apisix_request("request", payload)
+
+    with CaptureQueriesContext(connection) as context:
+        ApisixRemoteUserBackend().configure_user(request, test_user, created=False)
+
+    assert _write_queries(context) == []
+
+    test_user.email = "changed@example.com"
+    test_user.save()
+
+    with CaptureQueriesContext(connection) as context:
+        ApisixRemoteUserBackend().configure_user(request, test_user, created=False)
+
+    writes = _write_queries(context)
+    assert len(writes) == 1
+    assert '"email"' in writes[0]
+    assert '"username"' not in writes[0]
+
+
+@pytest.mark.django_db
+def test_authenticate_skips_unchanged_userinfo(
+    settings, django_capture_on_commit_callbacks
+):
+    """Once synced, authenticating with the same userinfo shouldn't write anything"""
+    settings.MITOL_APIGATEWAY_USERINFO_CACHE_TIMEOUT = 60
+    test_user = SsoUserFactory.create()
+    payload, _ = generate_fake_apisix_payload(user=test_user)
+    backend = ApisixRemoteUserBackend()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        request = generate_apisix_request("request", payload)
+        assert backend.authenticate(request, test_user.global_id) == test_user
+
+    request = generate_apisix_request("request", payload)
+    with CaptureQueriesContext(connection) as context:
+        assert backend.authenticate(request, test_user.global_id) == test_user
+
+    assert _write_queries(context) == []
+    assert not [
+        query for query in context.captured_queries if "SAVEPOINT" in query["sql"]
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cache_timeout", [0, 60])
+def test_authenticate_changed_userinfo(
+    settings, django_capture_on_commit_callbacks, cache_timeout
+):
+    """Changed userinfo, or a disabled cache, should sync the user again"""
+    settings.MITOL_APIGATEWAY_USERINFO_CACHE_TIMEOUT = cache_timeout
+    test_user = SsoUserFactory.create()
+    payload, user_info = generate_fake_apisix_payload(user=test_user)
+    backend = ApisixRemoteUserBackend()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        backend.authenticate(
+            generate_apisix_request("request", payload), test_user.global_id
+        )
+
+    user_info["email"] = "new-email@example.com"
+    new_payload = base64.b64encode(json.dumps(user_info).encode()).decode()
+    if not cache_timeout:
+        # with the cache off, even the same userinfo should be re-checked
+        User.objects.filter(id=test_user.id).update(email="stale@example.com")
+        new_payload = payload
+
+    backend.authenticate(
+        generate_apisix_request("request", new_payload), test_user.global_id
+    )
+
+    test_user.refresh_from_db()
+    assert test_user.email == json.loads(base64.b64decode(new_payload))["email"]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_aauthenticate_unchanged_userinfo_skips_sync_path(settings, mocker):
+    """Async authenticate shouldn't fall back to the sync path for unchanged users"""
+    settings.MITOL_APIGATEWAY_USERINFO_CACHE_TIMEOUT = 60
+    test_user = await sync_to_async(SsoUserFactory.create)()
+    payload, _ = generate_fake_apisix_payload(user=test_user)
+    scope = {"headers": [(b"x-userinfo", payload.encode())]}
+    backend = ApisixRemoteUserBackend()
+
+    assert (await backend.aauthenticate(scope, test_user.global_id)) == test_user
+
+    sync_authenticate = mocker.patch.object(ApisixRemoteUserBackend, "authenticate")
+
+    assert (await backend.aauthenticate(scope, test_user.global_id)) == test_user
+    sync_authenticate.assert_not_called()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_aauthenticate_new_user_uses_sync_path(settings):
+    """Async authenticate should create unknown users through the sync path"""
+    payload, user_info = generate_fake_apisix_payload()
+    scope = {"headers": [(b"x-userinfo", payload.encode())]}
+
+    global_id = user_info[settings.MITOL_APIGATEWAY_USERINFO_ID_FIELD]
+
+    user = await ApisixRemoteUserBackend().aauthenticate(scope, global_id)
+
+    assert user is not None
+    assert user.global_id == global_id
@@ -1,8 +1,10 @@
 """Test the Django Channels middleware."""
 
 import pytest
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from mitol.apigateway.middleware_channels import ApisixUserMiddleware
+from mitol.common.factories.defaults import SsoUserFactory
 
 from testapp.main.utils import generate_fake_apisix_payload
 
@@ -88,3 +90,20 @@ async def test_middleware_logout(application, scope):
     ) = await middleware(no_user_scope, "", "")
     assert result_scope["user"] is not None
     assert result_scope["user"].is_anonymous
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_middleware_resolves_user(application):
+    """The scope's lazy user should resolve to the user from the header."""
+    test_user = await sync_to_async(SsoUserFactory.create)()
+    payload, _ = generate_fake_apisix_payload(user=test_user)
+    scope = {
+        "session": {},
+        "headers": [(b"x-userinfo", payload.encode())],
+    }
+
+    result_scope, _, _ = await ApisixUserMiddleware(application)(scope, "", "")
+
+    assert result_scope["user"].is_authenticated
+    assert result_scope["user"].pk == test_user.pk
@@ -0,0 +1,64 @@
+"""Tests for the process-local cache utilities"""
+
+from mitol.common.utils.cache import TTLCache
+
+
+class FakeTimer:
+    """A timer that only moves when told to"""
+
+    def __init__(self):
+        """Start the clock at zero"""
+        self.now = 0
+
+    def __call__(self):
+        """Return the current time"""
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    """Entries should be returned until their time to live has passed"""
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+
+    cache.set("a", None)
+    cache.set("b", 2)
+    timer.now = 4
+    assert cache.get("a", "missing") is None
+    assert cache.get_many(["a", "b", "c"]) == {"a": None, "b": 2}
+
+    timer.now = 5
+    assert cache.get("a", "missing") == "missing"
+    assert cache.get_many(["a", "b"]) == {}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Once full, the least recently used entry should be evicted"""
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert len(cache) == 2  # noqa: PLR2004
+
+
+def test_ttl_cache_delete_and_clear():
+    """Entries can be removed individually or all at once"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set_many({"a": 1, "b": 2})
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2  # noqa: PLR2004
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_disabled():
+    """A cache with no room shouldn't store anything"""
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
@@ -0,0 +1,14 @@
+"""Fixtures for geoip tests"""
+
+import pytest
+from mitol.geoip import lookup
+
+
+@pytest.fixture(autouse=True)
+def _clear_lookup_state():
+    """Make sure each test starts without a loaded index or cached lookups"""
+    lookup.clear_index()
+    lookup.clear_lookup_cache()
+    yield
+    lookup.clear_index()
+    lookup.clear_lookup_cache()
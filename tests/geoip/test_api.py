@@ -3,11 +3,28 @@ Tests for the MaxMind IP lookup stuff.
 """
 
 import ipaddress
+from io import StringIO
+from types import SimpleNamespace
 
 import faker
 import pytest
-from mitol.geoip.api import ip_to_country_code
-from mitol.geoip.factories import NetBlockIPv4Factory, NetBlockIPv6Factory
+from django.core.management import CommandError, call_command
+from mitol.geoip import api, lookup
+from mitol.geoip.api import (
+    MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
+    MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE,
+    MAXMIND_CSV_COUNTRY_LOCATIONS_LITE,
+    MAXMIND_CSV_TYPES,
+    import_maxmind_database,
+    ip_to_country_code,
+    ips_to_country_codes,
+)
+from mitol.geoip.factories import (
+    GeonameFactory,
+    NetBlockIPv4Factory,
+    NetBlockIPv6Factory,
+)
+from mitol.geoip.models import Geoname, NetBlock
 
 fake = faker.Factory.create()
 
@@ -53,3 +70,222 @@ def test_ipv4_lookup(v4, in_block):
     result = ip_to_country_code(str(test_address))
 
     assert (result is not None and in_block) or result is None
+
+
+LOCATIONS_CSV = """geoname_id,locale_code,continent_code,continent_name,country_iso_code,country_name,is_in_european_union
+3017382,en,EU,Europe,FR,France,1
+6252001,en,NA,"North America",US,"United States",0
+"""  # noqa: E501
+
+IPV4_BLOCKS_CSV = """network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,is_anonymous_proxy,is_satellite_provider
+2.0.0.0/12,3017382,3017382,,0,0
+3.0.0.0/9,6252001,6252001,,0,0
+4.0.0.0/9,,,,0,0
+"""  # noqa: E501
+
+IPV6_BLOCKS_CSV = """network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,is_anonymous_proxy,is_satellite_provider
+::1:0:0/96,3017382,3017382,,0,0
+"""  # noqa: E501
+
+
+@pytest.fixture
+def maxmind_files(tmp_path):
+    """Write sample MaxMind CSV files"""
+    files = {
+        MAXMIND_CSV_COUNTRY_LOCATIONS_LITE: LOCATIONS_CSV,
+        MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE: IPV4_BLOCKS_CSV,
+        MAXMIND_CSV_COUNTRY_BLOCKS_IPV6_LITE: IPV6_BLOCKS_CSV,
+    }
+
+    for import_type, contents in files.items():
+        (tmp_path / f"{import_type}.csv").write_text(contents)
+
+    return {import_type: str(tmp_path / f"{import_type}.csv") for import_type in files}
+
+
+@pytest.mark.django_db
+def test_import_maxmind_database(mocker, maxmind_files):
+    """The importer should load each file in batches and replace only its own rows"""
+    mocker.patch("mitol.geoip.api.IMPORT_BATCH_SIZE", 1)
+    progress = mocker.Mock()
+
+    for import_type in MAXMIND_CSV_TYPES:
+        import_maxmind_database(import_type, maxmind_files[import_type])
+
+    assert (
+        import_maxmind_database(
+            MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
+            maxmind_files[MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE],
+            progress_callback=progress,
+        )
+        == 2  # noqa: PLR2004
+    )
+
+    progress.assert_has_calls([mocker.call(1), mocker.call(2), mocker.call(2)])
+    assert Geoname.objects.count() == 2  # noqa: PLR2004
+    assert NetBlock.objects.filter(is_ipv6=False).count() == 2  # noqa: PLR2004
+    assert NetBlock.objects.filter(is_ipv6=True).count() == 1
+    assert ip_to_country_code("2.1.2.3") == "FR"
+    assert ip_to_country_code("3.1.2.3") == "US"
+    assert ip_to_country_code("4.1.2.3") is None
+
+
+@pytest.mark.django_db
+def test_import_maxmind_database_empty_file(tmp_path, maxmind_files):
+    """An import with no usable rows should fail and leave the existing data alone"""
+    import_maxmind_database(
+        MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
+        maxmind_files[MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE],
+    )
+    empty_file = tmp_path / "empty.csv"
+    empty_file.write_text("network,geoname_id\n")
+
+    with pytest.raises(Exception, match="No rows to process"):
+        import_maxmind_database(MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE, str(empty_file))
+
+    assert NetBlock.objects.count() == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_import_maxmind_data_command(maxmind_files):
+    """The management command should report progress and the imported row count"""
+    stdout = StringIO()
+
+    call_command(
+        "import_maxmind_data",
+        maxmind_files[MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE],
+        MAXMIND_CSV_COUNTRY_BLOCKS_IPV4_LITE,
+        stdout=stdout,
+    )
+
+    assert "rows/sec" in stdout.getvalue()
+    assert "2 rows imported" in stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_decimal_range_query_filters_address_family():
+    """The decimal range query shouldn't match a block from the other family"""
+    NetBlockIPv6Factory.create(network="::/96")
+
+    assert ip_to_country_code("10.0.0.1") is None
+
+
+@pytest.mark.parametrize(
+    ("vendor", "enabled", "columns", "expected"),
+    [
+        ("postgresql", True, ["network", "network_cidr"], True),
+        ("postgresql", True, ["network"], False),
+        ("postgresql", False, ["network", "network_cidr"], False),
+        ("sqlite", True, ["network", "network_cidr"], False),
+    ],
+)
+def test_has_cidr_index(mocker, settings, vendor, enabled, columns, expected):  # noqa: PLR0913, PLR0917
+    """The cidr column should only be used if it's turned on and has been added"""
+    settings.MITOL_GEOIP_CIDR_INDEX_ENABLED = enabled
+    mock_connection = mocker.patch.object(api, "connection", vendor=vendor)
+    mock_connection.introspection.get_table_description.return_value = [
+        SimpleNamespace(name=column) for column in columns
+    ]
+    mocker.patch.object(api, "_has_cidr_column", None)
+
+    assert api.has_cidr_index() is expected
+    assert api.has_cidr_index() is expected
+    assert mock_connection.introspection.get_table_description.call_count <= 1
+
+
+@pytest.mark.django_db
+def test_geoip_cidr_index_command_requires_postgresql():
+    """The cidr index command should refuse to run on other databases"""
+    with pytest.raises(CommandError):
+        call_command("geoip_cidr_index")
+
+
+@pytest.mark.django_db
+def test_benchmark_geoip_lookups_command():
+    """The benchmark command should report timings for each available strategy"""
+    NetBlockIPv4Factory.create(network="10.80.0.0/16")
+    stdout = StringIO()
+
+    call_command(
+        "benchmark_geoip_lookups", "--count", "5", "--seed", "1", stdout=stdout
+    )
+
+    assert "decimal range: mean" in stdout.getvalue()
+    assert "in-memory index: mean" in stdout.getvalue()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("index_enabled", [True, False])
+def test_ips_to_country_codes(settings, django_assert_max_num_queries, index_enabled):
+    """Batch lookups should match single lookups with a fixed number of queries"""
+    settings.MITOL_GEOIP_LOOKUP_INDEX_ENABLED = index_enabled
+    france = GeonameFactory.create(country_iso_code="FR")
+    germany = GeonameFactory.create(country_iso_code="DE")
+    NetBlockIPv4Factory.create(network="10.1.0.0/16", geoname_id=france.geoname_id)
+    NetBlockIPv4Factory.create(network="10.3.0.0/16", geoname_id=germany.geoname_id)
+    NetBlockIPv4Factory.create(
+        network="10.5.0.0/16",
+        geoname_id=None,
+        registered_country_geoname_id=germany.geoname_id,
+    )
+    NetBlockIPv6Factory.create(network="::1:0:0/96", geoname_id=france.geoname_id)
+    addresses = [
+        "10.3.0.1",
+        "10.1.0.1",
+        "10.2.0.1",
+        "10.1.255.255",
+        "10.3.0.1",
+        "::1:0:1",
+        "::1:0:0:1",
+        "10.5.0.1",
+        "10.6.0.1",
+    ]
+
+    with django_assert_max_num_queries(3):
+        results = ips_to_country_codes(addresses)
+
+    assert results == {
+        "10.1.0.1": "FR",
+        "10.1.255.255": "FR",
+        "10.2.0.1": None,
+        "10.3.0.1": "DE",
+        "10.5.0.1": "DE",
+        "10.6.0.1": None,
+        "::1:0:1": "FR",
+        "::1:0:0:1": None,
+    }
+    assert results == {address: ip_to_country_code(address) for address in addresses}
+
+
+@pytest.mark.django_db
+def test_ip_to_country_code_cache(settings, django_assert_num_queries):
+    """Single lookups should be cached until an import finishes"""
+    settings.MITOL_GEOIP_LOOKUP_CACHE_SIZE = 10
+    geoname = GeonameFactory.create(country_iso_code="FR")
+    NetBlockIPv4Factory.create(network="10.1.0.0/16", geoname_id=geoname.geoname_id)
+
+    assert ip_to_country_code("10.1.0.1") == "FR"
+    assert ip_to_country_code("10.2.0.1") is None
+
+    with django_assert_num_queries(0):
+        assert ip_to_country_code("10.1.0.1") == "FR"
+        assert ip_to_country_code("10.2.0.1") is None
+
+    lookup.refresh()
+
+    with django_assert_num_queries(2):
+        assert ip_to_country_code("10.1.0.1") == "FR"
+
+
+@pytest.mark.django_db
+def test_ip_to_country_code_netblock_unordered(django_assert_num_queries):
+    """The netblock lookup shouldn't be ordered, so it can use the range index"""
+    geoname = GeonameFactory.create(country_iso_code="FR")
+    NetBlockIPv4Factory.create(network="10.1.0.0/16", geoname_id=geoname.geoname_id)
+
+    with django_assert_num_queries(2) as captured:
+        assert ip_to_country_code("10.1.0.1") == "FR"
+
+    netblock_sql = captured.captured_queries[0]["sql"]
+    assert NetBlock._meta.db_table in netblock_sql  # noqa: SLF001
+    assert "ORDER BY" not in netblock_sql
@@ -0,0 +1,94 @@
+"""
+Tests for the in-memory netblock index.
+"""
+
+import ipaddress
+
+import pytest
+from mitol.geoip import lookup
+from mitol.geoip.api import ip_to_country_code
+from mitol.geoip.factories import (
+    GeonameFactory,
+    NetBlockIPv4Factory,
+    NetBlockIPv6Factory,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def index_enabled(settings):
+    """Enable the in-memory index"""
+    settings.MITOL_GEOIP_LOOKUP_INDEX_ENABLED = True
+    return settings
+
+
+@pytest.mark.parametrize(
+    ("factory", "network"),
+    [
+        (NetBlockIPv4Factory, "10.20.0.0/16"),
+        (NetBlockIPv6Factory, "::1:0:0/96"),
+    ],
+)
+def test_index_lookup(factory, network):
+    """The index should resolve addresses inside a block and nothing outside it"""
+    geoname = GeonameFactory.create(country_iso_code="FR")
+    factory.create(network=network, geoname_id=geoname.geoname_id)
+    netblock = ipaddress.ip_network(network)
+
+    index = lookup.NetBlockIndex.build()
+
+    assert index.lookup(str(netblock[0])) == "FR"
+    assert index.lookup(str(netblock[-1])) == "FR"
+    assert index.lookup(str(netblock[-1] + 1)) is None
+    assert index.lookup(str(netblock[0] - 1)) is None
+    assert index.lookup(str(netblock[0]), locale="de") is None
+
+
+def test_index_separates_address_families():
+    """An IPv4 address shouldn't match an IPv6 block with the same integer value"""
+    geoname = GeonameFactory.create(country_iso_code="FR")
+    NetBlockIPv6Factory.create(network="::/96", geoname_id=geoname.geoname_id)
+
+    assert lookup.NetBlockIndex.build().lookup("10.0.0.1") is None
+
+
+def test_index_falls_back_to_registered_country():
+    """If the geoname isn't known, the registered country should be used"""
+    geoname = GeonameFactory.create(country_iso_code="DE")
+    NetBlockIPv4Factory.create(
+        network="10.30.0.0/16",
+        geoname_id=None,
+        registered_country_geoname_id=geoname.geoname_id,
+    )
+
+    assert lookup.NetBlockIndex.build().lookup("10.30.1.1") == "DE"
+
+
+def test_ip_to_country_code_uses_index(index_enabled, django_assert_num_queries):  # noqa: ARG001
+    """Once loaded, lookups should be served without querying the database"""
+    geoname = GeonameFactory.create(country_iso_code="FR")
+    NetBlockIPv4Factory.create(network="10.40.0.0/16", geoname_id=geoname.geoname_id)
+
+    assert ip_to_country_code("10.40.0.1") == "FR"
+
+    with django_assert_num_queries(0):
+        assert ip_to_country_code("10.40.2.3") == "FR"
+        assert ip_to_country_code("10.41.0.1") is None
+
+
+def test_index_is_rebuilt(index_enabled, settings):  # noqa: ARG001
+    """The index should be rebuilt on request and once it is too old"""
+    geoname = GeonameFactory.create(country_iso_code="FR")
+    NetBlockIPv4Factory.create(network="10.50.0.0/16", geoname_id=geoname.geoname_id)
+    assert ip_to_country_code("10.60.0.1") is None
+
+    NetBlockIPv4Factory.create(network="10.60.0.0/16", geoname_id=geoname.geoname_id)
+    assert ip_to_country_code("10.60.0.1") is None
+
+    lookup.rebuild_index()
+    assert ip_to_country_code("10.60.0.1") == "FR"
+
+    NetBlockIPv4Factory.create(network="10.70.0.0/16", geoname_id=geoname.geoname_id)
+    settings.MITOL_GEOIP_LOOKUP_INDEX_MAX_AGE_SECONDS = -1
+    assert ip_to_country_code("10.70.0.1") == "FR"
@@ -1,13 +1,46 @@
 """Sheets API tests"""
 
+import datetime
+import threading
+
 import pytest
 from django.core.exceptions import ImproperlyConfigured
 from google.oauth2.credentials import Credentials
-from mitol.google_sheets.api import get_credentials
-from mitol.google_sheets.constants import REQUIRED_GOOGLE_API_SCOPES
+from mitol.common.utils import now_in_utc
+from mitol.google_sheets.api import (
+    build_drive_service,
+    clear_client_pool,
+    get_authorized_pygsheets_client,
+    get_credentials,
+    get_shared_credentials,
+)
+from mitol.google_sheets.constants import (
+    DEFAULT_GOOGLE_EXPIRE_TIMEDELTA,
+    REQUIRED_GOOGLE_API_SCOPES,
+)
 from mitol.google_sheets.factories import GoogleApiAuthFactory
 
 
+@pytest.fixture(autouse=True)
+def empty_client_pool():
+    """Don't share credentials or clients between tests"""
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+@pytest.fixture
+def mock_get_credentials(mocker):
+    """Return credentials that are valid for another hour"""
+    return mocker.patch(
+        "mitol.google_sheets.api.get_credentials",
+        side_effect=lambda: mocker.Mock(
+            spec=Credentials,
+            expiry=now_in_utc().replace(tzinfo=None) + datetime.timedelta(hours=1),
+        ),
+    )
+
+
 @pytest.mark.django_db
 def test_get_credentials_service_account(mocker, settings):
     """
@@ -53,3 +86,75 @@ def test_get_credentials_personal_auth(settings):
     assert isinstance(credentials, Credentials)
     assert credentials.token == google_api_auth.access_token
     assert credentials.refresh_token == google_api_auth.refresh_token
+    # credentials that weren't refreshed expire an hour after they were last saved
+    assert credentials.expiry == (
+        google_api_auth.updated_on
+        + datetime.timedelta(**DEFAULT_GOOGLE_EXPIRE_TIMEDELTA)
+    ).astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def test_get_shared_credentials(settings, mock_get_credentials):
+    """Credentials should be reused until they're close to expiring"""
+    settings.MITOL_GOOGLE_SHEETS_CREDENTIALS_REFRESH_MARGIN_SECONDS = 60
+    credentials = get_shared_credentials()
+    assert get_shared_credentials() is credentials
+    mock_get_credentials.assert_called_once()
+
+    credentials.expiry = now_in_utc().replace(tzinfo=None) + datetime.timedelta(
+        seconds=30
+    )
+    assert get_shared_credentials() is not credentials
+    assert mock_get_credentials.call_count == 2  # noqa: PLR2004
+
+
+def test_get_shared_credentials_pool_disabled(settings, mock_get_credentials):
+    """Credentials should be loaded every time if the client pool is turned off"""
+    settings.MITOL_GOOGLE_SHEETS_CLIENT_POOL_ENABLED = False
+    assert get_shared_credentials() is not get_shared_credentials()
+    assert mock_get_credentials.call_count == 2  # noqa: PLR2004
+
+
+def test_get_authorized_pygsheets_client_pooled(
+    mocker,
+    settings,
+    mock_get_credentials,  # noqa: ARG001
+):
+    """The pygsheets client should be reused within a thread"""
+    settings.MITOL_GOOGLE_SHEETS_DRIVE_SHARED_ID = None
+    mock_authorize = mocker.patch(
+        "mitol.google_sheets.api.pygsheets.authorize",
+        side_effect=lambda **kwargs: mocker.Mock(),  # noqa: ARG005
+    )
+    client = get_authorized_pygsheets_client()
+    assert get_authorized_pygsheets_client() is client
+    mock_authorize.assert_called_once_with(custom_credentials=get_shared_credentials())
+
+    thread_clients = []
+    thread = threading.Thread(
+        target=lambda: thread_clients.append(get_authorized_pygsheets_client())
+    )
+    thread.start()
+    thread.join()
+    assert thread_clients[0] is not client
+
+    clear_client_pool()
+    assert get_authorized_pygsheets_client() is not client
+    assert mock_authorize.call_count == 3  # noqa: PLR2004
+
+
+def test_build_drive_service_pooled(mocker, mock_get_credentials):  # noqa: ARG001
+    """The Drive service should be built from the bundled discovery document once"""
+    mock_build = mocker.patch("mitol.google_sheets.api.build")
+    assert build_drive_service() is build_drive_service()
+    mock_build.assert_called_once_with(
+        "drive",
+        "v3",
+        credentials=get_shared_credentials(),
+        cache_discovery=False,
+        static_discovery=True,
+    )
+
+    # services built with specific credentials aren't pooled
+    credentials = mocker.Mock()
+    build_drive_service(credentials)
+    assert mock_build.call_args.kwargs["credentials"] is credentials
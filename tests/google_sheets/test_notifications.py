@@ -0,0 +1,78 @@
+"""Tests for coalescing file change notifications"""
+
+import pytest
+from mitol.google_sheets import notifications
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def notification_settings(settings):
+    """Keep notification state in the test cache"""
+    settings.MITOL_GOOGLE_SHEETS_NOTIFICATION_CACHE_NAME = "durable"
+    settings.MITOL_GOOGLE_SHEETS_NOTIFICATION_DEBOUNCE_SECONDS = 10
+    return settings
+
+
+def test_notifications_coalesced(mocker):
+    """Notifications should schedule one run until it starts"""
+    schedule = mocker.Mock()
+
+    assert [
+        notifications.coalesce_notification("sheet-1", schedule) for _ in range(5)
+    ] == [True, False, False, False, False]
+    assert notifications.coalesce_notification("sheet-2", schedule) is True
+    assert schedule.call_args_list == [mocker.call(10), mocker.call(10)]
+
+    process = mocker.Mock(return_value="results")
+    assert notifications.run_coalesced("sheet-1", process, schedule) == "results"
+    process.assert_called_once_with()
+
+    # once a run has started, the next notification schedules another one
+    assert notifications.coalesce_notification("sheet-1", schedule) is True
+    assert notifications.get_notification_metrics("sheet-1") == {
+        notifications.METRIC_NOTIFICATIONS_RECEIVED: 6,
+        notifications.METRIC_NOTIFICATIONS_COALESCED: 4,
+        notifications.METRIC_RUNS_EXECUTED: 1,
+        notifications.METRIC_RUNS_DEFERRED: 0,
+    }
+
+
+def test_notifications_during_run(mocker):
+    """A sheet being processed should get exactly one follow-up run"""
+    scheduled = []
+
+    def process():
+        for _ in range(3):
+            notifications.coalesce_notification("sheet", scheduled.append)
+        # the follow-up starts while this run is still going
+        assert (
+            notifications.run_coalesced("sheet", mocker.Mock(), scheduled.append)
+            is None
+        )
+
+    notifications.coalesce_notification("sheet", scheduled.append)
+    notifications.run_coalesced("sheet", process, scheduled.append)
+
+    # the first run, the follow-up, and the follow-up again after it was deferred
+    assert scheduled == [10, 10, 10]
+    assert notifications.coalesce_notification("sheet", scheduled.append) is False
+
+    follow_up = mocker.Mock()
+    notifications.run_coalesced("sheet", follow_up, scheduled.append)
+    follow_up.assert_called_once_with()
+    assert notifications.get_notification_metrics("sheet") == {
+        notifications.METRIC_NOTIFICATIONS_RECEIVED: 5,
+        notifications.METRIC_NOTIFICATIONS_COALESCED: 3,
+        notifications.METRIC_RUNS_EXECUTED: 2,
+        notifications.METRIC_RUNS_DEFERRED: 1,
+    }
+
+
+def test_run_releases_lock_on_error(mocker):
+    """A run that fails shouldn't stop the next one"""
+    process = mocker.Mock(side_effect=[ValueError, "results"])
+    with pytest.raises(ValueError):  # noqa: PT011
+        notifications.run_coalesced("sheet", process, mocker.Mock())
+
+    assert notifications.run_coalesced("sheet", process, mocker.Mock()) == "results"
@@ -1,7 +1,18 @@
+import threading
+
 import pytest
-from mitol.google_sheets.sheet_handler_api import SheetHandler
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from mitol.google_sheets.sheet_handler_api import (
+    GoogleSheetsChangeRequestHandler,
+    SheetHandler,
+    get_row_digest,
+)
+from mitol.google_sheets.utils import ResultType, RowResult
 from pytest_lazy_fixtures import lf as lazy_fixture
 
+User = get_user_model()
+
 
 @pytest.mark.usefixtures("google_sheets_base_settings")
 @pytest.mark.parametrize(
@@ -15,3 +26,262 @@ def test_is_configured_missing(_creds):
     """Test that is_configured returns correctly"""
     handler = SheetHandler()
     assert handler.is_configured() is True
+
+
+class ErrorSheetHandler(SheetHandler):
+    """SheetHandler that fails every row with a message from its second column"""
+
+    def __init__(self, mocker, rows):
+        self.pygsheets_client = mocker.MagicMock()
+        self.spreadsheet = mocker.Mock(id="abc123")
+        self.worksheet = mocker.Mock(title="Bob's requests")
+        self.sheet_metadata = mocker.Mock(ERROR_COL_LETTER="C")
+        self.rows = rows
+
+    def get_enumerated_rows(self):
+        return enumerate(self.rows, start=2)
+
+    def process_row(self, row_index, row_data):
+        return RowResult(
+            row_index=row_index,
+            row_db_record=None,
+            row_object=None,
+            result_type=ResultType.FAILED,
+            message=row_data[1],
+        )
+
+    @property
+    def mock_batch_update(self):
+        spreadsheets = self.pygsheets_client.sheet.service.spreadsheets
+        return spreadsheets.return_value.values.return_value.batchUpdate
+
+
+def test_process_sheet_batches_cell_updates(mocker):
+    """process_sheet should write all changed result cells in one request"""
+    handler = ErrorSheetHandler(
+        mocker,
+        [
+            ["1", "error 1", ""],
+            ["2", "error 2", "error 2"],
+            ["3", "error 3", "old error"],
+            ["4", "error 4"],
+        ],
+    )
+
+    handler.process_sheet()
+
+    handler.mock_batch_update.assert_called_once_with(
+        spreadsheetId="abc123",
+        body={
+            "valueInputOption": "USER_ENTERED",
+            "data": [
+                {"range": f"'Bob''s requests'!C{row}:C{row}", "values": [[message]]}
+                for row, message in [(2, "error 1"), (4, "error 3"), (5, "error 4")]
+            ],
+        },
+    )
+
+
+def test_process_sheet_no_changes(mocker):
+    """process_sheet shouldn't write anything if every result cell is unchanged"""
+    handler = ErrorSheetHandler(
+        mocker, [["1", "error 1", "error 1"], ["2", "error 2", "error 2"]]
+    )
+
+    assert handler.process_sheet() == {ResultType.FAILED.value: [2, 3]}
+    handler.mock_batch_update.assert_not_called()
+
+
+def test_write_queued_cell_updates_merges_ranges(mocker):
+    """Updates to neighboring cells in a row should be written as one range"""
+    handler = ErrorSheetHandler(mocker, [])
+    handler.queue_cell_updates(5, "B", ["app", "=DATE(2026,10,17)"])
+    handler.queue_cell_updates(5, "D", [""])
+    handler.queue_cell_updates(7, "D", ["error"])
+
+    handler.write_queued_cell_updates()
+
+    assert handler.mock_batch_update.call_args.kwargs["body"]["data"] == [
+        {
+            "range": "'Bob''s requests'!B5:D5",
+            "values": [["app", "=DATE(2026,10,17)", ""]],
+        },
+        {"range": "'Bob''s requests'!D7:D7", "values": [["error"]]},
+    ]
+    handler.mock_batch_update.reset_mock()
+
+    # the queue is emptied once it's written
+    assert handler.write_queued_cell_updates() is None
+    handler.mock_batch_update.assert_not_called()
+
+
+class IncrementalSheetHandler(ErrorSheetHandler):
+    """SheetHandler that ignores, skips or fails rows based on their second column"""
+
+    incremental = True
+
+    def __init__(self, mocker, rows):
+        super().__init__(mocker, rows)
+        self.worksheet.id = 1
+        self.process_row = mocker.Mock(side_effect=self._process_row)
+
+    def _process_row(self, row_index, row_data):
+        if row_data[1] == "skip":
+            return None
+        return RowResult(
+            row_index=row_index,
+            row_db_record=None,
+            row_object=None,
+            result_type=ResultType.IGNORED
+            if row_data[1] == "ignore"
+            else ResultType.FAILED,
+            message=row_data[1],
+        )
+
+
+@pytest.mark.django_db
+def test_process_sheet_incremental(mocker, settings):
+    """Rows that needed no processing should be skipped until they change"""
+    settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME = "durable"
+    rows = [["1", "ignore"], ["2", "skip"], ["3", "error", "error"]]
+
+    handler = IncrementalSheetHandler(mocker, rows)
+    handler.process_sheet()
+    assert handler.process_row.call_count == 3  # noqa: PLR2004
+
+    handler = IncrementalSheetHandler(mocker, rows)
+    assert handler.process_sheet() == {ResultType.FAILED.value: [4]}
+    handler.process_row.assert_called_once_with(4, rows[2])
+
+    rows[0] = ["1", "changed"]
+    handler = IncrementalSheetHandler(mocker, rows)
+    handler.process_sheet()
+    assert [call.args[0] for call in handler.process_row.call_args_list] == [2, 4]
+
+    handler.clear_unchanged_row_digests()
+    handler = IncrementalSheetHandler(mocker, rows)
+    handler.process_sheet()
+    assert handler.process_row.call_count == 3  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_process_sheet_incremental_single_row(mocker, settings):
+    """Processing a single row shouldn't skip it or change the saved row hashes"""
+    settings.MITOL_GOOGLE_SHEETS_INCREMENTAL_CACHE_NAME = "durable"
+    handler = IncrementalSheetHandler(mocker, [["1", "ignore"]])
+    handler.process_sheet()
+    handler.worksheet.get_row.return_value = ["1", "ignore"]
+
+    handler.process_sheet(limit_row_index=2)
+
+    assert handler.process_row.call_count == 2  # noqa: PLR2004
+    assert handler.get_unchanged_row_digests() == {2: get_row_digest(["1", "ignore"])}
+
+
+class ConcurrentSheetHandler(ErrorSheetHandler):
+    """SheetHandler that skips, raises or fails rows once they're all being processed"""
+
+    def __init__(self, mocker, rows, workers):
+        super().__init__(mocker, rows)
+        self.all_rows_started = threading.Barrier(workers, timeout=5)
+        self.thread_names = set()
+
+    def process_row(self, row_index, row_data):
+        self.all_rows_started.wait()
+        self.thread_names.add(threading.current_thread().name)
+        if row_data[1] == "skip":
+            return None
+        if row_data[1] == "raise":
+            msg = "Gateway timeout"
+            raise ConnectionError(msg)
+        return super().process_row(row_index, row_data)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_process_sheet_concurrent(mocker, settings, workers):
+    """Rows should be processed by a pool of threads, and fail independently"""
+    settings.MITOL_GOOGLE_SHEETS_PROCESS_ROW_WORKERS = workers
+    rows = [["1", "raise"], ["2", "skip"], ["3", "error"]]
+    handler = ConcurrentSheetHandler(mocker, rows, workers)
+
+    assert handler.process_sheet() == {ResultType.FAILED.value: [2, 4]}
+    assert len(handler.thread_names) == workers
+    handler.mock_batch_update.assert_called_once()
+    assert [
+        value_range["values"]
+        for value_range in handler.mock_batch_update.call_args.kwargs["body"]["data"]
+    ] == [[["Error: Gateway timeout"]], [["error"]]]
+
+
+def test_change_request_enumerated_rows(mocker, settings):
+    """Rows should be counted from one column and fetched in pages of the configured size"""  # noqa: E501
+    settings.MITOL_GOOGLE_SHEETS_PROCESS_ONLY_LAST_ROWS_NUM = 2
+    settings.MITOL_GOOGLE_SHEETS_VALUE_REQUEST_PAGE_SIZE = 1000
+    mocker.patch(
+        "mitol.google_sheets.sheet_handler_api.get_authorized_pygsheets_client"
+    )
+    mock_get_rows = mocker.patch(
+        "mitol.google_sheets.sheet_handler_api.get_data_rows_after_start",
+        return_value=[["9"], ["10"]],
+    )
+    handler = GoogleSheetsChangeRequestHandler(
+        "sheet-id",
+        1,
+        start_row=3,
+        sheet_metadata=mocker.Mock(FORM_RESPONSE_ID_COL=0, num_columns=8),
+        request_model_cls=None,
+    )
+    handler.worksheet.get_col.return_value = [str(row) for row in range(10)]
+
+    assert list(handler.get_enumerated_rows()) == [(9, ["9"]), (10, ["10"])]
+    handler.worksheet.get_col.assert_called_once_with(1, include_tailing_empty=False)
+    handler.worksheet.get_all_values.assert_not_called()
+    mock_get_rows.assert_called_once_with(
+        handler.worksheet, start_row=9, start_col=1, end_col=8, page_size=1000
+    )
+
+
+def test_change_request_handler_opens_spreadsheet_lazily(mocker):
+    """Creating a handler shouldn't load credentials or open the spreadsheet"""
+    mock_get_client = mocker.patch(
+        "mitol.google_sheets.sheet_handler_api.get_authorized_pygsheets_client"
+    )
+    handler = GoogleSheetsChangeRequestHandler(
+        "sheet-id", 1, start_row=3, sheet_metadata=None, request_model_cls=None
+    )
+    mock_get_client.assert_not_called()
+
+    assert handler.worksheet == (
+        mock_get_client.return_value.open_by_key.return_value.worksheet.return_value
+    )
+    mock_get_client.return_value.open_by_key.assert_called_once_with("sheet-id")
+
+
+class UserLookupSheetHandler(ErrorSheetHandler):
+    """SheetHandler that fails rows for users that don't exist"""
+
+    def __init__(self, mocker, rows):
+        super().__init__(mocker, rows)
+        self.thread_names = set()
+
+    def process_row(self, row_index, row_data):
+        self.thread_names.add(threading.current_thread().name)
+        if User.objects.filter(username=row_data[1]).exists():
+            return None
+        return super().process_row(row_index, row_data)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_process_sheet_concurrent_in_transaction(mocker, settings):
+    """Rows should be processed in the calling thread inside a transaction"""
+    settings.MITOL_GOOGLE_SHEETS_PROCESS_ROW_WORKERS = 3
+    rows = [["1", "user_1"], ["2", "user_2"], ["3", "missing"]]
+    handler = UserLookupSheetHandler(mocker, rows)
+
+    with transaction.atomic():
+        User.objects.create(username="user_1")
+        User.objects.create(username="user_2")
+        results = handler.process_sheet()
+
+    assert results == {ResultType.FAILED.value: [4]}
+    assert handler.thread_names == {threading.current_thread().name}
@@ -40,7 +40,7 @@ def pygsheets_fixtures(mocker, db, request_csv_rows):  # noqa: ARG001
         oauth=Mock(),
         open_by_key=Mock(return_value=mocked_spreadsheet),
         drive=MagicMock(spec=DriveAPIWrapper),
-        sheet=MagicMock(spec=SheetAPIWrapper),
+        sheet=MagicMock(spec=SheetAPIWrapper, service=MagicMock()),
         create=Mock(return_value=mocked_spreadsheet),
     )
     mocker.patch(
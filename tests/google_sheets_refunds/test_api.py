@@ -1,11 +1,13 @@
 """Refund request API tests"""
 
+import json
 from types import SimpleNamespace
 
 import pytest
 from mitol.google_sheets.factories import GoogleApiAuthFactory
 from mitol.google_sheets.utils import ResultType
 from mitol.google_sheets_refunds.api import RefundRequestHandler
+from mitol.google_sheets_refunds.models import RefundRequest
 from pygsheets import Spreadsheet, Worksheet
 from pygsheets.client import Client as PygsheetsClient
 from pygsheets.drive import DriveAPIWrapper
@@ -40,7 +42,7 @@ def pygsheets_fixtures(mocker, db, request_csv_rows):  # noqa: ARG001
         oauth=Mock(),
         open_by_key=Mock(return_value=mocked_spreadsheet),
         drive=MagicMock(spec=DriveAPIWrapper),
-        sheet=MagicMock(spec=SheetAPIWrapper),
+        sheet=MagicMock(spec=SheetAPIWrapper, service=MagicMock()),
         create=Mock(return_value=mocked_spreadsheet),
     )
     mocker.patch(
@@ -161,3 +163,56 @@ def test_full_sheet_process(db, settings, mocker, pygsheets_fixtures, request_cs
         "Rows %s as defined in refund_requests.csv should fail"  # noqa: UP031
         % str(expected_failed_rows)
     )
+
+
+def test_prepare_requests(
+    settings,
+    mocker,
+    pygsheets_fixtures,  # noqa: ARG001
+    request_csv_rows,
+    django_assert_max_num_queries,
+):
+    """
+    prepare_requests should create and update the request records for all of the rows in bulk, and
+    get_or_create_request should return them without locking each row
+    """  # noqa: E501
+    settings.MITOL_GOOGLE_SHEETS_ENROLLMENT_CHANGE_SHEET_ID = "1"
+    mocker.patch("mitol.google_sheets_refunds.api.get_plugin_manager")
+    handler = RefundRequestHandler()
+    changed_row, new_row = request_csv_rows[0], request_csv_rows[1]
+    changed_request = RefundRequest.objects.create(
+        form_response_id=int(changed_row[0]), raw_data="old"
+    )
+    unchanged_request = RefundRequest.objects.create(
+        form_response_id=int(request_csv_rows[2][0]),
+        raw_data=json.dumps(
+            handler.sheet_metadata.get_form_input_columns(request_csv_rows[2])
+        ),
+    )
+    invalid_row = ["not-an-id", *changed_row[1:]]
+
+    with django_assert_max_num_queries(6):
+        handler.prepare_requests(
+            list(enumerate([*request_csv_rows[:3], invalid_row], start=2))
+        )
+
+    spy_select_for_update = mocker.spy(RefundRequest.objects, "select_for_update")
+    request, created, updated = handler.get_or_create_request(changed_row)
+    assert (request.id, created, updated) == (changed_request.id, False, True)
+    assert RefundRequest.objects.get(id=changed_request.id).raw_data == request.raw_data
+
+    request, created, updated = handler.get_or_create_request(new_row)
+    assert (created, updated) == (True, False)
+    assert RefundRequest.objects.get(form_response_id=int(new_row[0])) == request
+
+    request, created, updated = handler.get_or_create_request(request_csv_rows[2])
+    assert (request, created, updated) == (unchanged_request, False, False)
+
+    # a repeated row gets the record as it is now
+    assert handler.get_or_create_request(new_row)[1:] == (False, False)
+    spy_select_for_update.assert_not_called()
+
+    # rows that weren't prepared fall back to a locked get_or_create
+    request, created, updated = handler.get_or_create_request(request_csv_rows[4])
+    assert (created, updated) == (True, False)
+    spy_select_for_update.assert_called_once()
@@ -4,6 +4,7 @@ Hubspot API tests
 
 import json
 from collections.abc import Iterable
+from http import HTTPStatus
 
 import pytest
 from django.contrib.auth import get_user_model
@@ -705,30 +706,322 @@ def test_find_line_item(mocker, product_id, quantity, raise_error):
     mock_get_lines_for_deal.assert_called_once_with(deal_id)
 
 
-def test_get_line_items_for_deal(mocker, mock_hubspot_api):
-    """get_line_items_for_deal should make expected api calls and return expected results"""  # noqa: E501
-    mock_lines = SimplePublicObjectFactory.create_batch(2)
-    mock_associations = [
-        mocker.Mock(to_object_id=line.id, association_types=[]) for line in mock_lines
-    ]
+def _association_page(mocker, to_ids, after=None):
+    """Return a mock page of v4 associations"""
+    return mocker.Mock(
+        results=[
+            mocker.Mock(to_object_id=to_id, association_types=[]) for to_id in to_ids
+        ],
+        paging=mocker.Mock(next=mocker.Mock(after=after)) if after else None,
+    )
+
+
+def test_get_associated_ids(mocker, mock_hubspot_api):
+    """get_associated_ids should return the ids from every page of associations"""
     mock_get_page = mock_hubspot_api.return_value.crm.associations.v4.basic_api.get_page
-    mock_get_page.return_value = mocker.Mock(results=mock_associations)
-    mock_hubspot_api.return_value.crm.line_items.basic_api.get_by_id.side_effect = (
-        mock_lines[0],
-        mock_lines[1],
+    mock_get_page.side_effect = [
+        _association_page(mocker, ["1", "2"], after="abc"),
+        _association_page(mocker, ["3"]),
+    ]
+
+    assert api.get_associated_ids("deals", "111123", "line_items") == ["1", "2", "3"]
+    assert mock_get_page.call_args_list == [
+        mocker.call(
+            object_type="deals",
+            object_id="111123",
+            to_object_type="line_items",
+            after=after,
+            limit=api.HUBSPOT_ASSOCIATIONS_PAGE_LIMIT,
+        )
+        for after in (None, "abc")
+    ]
+
+
+def _line_items_response(mocker, batch_input, missing=()):
+    """Return a mock batch read response for line items"""
+    return mocker.Mock(
+        results=[
+            SimplePublicObjectFactory(id=item.id)
+            for item in batch_input.inputs
+            if item.id not in missing
+        ]
+    )
+
+
+@pytest.mark.parametrize("properties", [None, ["hs_product_id", "quantity"]])
+def test_get_line_items_for_deal(mocker, mock_hubspot_api, properties):
+    """get_line_items_for_deal should read the deal's line items in batches"""
+    mocker.patch(
+        "mitol.hubspot_api.api.get_associated_ids",
+        return_value=[str(line_id) for line_id in range(150)],
+    )
+    mock_read = mock_hubspot_api.return_value.crm.line_items.batch_api.read
+    mock_read.side_effect = lambda batch_input: _line_items_response(
+        mocker, batch_input, missing={"7"}
     )
     deal_id = "111123"
-    results = api.get_line_items_for_deal(deal_id)
-    mock_get_page.assert_called_once_with(
-        object_type="deals",
-        object_id=deal_id,
-        to_object_type=api.HubspotObjectType.LINES.value,
+
+    results = api.get_line_items_for_deal(deal_id, properties=properties)
+
+    api.get_associated_ids.assert_called_once_with(
+        "deals", deal_id, api.HubspotObjectType.LINES.value
     )
-    assert (
-        mock_hubspot_api.return_value.crm.line_items.basic_api.get_by_id.call_count == 2  # noqa: PLR2004
+    assert [line.id for line in results] == [
+        str(line_id)
+        for line_id in range(150)
+        if line_id != 7  # noqa: PLR2004
+    ]
+    assert mock_read.call_count == 2  # noqa: PLR2004
+    for call in mock_read.call_args_list:
+        assert call.args[0].properties == (properties or [])
+    mock_hubspot_api.return_value.crm.line_items.basic_api.get_by_id.assert_not_called()
+
+
+def test_get_line_items_for_deals(mocker, mock_hubspot_api):
+    """get_line_items_for_deals should batch read associations and line items"""
+    mock_get_page = mock_hubspot_api.return_value.crm.associations.v4.batch_api.get_page
+    pages = {
+        ("d1", None): (["1", "2"], "next"),
+        ("d1", "next"): (["3"], None),
+        ("d2", None): (["4"], None),
+    }
+
+    def get_page(from_object_type, to_object_type, **kwargs):
+        assert from_object_type == "deals"
+        assert to_object_type == "line_items"
+        batch_input = kwargs["batch_input_public_fetch_associations_batch_request"]
+        return mocker.Mock(
+            results=[
+                mocker.Mock(
+                    _from=mocker.Mock(id=item.id),
+                    to=_association_page(
+                        mocker, pages[(item.id, item.after)][0]
+                    ).results,
+                    paging=_association_page(
+                        mocker, [], after=pages[(item.id, item.after)][1]
+                    ).paging,
+                )
+                for item in batch_input.inputs
+                # deals without line items aren't in the results
+                if (item.id, item.after) in pages
+            ]
+        )
+
+    mock_get_page.side_effect = get_page
+    mock_read = mock_hubspot_api.return_value.crm.line_items.batch_api.read
+    mock_read.side_effect = lambda batch_input: _line_items_response(
+        mocker, batch_input
     )
-    for line in mock_lines:
-        mock_hubspot_api.return_value.crm.line_items.basic_api.get_by_id.assert_any_call(
-            line.id
+
+    results = api.get_line_items_for_deals(["d1", "d2", "d3"])
+
+    assert {
+        deal_id: [line.id for line in lines] for deal_id, lines in results.items()
+    } == {"d1": ["1", "2", "3"], "d2": ["4"], "d3": []}
+    assert mock_get_page.call_count == 2  # noqa: PLR2004
+    mock_read.assert_called_once()
+    assert {item.id for item in mock_read.call_args.args[0].inputs} == {
+        "1",
+        "2",
+        "3",
+        "4",
+    }
+
+
+def _batch_response(mocker, batch_input, hubspot_ids=None):
+    """Return a mock batch response echoing the inputs' trace ids"""
+    return mocker.Mock(
+        results=[
+            SimplePublicObject(
+                id=(hubspot_ids or {}).get(item.object_write_trace_id)
+                or getattr(item, "id", None)
+                or f"hs{item.object_write_trace_id}",
+                object_write_trace_id=item.object_write_trace_id,
+            )
+            for item in batch_input.inputs
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_batch_upsert_objects(
+    mocker, mock_hubspot_api, content_type_obj, django_assert_num_queries
+):
+    """batch_upsert_objects should update known objects and create new ones in batches"""  # noqa: E501
+    existing = HubspotObjectFactory.create(content_type=content_type_obj, object_id=1)
+    batch_api = mock_hubspot_api.return_value.crm.objects.batch_api
+    batch_api.update.side_effect = lambda _, batch_input: _batch_response(
+        mocker, batch_input
+    )
+    batch_api.create.side_effect = lambda _, batch_input: _batch_response(
+        mocker, batch_input
+    )
+    bodies = {
+        object_id: SimplePublicObjectInput(properties={"name": f"obj{object_id}"})
+        for object_id in [3, 1, 2]
+    }
+
+    with django_assert_num_queries(2):
+        results = api.batch_upsert_objects(
+            content_type_obj, api.HubspotObjectType.DEALS.value, bodies
+        )
+
+    assert [(result.object_id, result.hubspot_id) for result in results] == [
+        (3, "hs3"),
+        (1, existing.hubspot_id),
+        (2, "hs2"),
+    ]
+    assert all(result.error is None for result in results)
+    update_inputs = batch_api.update.call_args.args[1].inputs
+    assert [item.id for item in update_inputs] == [existing.hubspot_id]
+    create_inputs = batch_api.create.call_args.args[1].inputs
+    assert [item.properties for item in create_inputs] == [
+        {"name": "obj3"},
+        {"name": "obj2"},
+    ]
+    assert dict(
+        HubspotObject.objects.filter(content_type=content_type_obj).values_list(
+            "object_id", "hubspot_id"
         )
-    assert results == mock_lines
+    ) == {1: existing.hubspot_id, 2: "hs2", 3: "hs3"}
+
+
+@pytest.mark.django_db
+def test_batch_upsert_objects_chunks(mocker, mock_hubspot_api, content_type_obj):
+    """Objects should be sent in batches of the given size"""
+    batch_api = mock_hubspot_api.return_value.crm.objects.batch_api
+    batch_api.create.side_effect = lambda _, batch_input: _batch_response(
+        mocker, batch_input
+    )
+    bodies = {
+        object_id: SimplePublicObjectInput(properties={}) for object_id in range(1, 6)
+    }
+
+    api.batch_upsert_objects(
+        content_type_obj, api.HubspotObjectType.DEALS.value, bodies, batch_size=2
+    )
+
+    assert [len(call.args[1].inputs) for call in batch_api.create.call_args_list] == [
+        2,
+        2,
+        1,
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_upsert_objects_id_property(mocker, mock_hubspot_api, content_type_obj):
+    """New objects should be upserted on id_property if one is given"""
+    batch_api = mock_hubspot_api.return_value.crm.objects.batch_api
+    batch_api.upsert.side_effect = lambda _, batch_input: _batch_response(
+        mocker, batch_input, hubspot_ids={"1": "hs1"}
+    )
+    body = SimplePublicObjectInput(properties={"email": "a@b.com"})
+
+    (result,) = api.batch_upsert_objects(
+        content_type_obj,
+        api.HubspotObjectType.CONTACTS.value,
+        {1: body},
+        id_property="email",
+    )
+
+    assert result.hubspot_id == "hs1"
+    (upsert_input,) = batch_api.upsert.call_args.args[1].inputs
+    assert upsert_input.id == "a@b.com"
+    assert upsert_input.id_property == "email"
+    batch_api.create.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_batch_upsert_objects_id_property_missing(
+    mocker, mock_hubspot_api, content_type_obj
+):
+    """New objects without a value for id_property should be upserted on their own"""
+    batch_api = mock_hubspot_api.return_value.crm.objects.batch_api
+    batch_api.upsert.side_effect = lambda _, batch_input: _batch_response(
+        mocker, batch_input, hubspot_ids={"1": "hs1"}
+    )
+    mock_upsert = mocker.patch(
+        "mitol.hubspot_api.api.upsert_object_request",
+        return_value=SimplePublicObject(id="hs2"),
+    )
+    bodies = {
+        1: SimplePublicObjectInput(properties={"email": "a@b.com"}),
+        2: SimplePublicObjectInput(properties={"firstname": "Bob"}),
+    }
+
+    results = api.batch_upsert_objects(
+        content_type_obj,
+        api.HubspotObjectType.CONTACTS.value,
+        bodies,
+        id_property="email",
+    )
+
+    assert [result.hubspot_id for result in results] == ["hs1", "hs2"]
+    assert [
+        upsert_input.id for upsert_input in batch_api.upsert.call_args.args[1].inputs
+    ] == ["a@b.com"]
+    mock_upsert.assert_called_once()
+    assert mock_upsert.call_args.kwargs["object_id"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "status", [HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE]
+)
+def test_batch_upsert_objects_batch_error(
+    mocker, mock_hubspot_api, content_type_obj, status
+):
+    """Batch errors other than invalid input or conflicts should be raised"""
+    batch_api = mock_hubspot_api.return_value.crm.objects.batch_api
+    batch_api.create.side_effect = ApiException(status=status)
+    mock_upsert = mocker.patch("mitol.hubspot_api.api.upsert_object_request")
+
+    with pytest.raises(ApiException):
+        api.batch_upsert_objects(
+            content_type_obj,
+            api.HubspotObjectType.DEALS.value,
+            {1: SimplePublicObjectInput(properties={})},
+        )
+    mock_upsert.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("batch_fails", [True, False])
+def test_batch_upsert_objects_fallback(
+    mocker, mock_hubspot_api, content_type_obj, batch_fails
+):
+    """Objects the batch didn't write should be retried one at a time"""
+    batch_api = mock_hubspot_api.return_value.crm.objects.batch_api
+    if batch_fails:
+        batch_api.create.side_effect = ApiException(status=409)
+    else:
+        # the batch only wrote the first object
+        batch_api.create.return_value = mocker.Mock(
+            results=[SimplePublicObject(id="hs1", object_write_trace_id="1")]
+        )
+    error = ApiException(status=400)
+    retry_results = [SimplePublicObject(id="hs2"), error]
+    if batch_fails:
+        retry_results.insert(0, SimplePublicObject(id="hs1"))
+    mock_upsert = mocker.patch(
+        "mitol.hubspot_api.api.upsert_object_request", side_effect=retry_results
+    )
+    bodies = {
+        object_id: SimplePublicObjectInput(properties={}) for object_id in [1, 2, 3]
+    }
+
+    results = api.batch_upsert_objects(
+        content_type_obj,
+        api.HubspotObjectType.DEALS.value,
+        bodies,
+        ignore_conflict=True,
+    )
+
+    assert [(result.hubspot_id, result.error) for result in results] == [
+        ("hs1", None),
+        ("hs2", None),
+        (None, error),
+    ]
+    retried = [call.kwargs["object_id"] for call in mock_upsert.call_args_list]
+    assert retried == ([1, 2, 3] if batch_fails else [2, 3])
+    assert all(call.kwargs["ignore_conflict"] for call in mock_upsert.call_args_list)
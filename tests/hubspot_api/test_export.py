@@ -0,0 +1,131 @@
+"""Tests for resumable hubspot_api exports"""
+
+import json
+
+import pytest
+from django.core.management import call_command
+from mitol.hubspot_api import export
+from mitol.hubspot_api.factories import SimplePublicObjectFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def export_settings(settings):
+    """Save export progress in the test cache"""
+    settings.MITOL_HUBSPOT_API_EXPORT_CACHE_NAME = "durable"
+    return settings
+
+
+@pytest.fixture
+def mock_get_page(mocker):
+    """Mock the paged object API with 3 pages of 2 objects"""
+    objects = SimplePublicObjectFactory.create_batch(6)
+    cursors = [None, "p2", "p3"]
+
+    def get_page(object_type, after, **kwargs):  # noqa: ARG001
+        index = cursors.index(after)
+        return mocker.Mock(
+            results=objects[index * 2 : index * 2 + 2],
+            paging=mocker.Mock(next=mocker.Mock(after=cursors[index + 1]))
+            if index < 2  # noqa: PLR2004
+            else None,
+        )
+
+    mock_api = mocker.patch("mitol.hubspot_api.export.HubspotApi")
+    mock_get_page = mock_api.return_value.crm.objects.basic_api.get_page
+    mock_get_page.side_effect = get_page
+    mock_get_page.objects = objects
+    return mock_get_page
+
+
+def test_export_objects(mocker, mock_get_page):
+    """export_objects should yield every object and save progress after each page"""
+    exported = export.export_objects(
+        "deals", "test", properties=["amount"], associations=["contacts"]
+    )
+
+    assert list(exported)[:2] == mock_get_page.objects[:2]
+    assert mock_get_page.call_args_list[0] == mocker.call(
+        "deals", after=None, limit=100, properties=["amount"], associations=["contacts"]
+    )
+    assert export.get_checkpoint("test") is None
+
+    exported = export.export_objects("deals", "test")
+    assert [next(exported) for _ in range(3)] == mock_get_page.objects[:3]
+    assert export.get_checkpoint("test") == {"after": "p2"}
+
+
+def test_export_objects_resumes(mock_get_page):
+    """export_objects should start from the saved cursor"""
+    export.save_checkpoint("test", {"after": "p3"})
+
+    assert list(export.export_objects("deals", "test")) == mock_get_page.objects[4:]
+    assert export.get_checkpoint("test") is None
+
+
+def test_export_objects_to_file(tmp_path, mock_get_page):
+    """An interrupted export should resume without duplicating objects"""
+    path = tmp_path / "deals.ndjson"
+    get_page = mock_get_page.side_effect
+
+    def fail_on_last_page(object_type, after, **kwargs):
+        if after == "p3":
+            msg = "Connection reset"
+            raise ConnectionError(msg)
+        return get_page(object_type, after, **kwargs)
+
+    mock_get_page.side_effect = fail_on_last_page
+    with pytest.raises(ConnectionError):
+        export.export_objects_to_file("deals", path, export_id="test")
+
+    assert export.get_checkpoint("test") == {
+        "after": "p3",
+        "offset": path.stat().st_size,
+        "count": 4,
+    }
+    # a partly written page that didn't get checkpointed
+    with path.open("ab") as sink:
+        sink.write(b'{"id":"partial"')
+
+    mock_get_page.side_effect = get_page
+    assert export.export_objects_to_file("deals", path, export_id="test") == 6  # noqa: PLR2004
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [
+        obj.id for obj in mock_get_page.objects
+    ]
+    assert export.get_checkpoint("test") is None
+
+
+def test_export_objects_to_file_missing_file(tmp_path, mock_get_page):
+    """If the file of a saved export is gone, the export should start over"""
+    path = tmp_path / "deals.ndjson"
+    export.save_checkpoint("test", {"after": "p3", "offset": 100, "count": 4})
+
+    assert export.export_objects_to_file("deals", path, export_id="test") == 6  # noqa: PLR2004
+    assert mock_get_page.call_args_list[0].kwargs["after"] is None
+
+
+@pytest.mark.parametrize("restart", [True, False])
+def test_export_command(tmp_path, mock_get_page, restart):
+    """The command should export to a file, resuming unless told to restart"""
+    path = tmp_path / "deals.ndjson"
+    path.write_bytes(b"")
+    export.save_checkpoint("deals-export", {"after": "p3", "offset": 0, "count": 4})
+
+    args = ["deals", str(path), "--export-id", "deals-export"]
+    call_command(
+        "export_hubspot_objects",
+        *args,
+        "--properties",
+        "amount",
+        "dealname",
+        *(["--restart"] if restart else []),
+    )
+
+    assert len(path.read_text().splitlines()) == (6 if restart else 2)
+    assert mock_get_page.call_args_list[0].kwargs["properties"] == [
+        "amount",
+        "dealname",
+    ]
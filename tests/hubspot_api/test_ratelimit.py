@@ -0,0 +1,186 @@
+"""Tests for hubspot_api rate limiting"""
+
+import time
+from http import HTTPStatus
+
+import pytest
+from mitol.hubspot_api import api, ratelimit
+from mitol.hubspot_api.exceptions import TooManyRequestsException
+
+pytestmark = pytest.mark.django_db
+
+
+LIMIT = 3
+INTERVAL = 3600
+REPORTED_LIMIT = 5
+RETRY_AFTER = 4
+
+
+@pytest.fixture(autouse=True)
+def rate_limit_settings(settings):
+    """Track the rate limit in the test cache"""
+    settings.MITOL_HUBSPOT_API_RATE_LIMIT_ENABLED = True
+    settings.MITOL_HUBSPOT_API_RATE_LIMIT_CACHE_NAME = "durable"
+    settings.MITOL_HUBSPOT_API_RATE_LIMIT_REQUESTS = LIMIT
+    return settings
+
+
+@pytest.fixture
+def shared_cache(mocker):
+    """Treat the test cache as if it were shared between processes"""
+    mocker.patch.object(ratelimit, "UNSHARED_CACHE_BACKENDS", ())
+
+
+@pytest.fixture
+def limiter():
+    """Return a rate limiter with a long interval, so tests stay within one"""
+    return ratelimit.RateLimiter(
+        "token", limit=LIMIT, interval=INTERVAL, max_wait=10, cache_name="durable"
+    )
+
+
+@pytest.fixture
+def mock_sleep(mocker):
+    """Don't actually wait for the rate limit"""
+    return mocker.patch("mitol.hubspot_api.ratelimit.time.sleep")
+
+
+def test_try_acquire(limiter):
+    """Requests should be allowed up to the limit for the interval"""
+    assert [limiter.try_acquire() for _ in range(LIMIT)] == [0] * LIMIT
+    assert 0 < limiter.try_acquire() <= INTERVAL * 1.05
+
+
+def test_try_acquire_next_interval():
+    """The count should start over in the next interval"""
+    limiter = ratelimit.RateLimiter(
+        "token", limit=1, interval=0.5, max_wait=1, cache_name="durable"
+    )
+    limiter.try_acquire()
+    wait = limiter.try_acquire()
+    assert wait > 0
+
+    time.sleep(wait)
+    assert limiter.try_acquire() == 0
+
+
+def test_limit_is_per_token(limiter):
+    """Each access token should have its own limit"""
+    other = ratelimit.RateLimiter(
+        "other", limit=LIMIT, interval=INTERVAL, max_wait=10, cache_name="durable"
+    )
+    for _ in range(LIMIT):
+        limiter.try_acquire()
+
+    assert limiter.try_acquire() > 0
+    assert other.try_acquire() == 0
+
+
+def test_acquire_waits(mocker, limiter, mock_sleep):
+    """Acquiring should sleep until a request can be made"""
+    mocker.patch.object(limiter, "try_acquire", side_effect=[2.5, 1.0, 0])
+    limiter.acquire()
+    assert mock_sleep.call_args_list == [mocker.call(2.5), mocker.call(1.0)]
+
+
+def test_acquire_max_wait(mocker, limiter, mock_sleep):
+    """Acquiring should raise rather than wait longer than max_wait"""
+    mocker.patch.object(limiter, "try_acquire", return_value=30)
+    with pytest.raises(TooManyRequestsException) as exc:
+        limiter.acquire()
+    assert exc.value.status == HTTPStatus.TOO_MANY_REQUESTS
+    mock_sleep.assert_not_called()
+
+
+def test_update_limit(limiter):
+    """The limit Hubspot reports for the same interval should be used"""
+    limiter.update(
+        {
+            ratelimit.HEADER_MAX: str(REPORTED_LIMIT),
+            ratelimit.HEADER_INTERVAL: str(INTERVAL * 1000),
+        }
+    )
+    assert limiter.get_limit() == REPORTED_LIMIT
+
+    limiter.update({ratelimit.HEADER_MAX: "500000", ratelimit.HEADER_INTERVAL: "1"})
+    assert limiter.get_limit() == REPORTED_LIMIT
+
+    assert [limiter.try_acquire() for _ in range(REPORTED_LIMIT)] == [
+        0
+    ] * REPORTED_LIMIT
+    assert limiter.try_acquire() > 0
+
+
+@pytest.mark.parametrize(("remaining", "paused"), [("0", True), ("1", False)])
+def test_update_remaining(limiter, remaining, paused):
+    """Requests should pause when Hubspot says none are left"""
+    limiter.update({ratelimit.HEADER_REMAINING: remaining})
+    assert (limiter.try_acquire() > 0) is paused
+
+
+def test_backoff(limiter):
+    """A 429 should pause requests for as long as Hubspot asks"""
+    assert (
+        limiter.backoff({ratelimit.HEADER_RETRY_AFTER: str(RETRY_AFTER)}) == RETRY_AFTER
+    )
+    assert RETRY_AFTER - 1 < limiter.try_acquire() <= RETRY_AFTER
+
+    # a shorter pause shouldn't cut the existing one short
+    limiter.pause(1)
+    assert limiter.try_acquire() > RETRY_AFTER - 1
+
+    assert limiter.backoff({}) == limiter.interval
+
+
+@pytest.mark.parametrize("retries", [0, 2])
+def test_pool_manager_retries_429(mocker, retries):
+    """A 429 response should be retried after backing off"""
+    too_many = mocker.Mock(status=429, headers={ratelimit.HEADER_RETRY_AFTER: "1"})
+    ok = mocker.Mock(status=200, headers={})
+    pool_manager = mocker.Mock(request=mocker.Mock(side_effect=[too_many, ok]))
+    limiter = mocker.Mock()
+
+    rate_limited = ratelimit.RateLimitedPoolManager(
+        pool_manager, limiter, retries=retries
+    )
+    response = rate_limited.request("GET", "https://api.hubapi.com", fields=None)
+
+    assert response == (ok if retries else too_many)
+    assert limiter.acquire.call_count == (2 if retries else 1)
+    assert limiter.backoff.call_count == (1 if retries else 0)
+    pool_manager.request.assert_any_call("GET", "https://api.hubapi.com", fields=None)
+    assert rate_limited.clear is pool_manager.clear
+
+
+@pytest.mark.usefixtures("shared_cache")
+def test_api_rate_limited(settings):
+    """HubspotApi should send requests through the rate limiter"""
+    client = api.HubspotApi()
+    pool_manager = client.crm.objects.basic_api.api_client.rest_client.pool_manager
+
+    assert isinstance(pool_manager, ratelimit.RateLimitedPoolManager)
+    assert pool_manager.retries == settings.MITOL_HUBSPOT_API_RETRIES
+    assert HTTPStatus.TOO_MANY_REQUESTS not in client.config["retry"].status_forcelist
+
+
+def test_api_not_rate_limited(settings):
+    """HubspotApi shouldn't rate limit requests if disabled"""
+    settings.MITOL_HUBSPOT_API_RATE_LIMIT_ENABLED = False
+    client = api.HubspotApi()
+    pool_manager = client.crm.objects.basic_api.api_client.rest_client.pool_manager
+
+    assert not isinstance(pool_manager, ratelimit.RateLimitedPoolManager)
+    assert HTTPStatus.TOO_MANY_REQUESTS in client.config["retry"].status_forcelist
+
+
+def test_api_not_rate_limited_unshared_cache(mocker):
+    """HubspotApi shouldn't rate limit requests with a cache that isn't shared"""
+    mock_log = mocker.patch("mitol.hubspot_api.ratelimit.log")
+    mocker.patch.object(ratelimit, "_unshared_cache_warnings", set())
+
+    for _ in range(2):
+        client = api.HubspotApi()
+        pool_manager = client.crm.objects.basic_api.api_client.rest_client.pool_manager
+        assert not isinstance(pool_manager, ratelimit.RateLimitedPoolManager)
+
+    mock_log.warning.assert_called_once()
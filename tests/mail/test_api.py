@@ -1,9 +1,17 @@
 """API tests"""
 
+import os
+
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ImproperlyConfigured
+from main.messages import SampleMessage
 from mitol.mail.api import (
+    BULK_SEND_FAILED,
+    BULK_SEND_SENT,
+    BULK_SEND_SKIPPED,
+    _get_render_executor,
+    _InlineExecutor,
     build_message,
     can_email_user,
     get_connection,
@@ -11,8 +19,10 @@ from mitol.mail.api import (
     get_message_sender,
     render_email_templates,
     safe_format_recipient,
+    send_bulk_messages,
     send_message,
 )
+from mitol.mail.rendering import clear_render_caches
 
 pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("email_settings")]
 
@@ -23,6 +33,7 @@ User = get_user_model()
 def email_settings(settings):
     """Default settings for email tests"""
     settings.MITOL_MAIL_RECIPIENT_OVERRIDE = None
+    clear_render_caches()
 
 
 def test_get_message_classes(mocker, settings):
@@ -240,3 +251,141 @@ def test_get_message_sender(mocker, shared_context, expected_context):
     mock_send_message.assert_called_once_with(mock_build_message.return_value)
 
     mock_get_connection.return_value.__enter__.assert_called_once_with()
+
+
+@pytest.fixture
+def bulk_settings(settings):
+    """Configure bulk sending with the locmem backend"""
+    settings.MITOL_MAIL_CONNECTION_BACKEND = (
+        "django.core.mail.backends.locmem.EmailBackend"
+    )
+    settings.MITOL_MAIL_BULK_RENDER_PROCESSES = 0
+    settings.SITE_BASE_URL = "http://mit.edu/"
+    settings.SITE_NAME = "MIT"
+
+
+@pytest.fixture
+def mock_stylesheet(responses):
+    """Mock the stylesheet linked from the base email template"""
+    # it may already be cached from rendering in an earlier test
+    responses.assert_all_requests_are_fired = False
+    responses.get(
+        "https://fonts.googleapis.com/css?family=Source+Sans+Pro:300,400,400i,700",
+    )
+
+
+@pytest.mark.usefixtures("bulk_settings", "mock_stylesheet")
+def test_send_bulk_messages(mocker, mailoutbox):
+    """send_bulk_messages should send in chunks and skip users who can't be emailed"""
+    users = [
+        User.objects.create(username=f"user{idx}", email=email, first_name=f"U{idx}")
+        for idx, email in enumerate(["one@localhost", "", "three@localhost"])
+    ]
+    recipients = [(user, {}) for user in users] + [("four@localhost", {})]
+
+    with get_connection() as connection:
+        send_messages = mocker.spy(connection, "send_messages")
+        results = list(
+            send_bulk_messages(
+                connection, SampleMessage, iter(recipients), chunk_size=2, tags=["t"]
+            )
+        )
+
+    assert [(result.recipient, result.status) for result in results] == [
+        (users[0], BULK_SEND_SENT),
+        (users[1], BULK_SEND_SKIPPED),
+        (users[2], BULK_SEND_SENT),
+        ("four@localhost", BULK_SEND_SENT),
+    ]
+    assert [len(call.args[0]) for call in send_messages.call_args_list] == [1, 2]
+    assert [message.to for message in mailoutbox] == [
+        [safe_format_recipient(users[0])],
+        [safe_format_recipient(users[2])],
+        ["four@localhost"],
+    ]
+    assert [message.subject for message in mailoutbox] == [
+        "Welcome U0",
+        "Welcome U2",
+        "Welcome",
+    ]
+    assert all(message.tags == ["t"] for message in mailoutbox)
+
+
+@pytest.mark.usefixtures("bulk_settings")
+def test_send_bulk_messages_failures(mocker):
+    """Rendering and sending errors should be reported per recipient"""
+    error = ConnectionError()
+
+    def render(template_context):
+        if template_context["bad"]:
+            raise ValueError
+        return ("subject", "text", "<p>html</p>")
+
+    mocker.patch.object(SampleMessage, "render", side_effect=render)
+
+    with get_connection() as connection:
+        mocker.patch.object(connection, "send_messages", side_effect=error)
+        results = list(
+            send_bulk_messages(
+                connection,
+                SampleMessage,
+                [("one@localhost", {"bad": True}), ("two@localhost", {"bad": False})],
+            )
+        )
+
+    assert results[0].status == BULK_SEND_FAILED
+    assert isinstance(results[0].error, ValueError)
+    assert results[1] == ("two@localhost", BULK_SEND_FAILED, None, error)
+
+
+RENDER_PROCESSES = 2
+
+
+@pytest.mark.parametrize(
+    ("setting", "processes", "expected_pool"),
+    [
+        (None, None, False),
+        (0, None, False),
+        (RENDER_PROCESSES, None, True),
+        (0, RENDER_PROCESSES, True),
+        (RENDER_PROCESSES, 0, False),
+    ],
+)
+@pytest.mark.usefixtures("mock_stylesheet")
+def test_send_bulk_messages_render_processes(
+    mocker, settings, setting, processes, expected_pool
+):
+    """Messages should only be rendered in a process pool if asked to"""
+    settings.MITOL_MAIL_CONNECTION_BACKEND = (
+        "django.core.mail.backends.locmem.EmailBackend"
+    )
+    if setting is None:
+        del settings.MITOL_MAIL_BULK_RENDER_PROCESSES
+    else:
+        settings.MITOL_MAIL_BULK_RENDER_PROCESSES = setting
+    mock_pool = mocker.patch("mitol.mail.api.ProcessPoolExecutor")
+    mock_pool.return_value.__enter__.return_value.submit.side_effect = (
+        lambda func, *args: _InlineExecutor().submit(func, *args)
+    )
+
+    with get_message_sender(SampleMessage) as sender:
+        results = list(
+            sender.build_and_send_messages(
+                [("user@localhost", {})], processes=processes
+            )
+        )
+
+    assert [result.status for result in results] == [BULK_SEND_SENT]
+    assert mock_pool.called is expected_pool
+    if expected_pool:
+        assert mock_pool.call_args.kwargs["max_workers"] == RENDER_PROCESSES
+        assert mock_pool.call_args.kwargs["mp_context"].get_start_method() in (
+            "forkserver",
+            "spawn",
+        )
+
+
+def test_render_executor_process_pool():
+    """Render workers should be started without forking this process"""
+    with _get_render_executor(1) as executor:
+        assert executor.submit(os.getpid).result() != os.getpid()
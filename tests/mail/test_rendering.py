@@ -0,0 +1,69 @@
+"""Rendering tests"""
+
+import premailer
+import pytest
+from mitol.mail import rendering
+from responses import RequestsMock
+
+STYLESHEET_URL = "https://example.com/styles.css"
+
+HTML = """<html><head>
+<link rel="stylesheet" type="text/css" href="{url}" />
+<style type="text/css">
+.red {{
+  color: red;
+}}
+</style>
+</head><body>
+<p class="blue">{greeting}</p>
+<a href="http://example.com" class="red">html link</a>
+</body></html>"""
+
+
+@pytest.fixture(autouse=True)
+def stylesheet(responses: RequestsMock):
+    """Clear the caches and mock the linked stylesheet"""
+    rendering.clear_render_caches()
+    return responses.get(STYLESHEET_URL, body=".blue { color: blue; }")
+
+
+def test_render_html_body_matches_premailer():
+    """The cached rendering should match premailer's"""
+    html = HTML.format(url=STYLESHEET_URL, greeting="Hello")
+
+    text_body, html_body = rendering.render_html_body(html)
+
+    assert html_body == premailer.transform(html)
+    assert 'style="color:blue"' in html_body
+    assert text_body == "Hello\nhtml link (http://example.com)"
+
+
+def test_render_html_body_is_memoized(mocker, stylesheet):
+    """The same html should only be processed once"""
+    inline_css = mocker.spy(rendering, "inline_css")
+    html = HTML.format(url=STYLESHEET_URL, greeting="Hello")
+
+    first = rendering.render_html_body(html)
+    assert rendering.render_html_body(html) == first
+    assert inline_css.call_count == 1
+
+    other = rendering.render_html_body(
+        HTML.format(url=STYLESHEET_URL, greeting="Goodbye")
+    )
+    assert other != first
+    assert inline_css.call_count == 2  # noqa: PLR2004
+
+    # the stylesheet is only downloaded once
+    assert stylesheet.call_count == 1
+
+
+def test_render_cache_disabled(mocker, settings):
+    """Setting the cache size to 0 should turn off memoization"""
+    settings.MITOL_MAIL_RENDER_CACHE_SIZE = 0
+    inline_css = mocker.spy(rendering, "inline_css")
+    html = HTML.format(url=STYLESHEET_URL, greeting="Hello")
+
+    rendering.render_html_body(html)
+    rendering.render_html_body(html)
+
+    assert inline_css.call_count == 2  # noqa: PLR2004
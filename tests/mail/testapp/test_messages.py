@@ -2,11 +2,13 @@
 
 import pytest
 from main.messages import SampleMessage
+from mitol.mail.rendering import clear_render_caches
 from responses import RequestsMock
 
 
 @pytest.fixture(autouse=True)
 def mock_assets(responses: RequestsMock):
+    clear_render_caches()
     responses.get(
         "https://fonts.googleapis.com/css?family=Source+Sans+Pro:300,400,400i,700",
     )
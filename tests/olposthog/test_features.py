@@ -30,6 +30,23 @@ def posthog_settings(settings):
     settings.HOSTNAME = "fake_host_name"
     settings.ENVIRONMENT = "prod"
     caches["durable"].clear()
+    features.clear_flag_cache()
+
+
+def _remote_only(flags):
+    """Return a get_all_flags side effect where no flags can be evaluated locally"""
+    return lambda *_, only_evaluate_locally=False, **__: (
+        {} if only_evaluate_locally else flags
+    )
+
+
+def _remote_calls(get_all_flags_mock):
+    """Return the get_all_flags calls that went to the PostHog API"""
+    return [
+        call
+        for call in get_all_flags_mock.call_args_list
+        if not call.kwargs["only_evaluate_locally"]
+    ]
 
 
 def test_flags_from_cache(mocker, caplog, settings):
@@ -204,3 +221,208 @@ def test_posthog_flag_cache_timeout(mocker, settings):
     assert features.is_enabled("test_function")
     get_feature_flag_mock.assert_called()
     time_freezer.stop()
+
+
+def test_flags_from_process_cache(mocker):
+    """Repeated checks should be served from the process-local cache"""
+    get_feature_flag_mock = mocker.patch(
+        "posthog.get_feature_flag", autospec=True, return_value=True
+    )
+    get_many_spy = mocker.spy(features.durable_cache, "get_many")
+
+    assert features.is_enabled("testing_function")
+    get_many_spy.assert_called()
+    get_many_spy.reset_mock()
+
+    assert features.is_enabled("testing_function")
+    get_many_spy.assert_not_called()
+    get_feature_flag_mock.assert_called_once()
+
+
+def test_durable_cache_hits_are_kept_locally(mocker):
+    """Values found in the durable cache should be added to the process cache"""
+    mocker.patch("posthog.get_feature_flag", autospec=True, return_value=True)
+    assert features.is_enabled("testing_function")
+
+    features.clear_flag_cache()
+    get_many_spy = mocker.spy(features.durable_cache, "get_many")
+
+    assert features.is_enabled("testing_function")
+    assert features.is_enabled("testing_function")
+    assert get_many_spy.call_count == 1
+
+
+def test_get_feature_flags(mocker, settings):
+    """Uncached flags should be fetched together and cached values reused"""
+    settings.FEATURES["fallback_flag"] = True
+    mocker.patch("posthog.get_feature_flag", autospec=True, return_value="cached")
+    get_all_flags_mock = mocker.patch(
+        "posthog.get_all_flags",
+        autospec=True,
+        side_effect=_remote_only(
+            {"flag_a": True, "flag_b": False, "unrequested": True}
+        ),
+    )
+    assert features.is_enabled("cached_flag") == "cached"
+
+    assert features.get_feature_flags(
+        ["cached_flag", "flag_a", "flag_b", "fallback_flag"]
+    ) == {
+        "cached_flag": "cached",
+        "flag_a": True,
+        "flag_b": False,
+        "fallback_flag": True,
+    }
+    [remote_call] = _remote_calls(get_all_flags_mock)
+    assert remote_call.kwargs["flag_keys_to_evaluate"] == [
+        "flag_a",
+        "flag_b",
+        "fallback_flag",
+    ]
+
+    get_all_flags_mock.reset_mock()
+    features.clear_flag_cache()
+    assert features.get_feature_flags(["flag_a", "flag_b"]) == {
+        "flag_a": True,
+        "flag_b": False,
+    }
+    get_all_flags_mock.assert_not_called()
+
+
+def test_local_evaluation_only(mocker, settings):
+    """Local evaluation shouldn't touch the durable cache or call the API"""
+    settings.POSTHOG_LOCAL_EVALUATION_ONLY = True
+    settings.FEATURES["unknown_flag"] = True
+    get_feature_flag_mock = mocker.patch(
+        "posthog.get_feature_flag",
+        autospec=True,
+        side_effect=lambda name, *_, **__: True if name == "known_flag" else None,
+    )
+    durable_get_many = mocker.patch.object(features.durable_cache, "get_many")
+    durable_set_many = mocker.patch.object(features.durable_cache, "set_many")
+    is_circuit_open = mocker.patch("mitol.olposthog.features._is_circuit_open")
+
+    assert features.is_enabled("known_flag") is True
+    assert features.is_enabled("known_flag") is True
+    assert features.is_enabled("unknown_flag") is True
+
+    assert [call.args[0] for call in get_feature_flag_mock.call_args_list] == [
+        "known_flag",
+        "unknown_flag",
+    ]
+    for call in get_feature_flag_mock.call_args_list:
+        assert call.kwargs["only_evaluate_locally"] is True
+    durable_get_many.assert_not_called()
+    durable_set_many.assert_not_called()
+    is_circuit_open.assert_not_called()
+
+
+def test_feature_flag_context(mocker, settings):
+    """Flags should be fetched once per unique_id within a context"""
+    settings.FEATURES["missing_flag"] = True
+    get_feature_flag_mock = mocker.patch("posthog.get_feature_flag", autospec=True)
+    get_all_flags_mock = mocker.patch(
+        "posthog.get_all_flags",
+        autospec=True,
+        side_effect=_remote_only({"flag_a": True, "flag_b": False}),
+    )
+    set_many_spy = mocker.spy(features.durable_cache, "set_many")
+
+    with features.feature_flag_context():
+        assert features.is_enabled("flag_a") is True
+        assert features.is_enabled("flag_b") is False
+        assert features.is_enabled("missing_flag") is True
+        assert features.get_feature_flags(["flag_a", "flag_b"]) == {
+            "flag_a": True,
+            "flag_b": False,
+        }
+        assert len(_remote_calls(get_all_flags_mock)) == 1
+
+        assert features.is_enabled("flag_a", opt_unique_id="other_user") is True
+        assert len(_remote_calls(get_all_flags_mock)) == 2  # noqa: PLR2004
+
+    get_feature_flag_mock.assert_not_called()
+    assert set_many_spy.call_count == 2  # noqa: PLR2004
+
+    get_all_flags_mock.reset_mock()
+    assert features.is_enabled("flag_a") is True
+    get_all_flags_mock.assert_not_called()
+
+
+def test_feature_flag_context_falls_back(mocker, settings):
+    """If the flags can't be prefetched, checks should go through the caches"""
+    settings.POSTHOG_CIRCUIT_BREAKER_COOLDOWN_SECONDS = 60
+    settings.FEATURES["flag_a"] = False
+    caches["durable"].set(features.CIRCUIT_BREAKER_CACHE_KEY, 1, 60)
+    get_all_flags_mock = mocker.patch(
+        "posthog.get_all_flags", autospec=True, side_effect=_remote_only({})
+    )
+
+    with features.feature_flag_context():
+        assert features.is_enabled("flag_a") is False
+
+    assert _remote_calls(get_all_flags_mock) == []
+
+
+def test_fetch_flags_evaluates_locally_first(mocker):
+    """Flags that can be evaluated locally shouldn't be requested from the API"""
+    get_all_flags_mock = mocker.patch(
+        "posthog.get_all_flags",
+        autospec=True,
+        side_effect=lambda *_, only_evaluate_locally, **__: (
+            {"flag_a": True}
+            if only_evaluate_locally
+            else {"flag_a": False, "flag_b": True}
+        ),
+    )
+
+    assert features.get_feature_flags(["flag_a"]) == {"flag_a": True}
+    assert _remote_calls(get_all_flags_mock) == []
+
+    assert features.get_feature_flags(["flag_a", "flag_b"]) == {
+        "flag_a": True,
+        "flag_b": True,
+    }
+    [remote_call] = _remote_calls(get_all_flags_mock)
+    assert remote_call.kwargs["flag_keys_to_evaluate"] == ["flag_b"]
+
+
+@pytest.mark.parametrize(
+    ("definition_keys", "remote_flag_keys", "expected"),
+    [
+        (["flag_a"], [], {"flag_a": True}),
+        (["flag_a", "flag_b"], [["flag_b"]], {"flag_a": True, "flag_b": False}),
+        (None, [None], {"flag_a": True, "flag_b": False}),
+    ],
+)
+def test_get_all_feature_flags_evaluates_locally_first(
+    mocker, definition_keys, remote_flag_keys, expected
+):
+    """
+    Only the flags that can't be evaluated locally should be requested from the
+    API, or all of them if the client doesn't have any definitions
+    """
+    mocker.patch.object(
+        features.posthog,
+        "default_client",
+        mocker.Mock(
+            feature_flags=[{"key": key} for key in definition_keys]
+            if definition_keys
+            else None
+        ),
+    )
+    get_all_flags_mock = mocker.patch(
+        "posthog.get_all_flags",
+        autospec=True,
+        side_effect=lambda *_, only_evaluate_locally, **__: (
+            {"flag_a": True}
+            if only_evaluate_locally
+            else {"flag_a": True, "flag_b": False}
+        ),
+    )
+
+    assert features.get_all_feature_flags() == expected
+    assert [
+        call.kwargs["flag_keys_to_evaluate"]
+        for call in _remote_calls(get_all_flags_mock)
+    ] == remote_flag_keys
@@ -0,0 +1,88 @@
+"""Tests for the olposthog middleware"""
+
+import pytest
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory
+from mitol.olposthog import features
+from mitol.olposthog.middleware import FeatureFlagContextMiddleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def posthog_settings(settings):
+    """Enable PostHog and clear the flag caches"""
+    settings.POSTHOG_ENABLED = True
+    settings.HOSTNAME = "fake_host_name"
+    settings.ENVIRONMENT = "prod"
+    caches["durable"].clear()
+    features.clear_flag_cache()
+
+
+@pytest.fixture
+def get_all_flags(mocker):
+    """Mock the PostHog get_all_flags call"""
+    return mocker.patch(
+        "posthog.get_all_flags",
+        autospec=True,
+        side_effect=lambda *_, only_evaluate_locally, **__: (
+            {} if only_evaluate_locally else {"flag_a": True, "flag_b": False}
+        ),
+    )
+
+
+def _check_flags(_request):
+    return HttpResponse(
+        f"{features.is_enabled('flag_a')} {features.is_enabled('flag_b')}"
+    )
+
+
+def test_middleware(mocker, get_all_flags):
+    """Flags checked in a request should be fetched once"""
+    get_feature_flag = mocker.patch("posthog.get_feature_flag", autospec=True)
+    middleware = FeatureFlagContextMiddleware(_check_flags)
+
+    response = middleware(RequestFactory().get("/"))
+
+    assert response.content == b"True False"
+    assert [
+        call.kwargs["only_evaluate_locally"] for call in get_all_flags.call_args_list
+    ] == [True, False]
+    get_feature_flag.assert_not_called()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_middleware_async(get_all_flags):
+    """The middleware should work in an async middleware chain"""
+
+    async def get_response(request):
+        return await sync_to_async(_check_flags)(request)
+
+    middleware = FeatureFlagContextMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+
+    response = await middleware(RequestFactory().get("/"))
+
+    assert response.content == b"True False"
+    assert get_all_flags.call_count == 2  # noqa: PLR2004
+
+
+def test_middleware_local_evaluation(mocker, get_all_flags):
+    """Flags the client can evaluate locally shouldn't be fetched from PostHog"""
+    mocker.patch.object(
+        features.posthog,
+        "default_client",
+        mocker.Mock(feature_flags=[{"key": "flag_a"}, {"key": "flag_b"}]),
+    )
+    get_all_flags.side_effect = None
+    get_all_flags.return_value = {"flag_a": True, "flag_b": False}
+    middleware = FeatureFlagContextMiddleware(_check_flags)
+
+    response = middleware(RequestFactory().get("/"))
+
+    assert response.content == b"True False"
+    get_all_flags.assert_called_once()
+    assert get_all_flags.call_args.kwargs["only_evaluate_locally"] is True
@@ -2,6 +2,7 @@ import json
 import math
 import random
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from http import HTTPStatus
 
@@ -156,8 +157,20 @@ def bulk_operations_count(request, settings):
     return request.param
 
 
+@pytest.fixture
+def sync_concurrency(request, settings):
+    settings.MITOL_SCIM_KEYCLOAK_SYNC_CONCURRENCY = request.param
+    return request.param
+
+
 @pytest.fixture
 def mock_bulk_requests(users: Users, responses: RequestsMock):
+    # computed up front because the callback may run on a sync worker thread
+    user_dicts_by_id = {
+        user.id: UserAdapter(user, InMemoryHttpRequest.stub()).to_dict()
+        for user in users.users
+    }
+
     def _callback(request):
         payload = json.loads(request.body)
         operations = payload["Operations"]
@@ -172,7 +185,7 @@ def mock_bulk_requests(users: Users, responses: RequestsMock):
                 "path": "/Users",
                 "bulkId": str(user.id),
                 "data": {
-                    **(UserAdapter(user, InMemoryHttpRequest.stub()).to_dict()),
+                    **user_dicts_by_id[user.id],
                     "emailVerified": True,
                 },
             }
@@ -205,11 +218,7 @@ def mock_bulk_requests(users: Users, responses: RequestsMock):
                                 # the plugin echoes the created resource on
                                 # success, not just a bare location/status
                                 "response": {
-                                    **(
-                                        UserAdapter(
-                                            user, InMemoryHttpRequest.stub()
-                                        ).to_dict()
-                                    ),
+                                    **user_dicts_by_id[user.id],
                                     "schemas": [SchemaURI.USER],
                                     "id": users.external_ids_by_user_id[user.id],
                                 },
@@ -239,12 +248,14 @@ def mock_bulk_requests(users: Users, responses: RequestsMock):
 @pytest.mark.django_db
 @pytest.mark.parametrize("users", [17, 25, 98, 178], indirect=True)
 @pytest.mark.parametrize("bulk_operations_count", [13, 50, 75], indirect=True)
+@pytest.mark.parametrize("sync_concurrency", [1, 4], indirect=True)
 @pytest.mark.usefixtures(
     "responses",
     "mock_client_init_requests",
     "mock_search_requests",
     "mock_bulk_requests",
     "bulk_operations_count",
+    "sync_concurrency",
 )
 def test_sync_users_to_scim_remote(users: Users):
     for user in users.users:
@@ -285,3 +296,86 @@ def test_sync_users_to_scim_remote(users: Users):
                 assert (
                     state.response_body["id"] == users.external_ids_by_user_id[user.id]
                 )
+
+
+def test_bounded_map():
+    """_bounded_map should keep results in order and only consume items as needed"""
+    consumed = []
+
+    def _items():
+        for item in range(10):
+            consumed.append(item)
+            yield item
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = api._bounded_map(executor, lambda item: item * 2, _items(), 3)  # noqa: SLF001
+
+        assert next(results) == (0, 0)
+        assert consumed == [0, 1, 2, 3]
+        assert list(results) == [(item, item * 2) for item in range(1, 10)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("sync_concurrency", [1, 4], indirect=True)
+@pytest.mark.usefixtures("mock_client_init_requests", "sync_concurrency")
+def test_update_users_in_scim_remote(settings, responses: RequestsMock):
+    """Users already in the remote should be updated with PUTs to their external id"""
+    settings.MITOL_SCIM_KEYCLOAK_BULK_OPERATIONS_COUNT = 2
+    users = UserFactory.create_batch(5)
+    for user in users:
+        user.scim_external_id = user.global_id = str(uuid.uuid4())
+        user.scim_id = str(user.id)
+        user.save()
+    user_to_error = users[0]
+    users_by_id = {user.id: user for user in users}
+    user_dicts_by_id = {
+        user.id: UserAdapter(user, InMemoryHttpRequest.stub()).to_dict()
+        for user in users
+    }
+
+    def _callback(request):
+        operations = json.loads(request.body)["Operations"]
+        results = []
+
+        for operation in operations:
+            user = users_by_id[int(operation["bulkId"])]
+            assert operation == {
+                "method": "PUT",
+                "path": f"/Users/{user.scim_external_id}",
+                "bulkId": str(user.id),
+                "data": {**user_dicts_by_id[user.id], "emailVerified": True},
+            }
+            results.append(
+                {
+                    "bulkId": str(user.id),
+                    "method": "PUT",
+                    "status": "409",
+                    "response": {"detail": "Conflict"},
+                }
+                if user == user_to_error
+                else {
+                    "bulkId": str(user.id),
+                    "method": "PUT",
+                    "status": "200",
+                }
+            )
+
+        return (200, {}, json.dumps({"Operations": results}))
+
+    responses.add_callback(
+        responses.POST,
+        url="https://keycloak:8080/realms/ol-local/scim/v2/Users/Bulk",
+        callback=_callback,
+    )
+
+    states = {state.user.id: state for state in api.update_users_in_scim_remote(users)}
+
+    assert len(states) == len(users)
+    for user in users:
+        state = states[user.id]
+        if user == user_to_error:
+            assert state.success is False
+            assert state.error == {"detail": "Conflict"}
+        else:
+            assert state.success is True
+            assert state.external_id == user.scim_external_id
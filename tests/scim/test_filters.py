@@ -0,0 +1,92 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db.models.lookups import In
+from main.factories import UserFactory
+from mitol.scim import filters
+from mitol.scim.filters import UserFilterQuery, normalize_filter
+from mitol.scim.parser import Filters
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def _clear_filter_cache():
+    """Start each test with an empty filter cache"""
+    filters.clear_filter_cache()
+    yield
+    filters.clear_filter_cache()
+
+
+@pytest.mark.parametrize(
+    ("filter_query", "expected"),
+    [
+        ('userName eq "jdoe"', 'userName eq "jdoe"'),
+        ('  userName   eq\n"jdoe"  ', 'userName eq "jdoe"'),
+        ('userName eq "j  doe"', 'userName eq "j  doe"'),
+        (
+            'userName eq "a \\"  b"  or  userName eq "c"',
+            'userName eq "a \\"  b" or userName eq "c"',
+        ),
+    ],
+)
+def test_normalize_filter(filter_query, expected):
+    """Whitespace should be collapsed everywhere except inside quoted strings"""
+    assert normalize_filter(filter_query) == expected
+
+
+def test_compile_is_cached(mocker):
+    """Filters that only differ in whitespace should only be parsed once"""
+    parse_spy = mocker.spy(Filters, "parse_string")
+
+    q = UserFilterQuery.compile('userName eq "jdoe" and active eq true')
+
+    assert UserFilterQuery.compile('userName  eq "jdoe"  and active eq true') is q
+    parse_spy.assert_called_once()
+
+
+def test_compile_cache_disabled(mocker, settings):
+    """A cache size of 0 should disable caching"""
+    settings.MITOL_SCIM_FILTER_CACHE_SIZE = 0
+    parse_spy = mocker.spy(Filters, "parse_string")
+
+    UserFilterQuery.compile('userName eq "jdoe"')
+    UserFilterQuery.compile('userName eq "jdoe"')
+
+    assert parse_spy.call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("filter_query", "is_in_lookup"),
+    [
+        ('emails.value eq "a@example.com" or emails.value eq "b@example.com"', True),
+        ('userName eq "a" OR userName eq "b" OR userName eq "c"', True),
+        ('userName eq "a"', False),
+        ('userName eq "a" or emails.value eq "b@example.com"', False),
+        ('userName eq "a" and userName eq "b"', False),
+        ('userName eq "a" or userName co "b"', False),
+    ],
+)
+def test_compile_equality_chain(filter_query, is_in_lookup):
+    """OR chains of equality checks on one attribute should become one IN lookup"""
+    q = UserFilterQuery.compile(filter_query)
+
+    if is_in_lookup:
+        assert len(q.children) == 1
+        child = q.children[0]
+        assert isinstance(child, In) or child[0].endswith("__in")
+    else:
+        assert not any(isinstance(child, In) for child in q.children)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [1, 5, 50])
+def test_search_equality_chain(count):
+    """An email OR chain should match the same users, case-insensitively"""
+    users = UserFactory.create_batch(count)
+    UserFactory.create_batch(5)
+
+    filter_query = " or ".join(
+        f'emails.value eq "{user.email.upper()}"' for user in users
+    )
+
+    assert set(UserFilterQuery.search(filter_query)) == set(users)
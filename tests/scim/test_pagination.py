@@ -0,0 +1,30 @@
+"""Tests for SCIM pagination"""
+
+import pytest
+from libraries.models import Author, Book
+from mitol.scim import pagination
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("related", [("author",), ()])
+def test_only_fields_keeps_select_related(related):
+    """Relations loaded with select_related() shouldn't be deferred"""
+    Book.objects.create(title="Title", author=Author.objects.create(name="Name"))
+
+    book = pagination.only_fields(
+        Book.objects.select_related(*related), ("id", "title")
+    ).get()
+
+    assert book.get_deferred_fields() == set()
+    assert book.author.get_deferred_fields() == set()
+    assert book.author.name == "Name"
+
+
+@pytest.mark.django_db
+def test_only_fields():
+    """Fields that weren't asked for should be deferred"""
+    Book.objects.create(title="Title", author=Author.objects.create(name="Name"))
+
+    book = pagination.only_fields(Book.objects.all(), ("id",)).get()
+
+    assert book.get_deferred_fields() == {"title", "author_id"}
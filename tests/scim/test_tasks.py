@@ -2,7 +2,9 @@ import pytest
 from django.contrib.auth import get_user_model
 from mitol.common.factories import UserFactory
 from mitol.common.factories.defaults import ScimUserFactory, SsoUserFactory
+from mitol.common.utils.datetime import now_in_utc
 from mitol.scim import tasks
+from mitol.scim.models import RemoteSyncCursor
 from more_itertools import flatten
 
 pytestmark = pytest.mark.django_db
@@ -62,3 +64,78 @@ def test_sync_users_to_scim_remote_batch_drains_the_generator(mocker):
     tasks.sync_users_to_scim_remote_batch(user_ids=[user.id for user in users])
 
     assert consumed_ids == [user.id for user in users]
+
+
+@pytest.mark.parametrize("has_failures", [True, False])
+def test_sync_changed_users_to_scim_remote(mocker, has_failures):
+    """Only changed users should be synced, and the cursor always advanced"""
+    old_users = UserFactory.create_batch(3)
+    cursor = RemoteSyncCursor.objects.create(name="default", synced_until=now_in_utc())
+    changed_users = UserFactory.create_batch(3)
+    UserFactory.create(is_active=False)
+    synced_ids = []
+
+    def _fake_sync(users):
+        for user in users:
+            synced_ids.append(user.id)
+            yield mocker.Mock(user=user, success=not has_failures)
+
+    mocker.patch(
+        "mitol.scim.tasks.api.sync_changed_users_to_scim_remote",
+        side_effect=_fake_sync,
+    )
+
+    tasks.sync_changed_users_to_scim_remote()
+
+    assert synced_ids == [user.id for user in changed_users]
+    assert not {user.id for user in old_users} & set(synced_ids)
+
+    previous_synced_until = cursor.synced_until
+    cursor.refresh_from_db()
+    assert cursor.synced_until > previous_synced_until
+    assert cursor.failed_user_ids == (synced_ids if has_failures else [])
+
+
+def test_sync_changed_users_to_scim_remote_retries_failures(mocker):
+    """A user that keeps failing should be retried without holding back the cursor"""
+    RemoteSyncCursor.objects.create(name="default", synced_until=now_in_utc())
+    failing_user, *other_users = UserFactory.create_batch(3)
+    synced_ids = []
+
+    def _fake_sync(users):
+        synced_ids.append([user.id for user in users])
+        for user in users:
+            yield mocker.Mock(user=user, success=user != failing_user)
+
+    mocker.patch(
+        "mitol.scim.tasks.api.sync_changed_users_to_scim_remote",
+        side_effect=_fake_sync,
+    )
+
+    tasks.sync_changed_users_to_scim_remote()
+    first_synced_until = RemoteSyncCursor.objects.get(name="default").synced_until
+
+    changed_user = UserFactory.create()
+    tasks.sync_changed_users_to_scim_remote()
+
+    cursor = RemoteSyncCursor.objects.get(name="default")
+    assert synced_ids == [
+        [failing_user.id, *(user.id for user in other_users)],
+        [failing_user.id, changed_user.id],
+    ]
+    assert cursor.synced_until > first_synced_until
+    assert cursor.failed_user_ids == [failing_user.id]
+
+
+def test_sync_changed_users_to_scim_remote_first_run(mocker):
+    """Without a cursor every user should be synced"""
+    users = UserFactory.create_batch(3)
+    mock_sync = mocker.patch(
+        "mitol.scim.tasks.api.sync_changed_users_to_scim_remote", return_value=[]
+    )
+
+    tasks.sync_changed_users_to_scim_remote()
+
+    synced_ids = {user.id for user in mock_sync.call_args[0][0]}
+    assert {user.id for user in users} <= synced_ids
+    assert RemoteSyncCursor.objects.get(name="default").synced_until is not None
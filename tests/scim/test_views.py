@@ -13,12 +13,15 @@ import pytest
 from anys import ANY_STR
 from deepmerge import always_merger
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from main.factories import UserFactory
 from mitol.scim import constants
 from mitol.scim.adapters import UserAdapter
-from mitol.scim.views import UsersView
+from mitol.scim.views import SearchView, UsersView
 
 User = get_user_model()
 
@@ -742,3 +745,313 @@ def test_bulk_delete_dispatches_to_custom_users_view(scim_client, mocker):
 
     assert resp.status_code == HTTPStatus.OK
     mock_delete.assert_called_once()
+
+
+def _post_bulk(scim_client, operations, **extra):
+    """POST operations to the /Bulk endpoint"""
+    return scim_client.post(
+        reverse("ol-scim:bulk"),
+        content_type="application/scim+json",
+        data=json.dumps(
+            {
+                "schemas": [constants.SchemaURI.BULK_REQUEST],
+                "Operations": [operation.payload for operation in operations],
+                **extra,
+            }
+        ),
+    )
+
+
+@pytest.fixture
+def bulk_write_operations():
+    """Return a homogeneous set of POST and PUT /Users operations"""
+    bulk_id_gen = itertools.count()
+    users_to_put = UserFactory.create_batch(20)
+
+    operations = [
+        *[_post_operation(data, bulk_id_gen) for data in UserFactory.build_batch(20)],
+        *[
+            _put_operation(user, data, bulk_id_gen)
+            for user, data in zip(users_to_put, UserFactory.build_batch(20))
+        ],
+    ]
+    random.shuffle(operations)
+    return operations
+
+
+@pytest.fixture
+def bulk_fast_path(settings):
+    """Turn on batched writes for /Bulk user requests"""
+    settings.MITOL_SCIM_BULK_FAST_PATH_ENABLED = True
+    return settings
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("bulk_fast_path")
+def test_bulk_post_user_writes_are_batched(
+    scim_client, bulk_write_operations, mocker, django_assert_max_num_queries
+):
+    """Homogeneous POST/PUT /Users operations should be written in bulk"""
+    mock_post = mocker.patch.object(UsersView, "post")
+    mock_put = mocker.patch.object(UsersView, "put")
+    user_count = User.objects.count()
+
+    with django_assert_max_num_queries(15):
+        resp = _post_bulk(scim_client, bulk_write_operations)
+
+    assert resp.status_code == HTTPStatus.OK
+    mock_post.assert_not_called()
+    mock_put.assert_not_called()
+    assert User.objects.count() == user_count + 20
+
+    results = resp.json()["Operations"]
+    assert results == [
+        operation.expected_response for operation in bulk_write_operations
+    ]
+
+    for operation, result in zip(bulk_write_operations, results):
+        user = User.objects.get(scim_id=result["id"])
+        assert result["location"].endswith(f"/Users/{user.scim_id}")
+
+        for key in USER_FIELD_TYPES:
+            attr_getter = operator.attrgetter(key)
+            assert attr_getter(user) == attr_getter(operation.expected_user_state)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("bulk_fast_path")
+@pytest.mark.parametrize("fail_on_errors", [None, 1, 2])
+def test_bulk_post_user_writes_errors(
+    scim_client, bulk_write_operations, fail_on_errors
+):
+    """Failed operations should get their own status and honour failOnErrors"""
+    existing_user = UserFactory.create()
+    bad_put = SimpleNamespace(
+        payload={
+            "method": "put",
+            "bulkId": "missing",
+            "path": "/Users/does-not-exist",
+            "data": _user_to_scim_payload(UserFactory.build()),
+        }
+    )
+    conflicting_post = SimpleNamespace(
+        payload={
+            "method": "post",
+            "bulkId": "conflict",
+            "path": "/Users",
+            "data": _user_to_scim_payload(existing_user),
+        }
+    )
+    first_ops, last_ops = bulk_write_operations[:10], bulk_write_operations[10:]
+    operations = [*first_ops, bad_put, conflicting_post, *last_ops]
+
+    extra = {} if fail_on_errors is None else {"failOnErrors": fail_on_errors}
+    resp = _post_bulk(scim_client, operations, **extra)
+
+    assert resp.status_code == HTTPStatus.OK
+    results = resp.json()["Operations"]
+    results_by_bulk_id = {result["bulkId"]: result for result in results}
+
+    assert results_by_bulk_id["missing"]["status"] == "404"
+    assert results[: len(first_ops)] == [op.expected_response for op in first_ops]
+
+    if fail_on_errors == 1:
+        assert len(results) == len(first_ops) + 1
+    else:
+        assert results_by_bulk_id["conflict"]["status"] == "409"
+
+    if fail_on_errors is None:
+        assert results[len(first_ops) + 2 :] == [
+            op.expected_response for op in last_ops
+        ]
+    else:
+        # nothing after the threshold should have been applied
+        assert len(results) == len(first_ops) + fail_on_errors
+        for operation in last_ops:
+            username = operation.expected_user_state.username
+            assert not User.objects.filter(username=username).exists()
+
+
+@pytest.mark.django_db
+def test_bulk_post_user_writes_disabled(
+    scim_client, settings, bulk_write_operations, mocker
+):
+    """If disabled the operations should be run one at a time"""
+    settings.MITOL_SCIM_BULK_FAST_PATH_ENABLED = False
+    mock_apply = mocker.patch("mitol.scim.bulk.apply_user_write_operations")
+
+    resp = _post_bulk(scim_client, bulk_write_operations)
+
+    assert resp.status_code == HTTPStatus.OK
+    mock_apply.assert_not_called()
+    assert resp.json()["Operations"] == [
+        operation.expected_response for operation in bulk_write_operations
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("bulk_fast_path")
+def test_bulk_post_user_writes_with_signal_receivers(
+    scim_client, bulk_write_operations, mocker
+):
+    """If something receives User save signals the operations should be run one at a time"""  # noqa: E501
+    mock_apply = mocker.patch("mitol.scim.bulk.apply_user_write_operations")
+    receiver = mocker.Mock()
+    post_save.connect(receiver, sender=User, weak=False)
+    try:
+        resp = _post_bulk(scim_client, bulk_write_operations)
+    finally:
+        post_save.disconnect(receiver, sender=User)
+
+    assert resp.status_code == HTTPStatus.OK
+    mock_apply.assert_not_called()
+    assert receiver.call_count == len(bulk_write_operations)
+
+
+def _search_page(scim_client, users, **params):
+    """Fetch a page of users matching the emails of users"""
+    return scim_client.post(
+        reverse("ol-scim:users-search"),
+        content_type="application/scim+json",
+        data=json.dumps(
+            {
+                "schemas": [constants.SchemaURI.SERACH_REQUEST],
+                "filter": " OR ".join(
+                    [f'emails.value EQ "{user.email}"' for user in users]
+                ),
+                **params,
+            }
+        ),
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("sort_order", ["ascending", "descending"])
+def test_user_search_cursor(scim_client, sort_order):
+    """Following nextCursor should walk every matching user exactly once"""
+    users = UserFactory.create_batch(25)
+    UserFactory.create_batch(5)
+    expected = sorted(
+        (user.scim_id for user in users),
+        key=int,
+        reverse=sort_order == "descending",
+    )
+
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        resp = _search_page(
+            scim_client, users, count=10, cursor=cursor, sortOrder=sort_order
+        )
+        assert resp.status_code == HTTPStatus.OK, resp.content
+        body = resp.json()
+
+        assert body["totalResults"] == len(users)
+        assert "startIndex" not in body
+        seen.extend(resource["id"] for resource in body["Resources"])
+        cursor = body.get("nextCursor")
+
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_user_search_invalid_cursor(scim_client):
+    """An invalid cursor should be rejected"""
+    users = UserFactory.create_batch(2)
+
+    resp = _search_page(scim_client, users, cursor="not a cursor")
+
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_user_search_page_queries(scim_client, django_assert_num_queries):
+    """A page shouldn't lock or load users one at a time, or count a short page"""
+    users = UserFactory.create_batch(30)
+
+    # the session, the logged in user and then the page itself
+    with django_assert_num_queries(3):
+        resp = _search_page(scim_client, users, count=50)
+
+    assert resp.json()["totalResults"] == len(users)
+
+    with django_assert_num_queries(4):  # plus a count, since the page is full
+        resp = _search_page(scim_client, users, count=10)
+
+    assert resp.json()["totalResults"] == len(users)
+
+
+@pytest.mark.django_db
+def test_user_search_cached_count(scim_client, settings):
+    """The total should be reused between pages if count caching is enabled"""
+    settings.MITOL_SCIM_SEARCH_COUNT_CACHE_SECONDS = 60
+    settings.MITOL_SCIM_SEARCH_COUNT_CACHE_NAME = "durable"
+    users = UserFactory.create_batch(30)
+
+    _search_page(scim_client, users, count=10)
+
+    with CaptureQueriesContext(connection) as context:
+        resp = _search_page(scim_client, users, count=10, startIndex=11)
+
+    assert resp.json()["totalResults"] == len(users)
+    assert not [query for query in context.captured_queries if "COUNT(" in query["sql"]]
+
+
+@pytest.mark.django_db
+def test_user_list_cursor(scim_client):
+    """GET /Users should support cursor paging too"""
+    users = UserFactory.create_batch(5)
+
+    resp = scim_client.get(reverse("ol-scim:users"), {"count": 3, "cursor": ""})
+    body = resp.json()
+
+    assert len(body["Resources"]) == 3  # noqa: PLR2004
+    assert body["totalResults"] >= len(users)
+
+    resp = scim_client.get(
+        reverse("ol-scim:users"), {"count": 3, "cursor": body["nextCursor"]}
+    )
+    ids = [resource["id"] for resource in body["Resources"]] + [
+        resource["id"] for resource in resp.json()["Resources"]
+    ]
+
+    assert len(set(ids)) == len(ids)
+
+
+class ProjectedUserAdapter(UserAdapter):
+    """UserAdapter that only loads the fields to_dict() reads in lists"""
+
+    list_fields = (
+        "id",
+        "scim_id",
+        "scim_external_id",
+        "username",
+        "first_name",
+        "last_name",
+        "email",
+        "is_active",
+        "created_on",
+        "updated_on",
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("adapter_cls", "loads_password"),
+    [(UserAdapter, True), (ProjectedUserAdapter, False)],
+)
+def test_user_search_list_fields(mocker, scim_client, adapter_cls, loads_password):
+    """Only an adapter that sets list_fields should limit the fields loaded"""
+    mocker.patch.object(
+        SearchView, "scim_adapter_getter", mocker.Mock(return_value=adapter_cls)
+    )
+    users = UserFactory.create_batch(5)
+
+    with CaptureQueriesContext(connection) as context:
+        resp = _search_page(scim_client, users, count=10)
+
+    assert resp.status_code == HTTPStatus.OK, resp.content
+    assert len(resp.json()["Resources"]) == len(users)
+    # the session, the logged in user and then the page, with no deferred loads
+    assert len(context.captured_queries) == 3  # noqa: PLR2004
+    assert ('"password"' in context.captured_queries[-1]["sql"]) is loads_password